@@ -8,13 +8,16 @@ import streamlit as st
 from datetime import datetime, date
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add src to path
 sys.path.append(str(Path(__file__).parent))
 
 from src.pdf_extractor import extract_weg_data, extract_rental_contract, extract_bank_statement
-from src.ai_extractor import extract_weg_data_ai, extract_rental_contract_ai, extract_bank_statement_ai, calculate_monthly_prepayment_from_ai, OPENAI_AVAILABLE
+from src.ai_extractor import (
+    extract_all_ai, extract_weg_data_hybrid, stream_weg_data_ai, calculate_monthly_prepayment_from_ai, OPENAI_AVAILABLE
+)
 from src.cost_calculator import calculate_tenant_costs
 from src.excel_generator import create_nebenkostenabrechnung
 from src.pdf_converter import convert_excel_to_pdf
@@ -100,27 +103,41 @@ def main():
         # Extraction method selection
         st.subheader("🔧 Extraktionsmethode")
         
-        if OPENAI_AVAILABLE:
+        refresh_ai = False
+        ai_backend = config.AI_BACKEND['backend']
+        if OPENAI_AVAILABLE or ai_backend == 'replay':
             import os
             from dotenv import load_dotenv
             load_dotenv()
-            has_api_key = bool(os.getenv('OPENAI_API_KEY'))
+            # Offline-Backends (Aufzeichnungen) brauchen keinen API Key
+            has_api_key = bool(os.getenv('OPENAI_API_KEY')) or ai_backend != 'openai'
             
             extraction_method = st.radio(
                 "WEG-Abrechnung Extraktion",
-                options=["🤖 AI (OpenAI)", "Standard (Regelbasiert)"],
+                options=["🤖 AI (OpenAI)", "🔀 Hybrid (Regelbasiert + AI)", "Standard (Regelbasiert)"],
                 index=0,  # AI is default
-                help="AI: GPT-4-turbo für intelligente Extraktion\nStandard: Schnell, kostenlos, regelbasiert"
+                help="AI: GPT-4-turbo für intelligente Extraktion\n"
+                     "Hybrid: regelbasiert, AI nur für Seiten mit unsicheren Posten\n"
+                     "Standard: Schnell, kostenlos, regelbasiert"
             )
             
-            if extraction_method == "🤖 AI (OpenAI)":
+            if extraction_method != "Standard (Regelbasiert)":
                 if not has_api_key:
                     st.warning("⚠️ OPENAI_API_KEY nicht in .env gefunden!")
                     st.caption("Bitte API Key in .env eintragen:")
                     st.code("OPENAI_API_KEY=sk-...", language="bash")
+                elif ai_backend != 'openai':
+                    st.info(f"🧪 Offline-Backend '{ai_backend}': aufgezeichnete Antworten mit simulierter Latenz")
                 else:
                     st.success("✅ OpenAI API Key gefunden")
-                    st.info("💡 Lade alle 3 PDFs hoch für vollautomatische Extraktion!")
+                    if extraction_method == "🤖 AI (OpenAI)":
+                        st.info("💡 Lade alle 3 PDFs hoch für vollautomatische Extraktion!")
+                
+                refresh_ai = st.checkbox(
+                    "AI-Cache umgehen",
+                    value=False,
+                    help="Gleiche Dokumente werden sonst sofort aus dem Cache beantwortet. Aktivieren, um OpenAI neu anzufragen."
+                )
         else:
             extraction_method = "Standard (Regelbasiert)"
             st.info("💡 AI-Extraktion nicht verfügbar")
@@ -179,10 +196,10 @@ def main():
     with col3:
         st.subheader("Kontoauszüge (Optional)")
         bank_pdf = st.file_uploader(
-            "Mietzahlungen (PDF)",
-            type=['pdf'],
+            "Mietzahlungen (PDF, CAMT.053, MT940 oder CSV)",
+            type=['pdf', 'xml', 'sta', 'csv'],
             key='bank',
-            help="Optional: Zur Berechnung der gezahlten Monate"
+            help="Optional: Zur Berechnung der gezahlten Monate - Bank-Exporte (XML/STA/CSV) werden exakt und ohne AI gelesen"
         )
         if bank_pdf:
             st.success(f"✓ {bank_pdf.name}")
@@ -211,18 +228,93 @@ def main():
                 with open(weg_path, 'wb') as f:
                     f.write(weg_pdf.getbuffer())
                 
+                rental_path = None
+                if rental_pdf:
+                    rental_path = temp_dir / rental_pdf.name
+                    with open(rental_path, 'wb') as f:
+                        f.write(rental_pdf.getbuffer())
+                
+                bank_path = None
+                if bank_pdf:
+                    bank_path = temp_dir / bank_pdf.name
+                    with open(bank_path, 'wb') as f:
+                        f.write(bank_pdf.getbuffer())
+                
+                # AI mode: all OpenAI requests at once (WEG parallel to rental → bank)
+                ai_results = None
+                if extraction_method == "🤖 AI (OpenAI)":
+                    st.info("🤖 Verwende AI-Extraktion (OpenAI) - Dokumente werden gleichzeitig angefragt...")
+                    ai_bank_path = bank_path if bank_path and bank_path.suffix.lower() == '.pdf' else None
+                    stream_weg = config.AI_EXTRACTION['stream']
+                    
+                    with ThreadPoolExecutor(max_workers=1) as executor:
+                        # Streaming: WEG here (live table), rental → bank in the background
+                        others = executor.submit(
+                            extract_all_ai,
+                            None if stream_weg else str(weg_path),
+                            year,
+                            einheit=config.PROPERTY['einheit'],
+                            rental_path=str(rental_path) if rental_path else None,
+                            bank_path=str(ai_bank_path) if ai_bank_path else None,
+                            use_cache=not refresh_ai
+                        )
+                        
+                        streamed_weg = None
+                        weg_error = None
+                        if stream_weg:
+                            live_table = st.empty()
+                            live_rows = []
+                            try:
+                                for event in stream_weg_data_ai(
+                                    str(weg_path),
+                                    year,
+                                    einheit=config.PROPERTY['einheit'],
+                                    use_cache=not refresh_ai
+                                ):
+                                    if event['type'] == 'cost':
+                                        live_rows.append({
+                                            'Kostenart': event['cost']['name'],
+                                            'Betrag (€)': f"{event['cost']['amount']:.2f}"
+                                        })
+                                        live_table.dataframe(live_rows, use_container_width=True)
+                                    else:
+                                        streamed_weg = event['result']
+                            except Exception as e:
+                                weg_error = e
+                        
+                        ai_results = others.result()
+                    
+                    if stream_weg:
+                        ai_results['weg'] = streamed_weg
+                        if weg_error is not None:
+                            ai_results['errors']['weg'] = weg_error
+                    st.caption(f"⏱️ AI-Extraktion: {ai_results['wall_seconds']:.1f} s")
+                
                 # Extract WEG data (required)
                 try:
                     # Choose extraction method
-                    if extraction_method == "🤖 AI (OpenAI)":
-                        st.info("🤖 Verwende AI-Extraktion (OpenAI)...")
-                        weg_data = extract_weg_data_ai(
-                            str(weg_path), 
-                            year, 
-                            einheit=config.PROPERTY['einheit']
-                        )
+                    if ai_results is not None:
+                        if 'weg' in ai_results['errors']:
+                            raise ai_results['errors']['weg']
+                        weg_data = ai_results['weg']
                         st.success(f"✅ WEG (AI): {len(weg_data.get('costs', []))} Kostenposten extrahiert")
                         st.caption(f"🤖 Modell: {weg_data.get('model_used', 'gpt-4o-mini')}")
+                    elif extraction_method == "🔀 Hybrid (Regelbasiert + AI)":
+                        st.info("🔀 Verwende Hybrid-Extraktion (AI nur für unsichere Posten)...")
+                        weg_data = extract_weg_data_hybrid(
+                            str(weg_path),
+                            year,
+                            einheit=config.PROPERTY['einheit'],
+                            use_cache=not refresh_ai
+                        )
+                        st.success(f"✅ WEG (Hybrid): {len(weg_data.get('costs', []))} Kostenposten extrahiert")
+                        if weg_data.get('warning'):
+                            st.warning(f"⚠️ AI-Nachextraktion nicht möglich, regelbasiertes Ergebnis: {weg_data['warning']}")
+                        elif weg_data['ai_pages']:
+                            st.caption(f"🤖 Per AI nachgelesen: Seiten {', '.join(str(page + 1) for page in weg_data['ai_pages'])} "
+                                       f"({', '.join(weg_data['replaced'])})")
+                        else:
+                            st.caption("✓ Alle Posten regelbasiert sicher erkannt - keine AI-Anfrage")
                     else:
                         st.info("⚙️ Verwende Standard-Extraktion (regelbasiert)...")
                         weg_data = extract_weg_data(str(weg_path), year)
@@ -235,15 +327,12 @@ def main():
                 
                 # Extract rental data (optional)
                 rental_data = {}
-                if rental_pdf:
-                    rental_path = temp_dir / rental_pdf.name
-                    with open(rental_path, 'wb') as f:
-                        f.write(rental_pdf.getbuffer())
-                    
+                if rental_path:
                     try:
-                        if extraction_method == "🤖 AI (OpenAI)":
-                            st.info("🤖 Verwende AI-Extraktion für Mietvertrag...")
-                            rental_data = extract_rental_contract_ai(str(rental_path))
+                        if ai_results is not None:
+                            if 'rental' in ai_results['errors']:
+                                raise ai_results['errors']['rental']
+                            rental_data = ai_results['rental']
                             st.success(f"✅ Mietvertrag (AI): {rental_data.get('tenant_name', 'Name nicht gefunden')}")
                         else:
                             rental_data = extract_rental_contract(str(rental_path))
@@ -253,17 +342,12 @@ def main():
                 
                 # Extract bank data (optional)
                 bank_data = {'payment_count': 0, 'avg_payment': 0}
-                if bank_pdf:
-                    bank_path = temp_dir / bank_pdf.name
-                    with open(bank_path, 'wb') as f:
-                        f.write(bank_pdf.getbuffer())
-                    
+                if bank_path:
                     try:
-                        if extraction_method == "🤖 AI (OpenAI)":
-                            st.info("🤖 Verwende AI-Extraktion für Kontoauszug...")
-                            # Get tenant name from rental data if available
-                            tenant_name = rental_data.get('tenant_name', rental_data.get('name', None))
-                            bank_data = extract_bank_statement_ai(str(bank_path), tenant_name=tenant_name)
+                        if ai_results is not None and bank_path.suffix.lower() == '.pdf':
+                            if 'bank' in ai_results['errors']:
+                                raise ai_results['errors']['bank']
+                            bank_data = ai_results['bank']
                             st.success(f"✅ Kontoauszug (AI): {bank_data['total_months']} Monate, {bank_data['total_rent_paid_eur']:.2f} €")
                         else:
                             bank_data = extract_bank_statement(str(bank_path), year)
@@ -409,6 +493,18 @@ def main():
             # Cost preview
             st.subheader("💰 Extrahierte Kosten (Vorschau)")
             
+            # Reconciliation against "Umlagefähige Kosten:" (rule-based/hybrid only)
+            reconciliation = data['weg'].get('reconciliation')
+            reconciled = reconciliation is not None and reconciliation['status'] == 'ok'
+            if reconciled:
+                st.success(f"✅ Summe stimmt auf den Cent mit \"Umlagefähige Kosten: "
+                           f"{reconciliation['expected_cents'] / 100:.2f} €\" überein - keine Prüfung nötig")
+            elif reconciliation is not None and reconciliation['status'] == 'mismatch':
+                st.warning(f"⚠️ Summe weicht um {reconciliation['difference_cents'] / 100:+.2f} € von "
+                           f"\"Umlagefähige Kosten: {reconciliation['expected_cents'] / 100:.2f} €\" ab - bitte prüfen")
+            elif reconciliation is not None:
+                st.warning("⚠️ Keine Summenzeile \"Umlagefähige Kosten:\" gefunden - bitte Kosten prüfen")
+            
             if 'costs' in data['weg']:
                 # Show first 10 costs
                 preview_data = [{
@@ -416,7 +512,8 @@ def main():
                     'Betrag (€)': f"{cost['amount']:.2f}"
                 } for cost in data['weg']['costs'][:10]]
                 
-                st.dataframe(preview_data, use_container_width=True)
+                with st.expander("Kostenposten anzeigen", expanded=not reconciled):
+                    st.dataframe(preview_data, use_container_width=True)
                 st.caption(f"Zeige 10 von {len(data['weg']['costs'])} Kostenposten | Gesamt: {data['weg']['total']:.2f} €")
             
             # ════════════════════════════════════════════════════════
@@ -67,6 +67,12 @@ RENTAL_CONTRACT_PATTERNS = {
     ]
 }
 
+# Mietvertrag: Seiten einzeln scannen und stoppen, sobald alle Felder feststehen
+# (Treffer des Patterns mit der höchsten Priorität oder alle Seiten gelesen)
+RENTAL_EXTRACTION = {
+    'early_exit': True,
+}
+
 # Regex-Patterns für Kontoauszug-Extraktion
 BANK_STATEMENT_PATTERNS = {
     'mietzahlung': [
@@ -86,3 +92,204 @@ BANK_STATEMENT_PATTERNS = {
         r'(\d{2}\.\d{2}\.\d{4})',  # DD.MM.YYYY
     ]
 }
+
+# Strukturierte Kontoauszüge (CAMT.053 / MT940 / CSV) statt PDF
+# CSV: mögliche Spaltennamen je Feld (kleingeschrieben, erster Treffer gilt)
+BANK_IMPORT = {
+    'csv_columns': {
+        'date': ['valutadatum', 'wertstellung', 'valuta', 'buchungstag', 'buchungsdatum', 'datum'],
+        'amount': ['betrag', 'betrag (eur)', 'betrag (€)', 'umsatz'],
+        'counterparty': [
+            'beguenstigter/zahlungspflichtiger', 'begünstigter/zahlungspflichtiger',
+            'name zahlungsbeteiligter', 'zahlungspflichtige*r', 'auftraggeber / begünstigter',
+            'auftraggeber/empfänger', 'zahlungspflichtiger', 'empfänger', 'name',
+        ],
+        'purpose': ['verwendungszweck', 'buchungstext'],
+        'reference': ['kundenreferenz (end-to-end)', 'end-to-end-referenz', 'kundenreferenz'],
+    },
+}
+
+# ════════════════════════════════════════════════════════
+#  CACHING
+# ════════════════════════════════════════════════════════
+
+# Persistenter Cache für geparste PDF-Seiten (Text + Tabellen)
+# Schlüssel: Datei-Hash + Seitenindex + Extraktor-Version
+PAGE_CACHE = {
+    'enabled': True,
+    'dir': 'data/cache/pages',
+}
+
+# Buchungsjournal: Kontoauszüge einmal parsen, Abfragen pro Mieter über Indizes
+BANK_LEDGER = {
+    'path': 'data/cache/bank_ledger.sqlite3',
+}
+
+# Persistenter Cache für OpenAI-Antworten
+# Schlüssel: Modell + Prompt + Hash des Dokumenttexts
+AI_CACHE = {
+    'enabled': True,
+    'dir': 'data/cache/ai',
+    # Einträge verfallen nach ttl_days Tagen (0 = nie)
+    'ttl_days': 30,
+    # Größere Caches werden gekürzt, zuletzt verwendete Einträge bleiben (0 = unbegrenzt)
+    'max_size_mb': 50,
+}
+
+# ════════════════════════════════════════════════════════
+#  SPEICHER
+# ════════════════════════════════════════════════════════
+
+# Speicherbudget pro Extraktion (RSS in MB, 0 = unbegrenzt). Wird es überschritten,
+# wird das PDF geschlossen und für die nächste Seite neu geöffnet.
+MEMORY = {
+    'budget_mb': 1536,
+}
+
+# ════════════════════════════════════════════════════════
+#  TEXT-BACKEND
+# ════════════════════════════════════════════════════════
+
+# Textebene für reine Text-Extraktionen (Mietvertrag, Kontoauszug, AI)
+TEXT_BACKEND = {
+    # 'pypdfium2' (schnell, Standard), 'pypdf2' oder 'pdfplumber' (volle Layoutanalyse)
+    'backend': 'pypdfium2',
+    # Plausibilitätsprüfung - sonst Fallback auf pdfplumber
+    'min_avg_line_length': 3,
+    'max_avg_line_length': 300,
+    'max_single_char_line_ratio': 0.3,
+}
+
+# ════════════════════════════════════════════════════════
+#  OCR (gescannte PDFs)
+# ════════════════════════════════════════════════════════
+
+# Seiten ohne Textebene werden per Tesseract erkannt (pytesseract optional)
+OCR = {
+    'enabled': True,
+    # Prozesse für die Erkennung: 1 = seriell, 0 = alle CPU-Kerne
+    'workers': 0,
+    'lang': 'deu',
+    'dpi': 300,
+    # Weniger Zeichen in der Textebene = Seite gilt als Scan
+    'min_text_chars': 20,
+    # Auflösung des Renderings für den Seiten-Hash (Cache-Schlüssel)
+    'hash_dpi': 50,
+    'dir': 'data/cache/ocr',
+}
+
+# ════════════════════════════════════════════════════════
+#  AI-EXTRAKTION (OpenAI)
+# ════════════════════════════════════════════════════════
+
+# WEG, Mietvertrag und Kontoauszug werden gleichzeitig angefragt (extract_all_ai)
+AI_EXTRACTION = {
+    # Gleichzeitige OpenAI-Anfragen
+    'workers': 3,
+    # True = Kontoauszug sofort ohne Mieternamen anfragen, statt auf den Mietvertrag zu warten
+    'speculative_bank': False,
+    # WEG-Abrechnung: Seiten (None = alle). Längere Dokumente werden in Abschnitte
+    # fester Seitenbereiche (chunk_pages Seiten) aufgeteilt und parallel angefragt -
+    # eine geänderte Seite betrifft nur ihren Abschnitt. Token-Budget je Abschnitt
+    # (größere Bereiche werden innerhalb des Bereichs weiter geteilt)
+    'weg_max_pages': None,
+    'chunk_pages': 10,
+    'chunk_tokens': 12000,
+    # WEG-Abrechnung: nur Seiten mit Kostentabellen schicken (Vorprüfung wie in der
+    # regelbasierten Extraktion); ohne erkannte Summenzeile das ganze Dokument
+    'relevance_filter': True,
+    # Prompt verdichten: wiederholte Kopf-/Fußzeilen (in den ersten/letzten
+    # compact_edge_lines Zeilen auf mind. compact_min_page_ratio der Seiten),
+    # Seitenzahlen, Layout-Leerzeichen und Tausenderpunkte entfernen
+    'compact_prompt': True,
+    'compact_edge_lines': 6,
+    'compact_min_page_ratio': 0.5,
+    # WEG-Antwort streamen: Kostenposten erscheinen in der App, sobald sie empfangen sind
+    'stream': True,
+}
+
+# Gemeinsamer OpenAI-Client (Verbindungspool) mit Rate-Limit und Retries
+OPENAI_CLIENT = {
+    # None = api.openai.com (bzw. OPENAI_BASE_URL), sonst z.B. 'http://localhost:8000/v1'
+    'base_url': None,
+    'timeout': 120,
+    # Gleichzeitige Anfragen im ganzen Prozess
+    'max_concurrent': 4,
+    # Limits des Accounts (0 = unbegrenzt)
+    'requests_per_minute': 500,
+    'tokens_per_minute': 30000,
+    # Geschätzte Antwortlänge für das Token-Limit (wenn max_tokens fehlt)
+    'expected_output_tokens': 1000,
+    # Retries bei 429 / 5xx / Verbindungsfehlern (Backoff in Sekunden)
+    'max_retries': 5,
+    'backoff_base': 1.0,
+    'backoff_max': 60,
+}
+
+# Backend der AI-Extraktion - 'replay'/'standin' für Benchmarks ohne Netzwerk und Kosten
+AI_BACKEND = {
+    # 'openai', 'replay' (Aufzeichnungen abspielen) oder 'standin' (lokaler
+    # OpenAI-kompatibler Server, der die Aufzeichnungen abspielt)
+    'backend': 'openai',
+    # OpenAI-Antworten für 'replay'/'standin' aufzeichnen
+    'record': False,
+    'recordings_dir': 'data/recordings/ai',
+    # Simulierte Latenz: Zeit bis zum ersten Token (± Jitter) und Ausgabegeschwindigkeit
+    'latency_s': 1.5,
+    'latency_jitter_s': 0.5,
+    'tokens_per_second': 60,  # 0 = sofort
+    # Stand-in-Server; autostart = im eigenen Prozess starten, falls nicht erreichbar
+    'standin_url': 'http://127.0.0.1:8765/v1',
+    'standin_autostart': True,
+}
+
+# ════════════════════════════════════════════════════════
+#  WEG-EXTRAKTION
+# ════════════════════════════════════════════════════════
+WEG_EXTRACTION = {
+    # Prozesse für die Seitenanalyse: 1 = seriell, 0 = alle CPU-Kerne
+    'workers': 1,
+    # Max. Seiten pro Arbeitsblock im Parallelmodus
+    'chunk_pages': 4,
+    # Layout-Engine: 'words' = ein Durchlauf (extract_words) für Text + Tabellen,
+    # 'pdfplumber' = extract_text() + extract_tables() wie bisher
+    'engine': 'words',
+    # Vorprüfung der rohen Textebene: Tabellen nur auf Kandidaten-Seiten extrahieren
+    'prescan': True,
+    # Seiten mit diesen Begriffen in den ersten Zeilen enthalten keine Kostentabellen
+    'prescan_heading_lines': 10,
+    'prescan_skip_headings': [
+        'sehr geehrte',
+        'wirtschaftsplan',
+        'rücklage',
+        'ruecklage',
+    ],
+    # Zeilen, aus denen WEG- und UG-Anteil einer aufgeteilten Kostenart stammen
+    'share_rows': {
+        'weg': 'Objekt WEG',
+        'ug': 'UG2 Lietzenburger Straße 3-9',
+    },
+    # Vorlagen-Erkennung: pro Vorlage (Verwalter, Spaltenköpfe, Marker) wird ein
+    # Extraktionsplan gelernt und bei späteren Abrechnungen direkt verwendet
+    'plans': True,
+    'plan_dir': 'data/cache/weg_plans',
+    # Tabellensuche nur im Bereich der Kostentabelle (gelernt im Plan, Rand in pt);
+    # 'table_region' = fester Bereich (x0, top, x1, bottom) für Seiten ohne Plan
+    'table_region_margin': 12,
+    'table_region': None,
+    'fingerprint_markers': [
+        'der betrag wurde wie folgt aufgeteilt',
+        'umlagefähige kosten:',
+        'nicht umlagefähige kosten:',
+        'miteigentumsanteile',
+        '=> objekt weg',
+        '=> ug',
+    ],
+    # Konfidenz je Kostenposten (0-1, siehe _score_weg_costs): Posten unter threshold
+    # gelten als unsicher (Hybrid-Modus fragt nur deren Seiten per AI nach);
+    # Ausreißer = mehr als outlier_factor x Median aller Beträge
+    'confidence': {
+        'threshold': 0.6,
+        'outlier_factor': 20,
+    },
+}
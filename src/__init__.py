@@ -2,7 +2,8 @@
 Init file for src package
 """
 
-from .pdf_extractor import extract_weg_data, extract_rental_contract, extract_bank_statement
+from .pdf_extractor import extract_weg_data, extract_rental_contract, extract_bank_statement, iter_bank_payments
+from .bank_ledger import BankLedger, ledger_bank_statement
 from .cost_calculator import calculate_tenant_costs
 from .excel_generator import create_nebenkostenabrechnung
 from .pdf_converter import convert_excel_to_pdf
@@ -12,6 +13,9 @@ __all__ = [
     'extract_weg_data',
     'extract_rental_contract',
     'extract_bank_statement',
+    'iter_bank_payments',
+    'BankLedger',
+    'ledger_bank_statement',
     'calculate_tenant_costs',
     'create_nebenkostenabrechnung',
     'convert_excel_to_pdf',
@@ -0,0 +1,228 @@
+"""
+═══════════════════════════════════════════════════════════════
+AI BACKEND - Austauschbare Backends für die AI-Extraktion
+═══════════════════════════════════════════════════════════════
+
+Die AI-Extraktion fragt nur get_backend() - welches Backend dahinter
+steht, bestimmt config.AI_BACKEND['backend']:
+
+- 'openai':  OpenAI-API über den gemeinsamen Client (src/openai_client.py).
+             Mit 'record' wird jede Antwort als Aufzeichnung gespeichert.
+- 'replay':  Spielt Aufzeichnungen ohne Netzwerk ab, mit simulierter Latenz
+             (Zeit bis zum ersten Token + Ausgabegeschwindigkeit).
+- 'standin': Lokaler OpenAI-kompatibler HTTP-Server (src/ai_standin.py), der
+             Aufzeichnungen wie 'replay' abspielt. Gemessen wird dabei der
+             echte HTTP-Weg inkl. Verbindungspool, Rate-Limit und Retries.
+
+So lassen sich app.py und Batch-Läufe offline und ohne Kosten unter
+realistischer LLM-Latenz messen. Den AI-Cache dabei umgehen, sonst wird
+das Backend gar nicht erst gefragt.
+"""
+
+import abc
+import hashlib
+import json
+import os
+import random
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+import config
+from .openai_client import OPENAI_AVAILABLE, chat_completion, chat_completion_stream, new_client
+from .page_cache import _read_json, _write_json
+
+_lock = threading.Lock()
+_backends = {}
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    """
+    Schlüssel einer Aufzeichnung: alle Argumente der Anfrage außer 'stream'
+    (gestreamte und normale Anfragen teilen sich die Aufzeichnung)
+    """
+    payload = {key: value for key, value in request.items() if key not in ('stream', 'stream_options')}
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def _recording_path(key: str) -> Path:
+    return Path(config.AI_BACKEND['recordings_dir']) / key[:2] / f"{key}.json"
+
+
+def store_recording(request: Dict[str, Any], response: str) -> None:
+    """Antwort zu einer Anfrage aufzeichnen"""
+    _write_json(_recording_path(request_key(request)), {
+        'model': request.get('model'),
+        'recorded_at': time.time(),
+        'response': response
+    })
+
+
+def load_recording(request: Dict[str, Any]) -> str:
+    """
+    Aufgezeichnete Antwort zu einer Anfrage
+
+    Raises:
+        LookupError: Keine Aufzeichnung für genau diese Anfrage
+    """
+    key = request_key(request)
+    entry = _read_json(_recording_path(key))
+    if entry is None:
+        raise LookupError(
+            f"Keine Aufzeichnung für diese Anfrage ({key[:12]}) - "
+            f"zuerst mit config.AI_BACKEND['record'] gegen OpenAI aufzeichnen"
+        )
+    return entry['response']
+
+
+class AIBackend(abc.ABC):
+    """
+    Schnittstelle: Chat-Completion mit Argumenten wie bei der OpenAI-API, Antwort als Text
+    """
+
+    name = 'base'
+
+    def check(self) -> None:
+        """Wirft ImportError/ValueError, wenn das Backend nicht nutzbar ist"""
+
+    @abc.abstractmethod
+    def complete(self, **kwargs) -> str:
+        """Vollständige Antwort als Text"""
+
+    def stream(self, **kwargs) -> Iterator[str]:
+        """Textteile der Antwort, sobald sie eintreffen (Standard: alles auf einmal)"""
+        yield self.complete(**kwargs)
+
+
+class OpenAIBackend(AIBackend):
+    """OpenAI-API über den gemeinsamen Client, optional mit Aufzeichnung"""
+
+    name = 'openai'
+
+    def check(self) -> None:
+        if not OPENAI_AVAILABLE:
+            raise ImportError(
+                "OpenAI-Paket nicht installiert. Bitte installieren mit: pip install openai"
+            )
+        if not os.getenv('OPENAI_API_KEY'):
+            raise ValueError(
+                "OPENAI_API_KEY nicht gefunden. Bitte in .env Datei eintragen."
+            )
+
+    def _client(self) -> Any:
+        return None  # = gemeinsamer Client aus get_client()
+
+    def complete(self, **kwargs) -> str:
+        response = chat_completion(client=self._client(), **kwargs)
+        text = response.choices[0].message.content
+        self._record(kwargs, text)
+        return text
+
+    def stream(self, **kwargs) -> Iterator[str]:
+        parts = []
+        for delta in chat_completion_stream(client=self._client(), **kwargs):
+            parts.append(delta)
+            yield delta
+        self._record(kwargs, ''.join(parts))
+
+    def _record(self, request: Dict[str, Any], response: str) -> None:
+        if config.AI_BACKEND['record'] and response:
+            store_recording(request, response)
+
+
+class ReplayBackend(AIBackend):
+    """Aufgezeichnete Antworten mit simulierter Latenz (ohne Netzwerk)"""
+
+    name = 'replay'
+
+    def check(self) -> None:
+        if not any(Path(config.AI_BACKEND['recordings_dir']).glob('*/*.json')):
+            raise ValueError(
+                f"Keine Aufzeichnungen in {config.AI_BACKEND['recordings_dir']} - "
+                f"zuerst mit config.AI_BACKEND['record'] gegen OpenAI aufzeichnen"
+            )
+
+    def complete(self, **kwargs) -> str:
+        text = load_recording(kwargs)
+        return ''.join(self.paced(text))
+
+    def stream(self, **kwargs) -> Iterator[str]:
+        yield from self.paced(load_recording(kwargs))
+
+    def paced(self, text: str) -> Iterator[str]:
+        """
+        text in Stücken von ca. einem Token, im Tempo von config.AI_BACKEND
+        (erst latency_s ± latency_jitter_s, dann tokens_per_second)
+        """
+        settings = config.AI_BACKEND
+        jitter = settings['latency_jitter_s']
+        time.sleep(max(0.0, settings['latency_s'] + random.uniform(-jitter, jitter)))
+
+        tokens_per_second = settings['tokens_per_second']
+        # ~4 Zeichen pro Token
+        for start in range(0, len(text), 4):
+            if tokens_per_second:
+                time.sleep(1 / tokens_per_second)
+            yield text[start:start + 4]
+
+
+class StandinBackend(OpenAIBackend):
+    """OpenAI-Client gegen den lokalen Stand-in-Server (src/ai_standin.py)"""
+
+    name = 'standin'
+
+    def __init__(self):
+        self.client = None
+
+    def check(self) -> None:
+        if not OPENAI_AVAILABLE:
+            raise ImportError(
+                "OpenAI-Paket nicht installiert. Bitte installieren mit: pip install openai"
+            )
+
+    def _client(self) -> Any:
+        with _lock:
+            if self.client is None:
+                url = config.AI_BACKEND['standin_url']
+                if config.AI_BACKEND['standin_autostart'] and not _reachable(url):
+                    from .ai_standin import start_server
+                    parsed = urlparse(url)
+                    start_server(parsed.hostname, parsed.port)
+                self.client = new_client(url, api_key='standin')
+            return self.client
+
+    def _record(self, request: Dict[str, Any], response: str) -> None:
+        pass  # Antworten stammen bereits aus Aufzeichnungen
+
+
+BACKENDS = {
+    'openai': OpenAIBackend,
+    'replay': ReplayBackend,
+    'standin': StandinBackend,
+}
+
+
+def _reachable(url: str) -> bool:
+    parsed = urlparse(url)
+    try:
+        with socket.create_connection((parsed.hostname, parsed.port or 80), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+def get_backend(name: Optional[str] = None) -> AIBackend:
+    """
+    Das Backend aus config.AI_BACKEND['backend'] (oder name), eine Instanz pro Prozess
+    """
+    name = name or config.AI_BACKEND['backend']
+    if name not in BACKENDS:
+        raise ValueError(f"Unbekanntes AI-Backend: {name} (erlaubt: {', '.join(BACKENDS)})")
+    with _lock:
+        if name not in _backends:
+            _backends[name] = BACKENDS[name]()
+        return _backends[name]
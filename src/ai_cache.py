@@ -0,0 +1,111 @@
+"""
+═══════════════════════════════════════════════════════════════
+AI CACHE - Persistenter Cache für OpenAI-Antworten
+═══════════════════════════════════════════════════════════════
+
+Schlüssel: Modell + Parameter + Prompt (System + Anweisung) + SHA-256 des
+extrahierten Dokumenttexts. Ändert sich der Prompt oder der Text, wird
+neu angefragt - sonst kommt die Antwort sofort und kostenlos von der Platte.
+
+Einträge verfallen nach config.AI_CACHE['ttl_days']. Wird der Cache größer
+als config.AI_CACHE['max_size_mb'], werden die am längsten nicht mehr
+verwendeten Einträge gelöscht.
+"""
+
+import hashlib
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import config
+from .page_cache import _read_json, _write_json
+
+
+def response_key(model: str, params: Dict[str, Any], system_prompt: str, prompt: str, text: str) -> str:
+    """
+    Cache-Schlüssel einer Anfrage (der Dokumenttext geht nur als Hash ein)
+    """
+    payload = json.dumps({
+        'model': model,
+        'params': params,
+        'system': system_prompt,
+        'prompt': prompt,
+        'text_sha256': hashlib.sha256(text.encode('utf-8')).hexdigest()
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _entry_path(key: str) -> Path:
+    return Path(config.AI_CACHE['dir']) / key[:2] / f"{key}.json"
+
+
+def load_response(key: str) -> Optional[str]:
+    """
+    Gecachte Antwort (None = nicht vorhanden, abgelaufen oder Cache deaktiviert)
+    """
+    settings = config.AI_CACHE
+    if not settings['enabled']:
+        return None
+
+    path = _entry_path(key)
+    entry = _read_json(path)
+    if entry is None:
+        return None
+
+    if settings['ttl_days'] and time.time() - entry.get('created_at', 0) > settings['ttl_days'] * 86400:
+        path.unlink(missing_ok=True)
+        return None
+
+    # Zugriffszeit für die Verdrängung (zuletzt verwendet = zuletzt gelöscht)
+    try:
+        path.touch()
+    except OSError:
+        pass
+    return entry.get('response')
+
+
+def store_response(key: str, response: str, model: str) -> None:
+    """
+    Antwort speichern und den Cache danach auf die Maximalgröße begrenzen
+    """
+    if not config.AI_CACHE['enabled']:
+        return
+    _write_json(_entry_path(key), {
+        'model': model,
+        'created_at': time.time(),
+        'response': response
+    })
+    _evict()
+
+
+def _evict() -> None:
+    """Älteste Einträge löschen, bis der Cache unter max_size_mb liegt"""
+    max_bytes = config.AI_CACHE['max_size_mb'] * 1024 * 1024
+    if not max_bytes:
+        return
+
+    entries = []
+    for path in Path(config.AI_CACHE['dir']).glob('*/*.json'):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+
+
+def clear_ai_cache() -> None:
+    """
+    Löscht alle gecachten AI-Antworten
+    """
+    cache_dir = Path(config.AI_CACHE['dir'])
+    if cache_dir.exists():
+        shutil.rmtree(cache_dir)
@@ -4,26 +4,35 @@ AI EXTRACTOR - OpenAI-basierte PDF-Extraktion
 ═══════════════════════════════════════════════════════════════
 """
 
-import os
 import json
-from typing import Dict, List, Any
+import math
+import re
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
-import pdfplumber
+
+import config
+from .ai_cache import load_response, response_key, store_response
+from .page_cache import open_pdf
+from .pdf_extractor import _prescan_weg_pages, _reconcile_weg_costs, _to_cents, extract_weg_data
+from .ocr import apply_ocr
+from .ai_backend import get_backend
+from .openai_client import OPENAI_AVAILABLE
+from .text_backend import extract_page_text
 
 # Load environment variables
 load_dotenv()
 
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    OpenAI = None
+MODEL = "gpt-4-turbo"  # Latest GPT-4 model
+TEMPERATURE = 0.1  # Niedrig für konsistente Ergebnisse
+WEG_SYSTEM_PROMPT = "Du bist ein Experte für Nebenkostenabrechnungen und Wirtschaftspläne von Wohnungseigentümergemeinschaften."
 
 
-def extract_weg_data_ai(pdf_path: str, year: int, einheit: str = None) -> Dict[str, Any]:
+def extract_weg_data_ai(pdf_path: str, year: int, einheit: str = None, use_cache: bool = True) -> Dict[str, Any]:
     """
     Extrahieif __name__ == "__main__":
     import sys
@@ -41,6 +50,7 @@ def extract_weg_data_ai(pdf_path: str, year: int, einheit: str = None) -> Dict[s
         pdf_path: Pfad zur PDF-Datei
         year: Abrechnungsjahr
         einheit: Einheit (z.B. "01080/05") - optional
+        use_cache: False = AI-Cache umgehen und neu anfragen (Antwort wird trotzdem gespeichert)
     
     Returns:
         {
@@ -50,50 +60,21 @@ def extract_weg_data_ai(pdf_path: str, year: int, einheit: str = None) -> Dict[s
             'extraction_method': 'ai'
         }
     """
-    if not OPENAI_AVAILABLE:
-        raise ImportError(
-            "OpenAI-Paket nicht installiert. Bitte installieren mit: pip install openai"
-        )
-    
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        raise ValueError(
-            "OPENAI_API_KEY nicht gefunden. Bitte in .env Datei eintragen."
-        )
+    # OpenAI-Paket/API-Key bzw. Aufzeichnungen (je nach config.AI_BACKEND)
+    get_backend().check()
     
-    # Extract text from PDF
-    print("📄 Extrahiere PDF-Text...")
-    pdf_text = _extract_pdf_text(pdf_path)
-    print(f"✓ {len(pdf_text)} Zeichen extrahiert")
-    
-    # Prepare prompt
-    prompt = _build_extraction_prompt(einheit)
-    
-    # Call OpenAI API
-    print("🤖 Sende Anfrage an OpenAI...")
-    client = OpenAI(api_key=api_key)
+    system_prompt, prompt, chunks = _prepare_weg_request(pdf_path, einheit)
     
+    # Call OpenAI API (oder Antwort aus dem AI-Cache)
     try:
-        response = client.chat.completions.create(
-            model="gpt-4-turbo",  # Latest GPT-4 model
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Du bist ein Experte für Nebenkostenabrechnungen und Wirtschaftspläne von Wohnungseigentümergemeinschaften."
-                },
-                {
-                    "role": "user",
-                    "content": f"{prompt}\n\n---\n\nPDF-Inhalt:\n{pdf_text}"
-                }
-            ],
-            temperature=0.1,  # Niedrig für konsistente Ergebnisse
-            response_format={"type": "json_object"}  # JSON-Modus
-        )
-        
-        print("✓ OpenAI Antwort erhalten")
-        
-        # Parse response
-        result_text = response.choices[0].message.content
+        if len(chunks) == 1:
+            result_text, from_cache = _request_completion(
+                system_prompt, prompt, "PDF-Inhalt", chunks[0], use_cache=use_cache
+            )
+        else:
+            result_text, from_cache = _request_chunked_completion(
+                system_prompt, prompt, "PDF-Inhalt", chunks, use_cache=use_cache
+            )
         
         # DEBUG: Print raw response
         print("\n" + "=" * 80)
@@ -110,40 +91,10 @@ def extract_weg_data_ai(pdf_path: str, year: int, einheit: str = None) -> Dict[s
         
         # Convert to our format
         costs = []
-        excluded_keywords = [
-            'instandhaltung', 'reparatur', 'rücklage', 
-            'versicherungsschaden', 'schaden', 'schadensbehebung',
-            'verwaltung', 'hausverwaltung', 'aufwand versicherung'
-        ]
-        
         for item in result_json.get('umlagefaehige_kosten', []):
-            for name, amount in item.items():
-                # Filter out non-umlagefähig costs
-                name_lower = name.lower()
-                if any(keyword in name_lower for keyword in excluded_keywords):
-                    print(f"  ⚠️  Übersprungen (nicht umlagefähig): {name}")
-                    continue
-                
-                costs.append({
-                    'name': name,
-                    'amount': float(amount)
-                })
-                print(f"  + {name}: {amount} €")
+            costs.extend(_weg_costs(item))
         
-        total = result_json.get('gesamt_summe', sum(c['amount'] for c in costs))
-        
-        print(f"\n✅ Extraktion abgeschlossen: {len(costs)} Kosten, Total: {total:.2f} €")
-        
-        return {
-            'costs': costs,
-            'total': float(total),
-            'period': {
-                'start': datetime(year, 1, 1).date(),
-                'end': datetime(year, 12, 31).date()
-            },
-            'extraction_method': 'ai',
-            'model_used': 'gpt-4-turbo'
-        }
+        return _weg_result(costs, result_json, year, from_cache)
         
     except json.JSONDecodeError as e:
         print(f"\n❌ JSON Parse Error: {e}")
@@ -154,24 +105,749 @@ def extract_weg_data_ai(pdf_path: str, year: int, einheit: str = None) -> Dict[s
         raise RuntimeError(f"Fehler bei AI-Extraktion: {e}")
 
 
+def stream_weg_data_ai(
+    pdf_path: str,
+    year: int,
+    einheit: str = None,
+    use_cache: bool = True
+) -> Iterator[Dict[str, Any]]:
+    """
+    Wie extract_weg_data_ai(), aber mit gestreamter OpenAI-Antwort: jeder Kostenposten
+    wird geliefert, sobald er vollständig empfangen ist (für eine Live-Vorschau)
+    
+    Yields:
+        {'type': 'cost', 'cost': {'name': str, 'amount': float}} je Kostenposten,
+        zum Schluss {'type': 'result', 'result': dict wie extract_weg_data_ai()}
+    """
+    # OpenAI-Paket/API-Key bzw. Aufzeichnungen (je nach config.AI_BACKEND)
+    get_backend().check()
+    
+    system_prompt, prompt, chunks = _prepare_weg_request(pdf_path, einheit)
+    
+    # Aufgeteilte Dokumente werden parallel angefragt - Posten erst nach dem Zusammenführen
+    if len(chunks) > 1:
+        result = extract_weg_data_ai(pdf_path, year, einheit=einheit, use_cache=use_cache)
+        for cost in result['costs']:
+            yield {'type': 'cost', 'cost': cost}
+        yield {'type': 'result', 'result': result}
+        return
+    
+    try:
+        stream: Dict[str, Any] = {'parts': [], 'from_cache': False}
+        costs = []
+        deltas = _stream_completion(system_prompt, prompt, "PDF-Inhalt", chunks[0], stream, use_cache=use_cache)
+        for item in _iter_json_array_items(deltas, 'umlagefaehige_kosten'):
+            for cost in _weg_costs(item):
+                costs.append(cost)
+                yield {'type': 'cost', 'cost': cost}
+        
+        result_json = json.loads(''.join(stream['parts']))
+    except json.JSONDecodeError as e:
+        print(f"\n❌ JSON Parse Error: {e}")
+        raise ValueError(f"AI-Antwort konnte nicht als JSON geparst werden: {e}")
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        raise RuntimeError(f"Fehler bei AI-Extraktion: {e}")
+    
+    yield {'type': 'result', 'result': _weg_result(costs, result_json, year, from_cache=stream['from_cache'])}
+
+
+def extract_weg_data_hybrid(
+    pdf_path: str,
+    year: int,
+    einheit: str = None,
+    threshold: float = None,
+    use_cache: bool = True
+) -> Dict[str, Any]:
+    """
+    Regelbasierte Extraktion, OpenAI nur für unsichere Posten
+    
+    Posten mit einer Konfidenz unter threshold (None = config.WEG_EXTRACTION['confidence']['threshold'])
+    werden verworfen und nur ihre Seiten per AI neu gelesen. Die AI liefert dabei auch die
+    sicheren Posten dieser Seiten noch einmal, evtl. unter anderem Namen - jeder sichere
+    Posten auf einer neu gelesenen Seite deckt genau einen AI-Posten mit gleichem
+    Cent-Betrag ab (zuerst gleichnamige). Übernommen wird nur, was übrig bleibt.
+    Stimmt die regelbasierte Summe centgenau mit der Summenzeile überein, wird OpenAI
+    nie angefragt.
+    
+    Die AI-Anfrage ist nur eine Verbesserung: ist kein Backend verfügbar oder schlägt sie
+    fehl (Netzwerk, ungültiges JSON), bleibt es beim regelbasierten Ergebnis mit
+    'extraction_method': 'rule_based' und einer Warnung in 'warning'.
+    
+    Returns:
+        Wie extract_weg_data(), zusätzlich 'extraction_method': 'hybrid' | 'rule_based',
+        'ai_pages': [Seitenindex, ...], 'replaced': [Name, ...] und 'from_cache'.
+        Per AI ergänzte Posten haben 'confidence': None und 'page': None.
+    """
+    if threshold is None:
+        threshold = config.WEG_EXTRACTION['confidence']['threshold']
+    
+    result = extract_weg_data(pdf_path, year)
+    uncertain = [c for c in result['costs'] if c['confidence'] < threshold and c['page'] is not None]
+    pages = sorted({c['page'] for c in uncertain})
+    result.update({'extraction_method': 'hybrid', 'ai_pages': [], 'replaced': [], 'from_cache': False})
+    
+    if result['reconciliation']['status'] == 'ok':
+        print("✓ Summe stimmt mit der Summenzeile überein - keine AI-Anfrage")
+        return result
+    if not uncertain:
+        print("✓ Alle Posten sicher erkannt - keine AI-Anfrage")
+        return result
+    try:
+        get_backend().check()
+    except (ImportError, ValueError) as e:
+        return _rule_based_fallback(result, f"{len(uncertain)} unsichere Posten, aber AI nicht verfügbar ({e})")
+    
+    print(f"🔀 {len(uncertain)} unsichere Posten ({', '.join(c['name'] for c in uncertain)}) - "
+          f"frage Seiten {[page + 1 for page in pages]} per AI an")
+    chunks = _chunk_pages(_read_pdf_pages(pdf_path, page_indices=pages))
+    prompt = _build_extraction_prompt(einheit)
+    try:
+        if len(chunks) == 1:
+            result_text, from_cache = _request_completion(
+                WEG_SYSTEM_PROMPT, prompt, "PDF-Inhalt", chunks[0], use_cache=use_cache
+            )
+        else:
+            result_text, from_cache = _request_chunked_completion(
+                WEG_SYSTEM_PROMPT, prompt, "PDF-Inhalt", chunks, use_cache=use_cache
+            )
+        result_json = json.loads(result_text)
+        ai_items = [cost for item in result_json.get('umlagefaehige_kosten', []) for cost in _weg_costs(item)]
+    except json.JSONDecodeError as e:
+        return _rule_based_fallback(result, f"AI-Antwort konnte nicht als JSON geparst werden: {e}")
+    except Exception as e:
+        return _rule_based_fallback(result, f"Fehler bei AI-Nachextraktion: {e}")
+    
+    uncertain_ids = {id(c) for c in uncertain}
+    costs = [c for c in result['costs'] if id(c) not in uncertain_ids]
+    known = {(_cost_key(c['name']), _to_cents(c['amount'])) for c in costs}
+    known_names = {name for name, _ in known}
+    # Sichere Posten auf den neu gelesenen Seiten, die noch keinen AI-Posten abdecken
+    reread_items = Counter((_cost_key(c['name']), _to_cents(c['amount'])) for c in costs if c['page'] in pages)
+    reread_cents = Counter(cents for _, cents in reread_items.elements())
+    
+    remaining = []
+    for cost in ai_items:
+        key = (_cost_key(cost['name']), _to_cents(cost['amount']))
+        if reread_items[key]:
+            reread_items[key] -= 1
+            reread_cents[key[1]] -= 1
+        elif key not in known:
+            remaining.append((key, cost))
+    
+    for key, cost in remaining:
+        if reread_cents[key[1]]:
+            # Sicherer Posten derselben Seite unter anderem Namen (z.B. Allgemeinstrom/Hausstrom)
+            reread_cents[key[1]] -= 1
+            continue
+        if key in known:
+            continue  # Gleicher Posten schon vorhanden
+        if key[0] in known_names:
+            print(f"  ⚠️  {cost['name']}: AI-Betrag {cost['amount']:.2f} € weicht ab - regelbasierter Wert bleibt")
+            continue
+        known.add(key)
+        known_names.add(key[0])
+        costs.append({**cost, 'page': None, 'confidence': None})
+    
+    result.update({
+        'costs': costs,
+        'total': sum(c['amount'] for c in costs),
+        'reconciliation': _reconcile_weg_costs(costs, result['reconciliation']['expected_cents']),
+        'ai_pages': pages,
+        'replaced': [c['name'] for c in uncertain],
+        'from_cache': from_cache
+    })
+    print(f"\n✅ Hybrid-Extraktion: {len(costs)} Kosten, Total: {result['total']:.2f} €")
+    return result
+
+
+def _cost_key(name: str) -> str:
+    """Normalisierter Name einer Kostenart für den Abgleich (nur Buchstaben/Ziffern)"""
+    return re.sub(r'\W', '', name.lower())
+
+
+def _rule_based_fallback(result: Dict[str, Any], warning: str) -> Dict[str, Any]:
+    """Regelbasiertes Ergebnis, wenn die AI-Nachextraktion nicht möglich war"""
+    print(f"⚠️  {warning} - regelbasiertes Ergebnis")
+    result.update({'extraction_method': 'rule_based', 'warning': warning})
+    return result
+
+
+def _prepare_weg_request(pdf_path: str, einheit: str = None) -> Tuple[str, str, List[str]]:
+    """
+    Seitentext (nur Kostenseiten, verdichtet, in Abschnitte aufgeteilt) und Prompts
+    
+    Returns:
+        (System-Prompt, Prompt, [Abschnittstext, ...])
+    """
+    # Extract text from PDF (lange Dokumente in Abschnitte fester Seitenbereiche)
+    print("📄 Extrahiere PDF-Text...")
+    relevant = _relevant_weg_pages(pdf_path) if config.AI_EXTRACTION['relevance_filter'] else None
+    pages = _read_pdf_pages(
+        pdf_path, config.AI_EXTRACTION['weg_max_pages'], relevant['pages'] if relevant else None
+    )
+    chunks = _chunk_pages(pages)
+    print(f"✓ {sum(len(text) for _, text in pages)} Zeichen extrahiert")
+    if relevant:
+        print(f"  🎯 Nur Kostenseiten {[page + 1 for page in relevant['pages']]} - "
+              f"ca. {relevant['skipped_tokens']} Tokens gespart")
+    
+    # Prepare prompt
+    prompt = _build_extraction_prompt(einheit)
+    return WEG_SYSTEM_PROMPT, prompt, chunks
+
+
+# Nicht umlagefähige Kostenarten, die das Modell trotzdem manchmal liefert
+EXCLUDED_COST_KEYWORDS = [
+    'instandhaltung', 'reparatur', 'rücklage', 
+    'versicherungsschaden', 'schaden', 'schadensbehebung',
+    'verwaltung', 'hausverwaltung', 'aufwand versicherung'
+]
+
+
+def _weg_costs(item: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Ein Eintrag aus 'umlagefaehige_kosten' ({"cost_name": amount}) im eigenen Format
+    """
+    costs = []
+    for name, amount in item.items():
+        # Filter out non-umlagefähig costs
+        name_lower = name.lower()
+        if any(keyword in name_lower for keyword in EXCLUDED_COST_KEYWORDS):
+            print(f"  ⚠️  Übersprungen (nicht umlagefähig): {name}")
+            continue
+        
+        costs.append({
+            'name': name,
+            'amount': float(amount)
+        })
+        print(f"  + {name}: {amount} €")
+    return costs
+
+
+def _weg_result(costs: List[Dict[str, Any]], result_json: Dict[str, Any], year: int, from_cache: bool) -> Dict[str, Any]:
+    total = result_json.get('gesamt_summe', sum(c['amount'] for c in costs))
+    
+    print(f"\n✅ Extraktion abgeschlossen: {len(costs)} Kosten, Total: {total:.2f} €")
+    
+    return {
+        'costs': costs,
+        'total': float(total),
+        'period': {
+            'start': datetime(year, 1, 1).date(),
+            'end': datetime(year, 12, 31).date()
+        },
+        'extraction_method': 'ai',
+        'model_used': MODEL,
+        'from_cache': from_cache
+    }
+
+
 def _extract_pdf_text(pdf_path: str, max_pages: int = 30) -> str:
     """
     Extrahiert Text aus PDF (erste max_pages Seiten)
     """
-    text_parts = []
-    
-    with pdfplumber.open(pdf_path) as pdf:
+    return "\n\n".join(_extract_pdf_pages(pdf_path, max_pages))
+
+
+def _extract_pdf_pages(pdf_path: str, max_pages: int = None, page_indices: List[int] = None) -> List[str]:
+    """
+    Text je Seite mit Seitenkopf "--- Seite n ---" (erste max_pages Seiten, None = alle;
+    mit page_indices nur diese Seiten), gemeinsam verdichtet für eine Anfrage
+    """
+    text_parts, saved_tokens, before_tokens = _format_pages(_read_pdf_pages(pdf_path, max_pages, page_indices))
+    _print_compaction(saved_tokens, before_tokens)
+    return text_parts
+
+
+def _read_pdf_pages(pdf_path: str, max_pages: int = None, page_indices: List[int] = None) -> List[Tuple[int, str]]:
+    """
+    [(Seitenindex, Text), ...] der ersten max_pages Seiten (None = alle; mit
+    page_indices nur diese Seiten), unverdichtet
+    """
+    with open_pdf(pdf_path) as pdf:
         total_pages = len(pdf.pages)
-        pages_to_process = min(total_pages, max_pages)
+        pages = pdf.pages[:max_pages]
+        if page_indices is not None:
+            pages = [page for page in pages if page.index in set(page_indices)]
         
-        print(f"  📖 PDF hat {total_pages} Seiten, verarbeite {pages_to_process}")
+        print(f"  📖 PDF hat {total_pages} Seiten, verarbeite {len(pages)}")
+        
+        # Gescannte Seiten per OCR, statt leeren Text an OpenAI zu schicken
+        apply_ocr(pdf, max_pages=max_pages, page_indices=page_indices)
+        
+        page_texts = []
+        for page in pages:
+            page_texts.append((page.index, extract_page_text(page)))
+            page.close()
+    
+    return page_texts
+
+
+def _format_pages(pages: List[Tuple[int, str]]) -> Tuple[List[str], int, int]:
+    """
+    Seitentexte mit Seitenkopf "--- Seite n ---", verdichtet nur innerhalb von pages
+    (config.AI_EXTRACTION['compact_prompt'])
+    
+    Returns:
+        ([Seitentext, ...], gesparte Tokens, Tokens vorher)
+    """
+    page_texts = [text for _, text in pages]
+    saved_tokens = 0
+    before_tokens = sum(_estimate_tokens(text) for text in page_texts if text)
+    if config.AI_EXTRACTION['compact_prompt']:
+        compacted = _compact_pages(page_texts)
+        saved_tokens = compacted['saved_tokens']
+        page_texts = compacted['pages']
+    
+    text_parts = [
+        f"--- Seite {index + 1} ---\n{page_text}"
+        for (index, _), page_text in zip(pages, page_texts) if page_text
+    ]
+    return text_parts, saved_tokens, before_tokens
+
+
+def _print_compaction(saved_tokens: int, before_tokens: int) -> None:
+    if saved_tokens:
+        print(f"  🗜️  Prompt kompaktiert: ca. {saved_tokens} Tokens gespart "
+              f"({saved_tokens / before_tokens:.0%})")
+
+
+# Seitenzahlen in Kopf-/Fußzeilen ("Seite 2 von 5", "- 3 -", "2/5")
+_PAGE_NUMBER_LINE = re.compile(
+    r'^(?:(?:seite|blatt|page)\s*\d+(?:\s*(?:von|/|of)\s*\d+)?|\d+\s*(?:von|/|of)\s*\d+|-\s*\d+\s*-)$',
+    re.IGNORECASE
+)
+_AMOUNT = re.compile(r'\d,\d{2}(?!\d)')
+# Beträge mit Tausenderpunkten (1.234,56) - Datumsangaben bleiben unverändert
+_THOUSANDS_AMOUNT = re.compile(r'(?<![\d.,])(\d{1,3}(?:\.\d{3})+)(,\d{2})(?![\d,])')
+
+
+def _compact_pages(page_texts: List[str]) -> Dict[str, Any]:
+    """
+    Verdichtet den Seitentext vor dem Prompt
+    
+    - Kopf-/Fußzeilen, die sich auf mehreren Seiten wiederholen (Adresse, Einheit,
+      Briefkopf der Hausverwaltung), bleiben nur beim ersten Vorkommen stehen
+    - Seitenzahlen in Kopf-/Fußzeilen entfallen
+    - Leerzeichen-Folgen und Leerzeilen aus dem Layout werden zusammengefasst
+    - Beträge ohne Tausenderpunkte (1.234,56 → 1234,56)
+    
+    Returns:
+        {'pages': [str, ...], 'saved_tokens': int, 'saved_ratio': float}
+    """
+    settings = config.AI_EXTRACTION
+    edge = settings['compact_edge_lines']
+    pages_lines = [
+        [' '.join(line.split()) for line in text.splitlines() if line.strip()]
+        for text in page_texts
+    ]
+    
+    def edge_lines(lines: List[str]) -> List[Tuple[int, str]]:
+        """(Position, Zeile) im Kopf- (0, 1, ...) und Fußbereich (-1, -2, ...) einer Seite"""
+        return [
+            (i if i < edge else i - len(lines), line)
+            for i, line in enumerate(lines) if i < edge or i >= len(lines) - edge
+        ]
+    
+    # Kopf-/Fußzeile = gleiche Zeile an gleicher Position auf mehreren Seiten, einmal
+    # pro Seite und ohne Betrag (sonst könnte es eine wiederkehrende Buchung sein)
+    page_count = {}
+    for lines in pages_lines:
+        per_page = {line: lines.count(line) for line in lines}
+        for position, line in set(edge_lines(lines)):
+            if per_page[line] == 1 and not _AMOUNT.search(line):
+                page_count[(position, line)] = page_count.get((position, line), 0) + 1
+    min_pages = max(2, math.ceil(len(pages_lines) * settings['compact_min_page_ratio']))
+    repeated = {key for key, count in page_count.items() if count >= min_pages}
+    
+    compacted = []
+    seen = set()
+    for lines in pages_lines:
+        drop = set()
+        for position, line in edge_lines(lines):
+            index = position if position >= 0 else len(lines) + position
+            if _PAGE_NUMBER_LINE.match(line):
+                drop.add(index)
+            elif (position, line) in repeated:
+                if (position, line) in seen:
+                    drop.add(index)
+                seen.add((position, line))
+        text = '\n'.join(line for i, line in enumerate(lines) if i not in drop)
+        compacted.append(_THOUSANDS_AMOUNT.sub(lambda m: m.group(1).replace('.', '') + m.group(2), text))
+    
+    before = sum(_estimate_tokens(text) for text in page_texts if text)
+    after = sum(_estimate_tokens(text) for text in compacted if text)
+    return {
+        'pages': compacted,
+        'saved_tokens': max(0, before - after),
+        'saved_ratio': (before - after) / before if before else 0.0
+    }
+
+
+def _relevant_weg_pages(pdf_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Lokale Vorauswahl der Seiten mit umlagefähigen Kosten (ohne OpenAI)
+    
+    Verwendet die Vorprüfung der regelbasierten Extraktion (_prescan_weg_pages):
+    Kostenteil bis zur Summenzeile "Umlagefähige Kosten:", ohne Anschreiben,
+    Wirtschaftsplan und Rücklagen. Davon bleiben Seiten mit einer Betrag-Spalte
+    oder der Summenzeile, deren Folgeseiten (Tabelle läuft weiter) und Seiten
+    ohne Textebene (Scans - der OCR-Text wird mitgeschickt).
+    
+    Returns:
+        {'pages': [int, ...], 'skipped_tokens': int} oder None, wenn der Kostenteil
+        nicht erkannt wurde oder keine Kostenseite übrig bleibt (dann wird das
+        ganze Dokument geschickt)
+    """
+    prescan = _prescan_weg_pages(pdf_path)
+    if prescan is None:
+        return None
+    
+    table_pages = set(prescan['table_pages'])
+    min_chars = config.OCR['min_text_chars']
+    pages = []
+    has_cost_page = False
+    skipped_tokens = 0
+    with open_pdf(pdf_path) as pdf:
+        for page in pdf.pages:
+            raw_text = page.extract_raw_text() or ''
+            page.close()
+            raw_lower = raw_text.lower()
+            
+            is_scan = page.index <= prescan['last_page'] and len(raw_text.strip()) < min_chars
+            is_cost_page = page.index in table_pages and (
+                'betrag' in raw_lower
+                or 'umlagefähige kosten' in raw_lower
+                or 'umlagefaehige kosten' in raw_lower
+                or (pages and pages[-1] == page.index - 1)
+            )
+            has_cost_page = has_cost_page or is_cost_page
+            if is_scan or is_cost_page:
+                pages.append(page.index)
+            else:
+                skipped_tokens += _estimate_tokens(raw_text)
+    
+    # Nur Scans (oder nichts) übrig: lieber alles schicken als eine falsche Auswahl
+    if not has_cost_page:
+        return None
+    return {'pages': pages, 'skipped_tokens': skipped_tokens}
+
+
+def _estimate_tokens(text: str) -> int:
+    """Grobe Token-Schätzung (~4 Zeichen pro Token bei deutschem Text)"""
+    return len(text) // 4 + 1
+
+
+def _chunk_pages(pages: List[Tuple[int, str]], pages_per_chunk: int = None, max_tokens: int = None) -> List[str]:
+    """
+    Teilt die Seiten in Abschnitte fester Seitenbereiche (Seitenindex // pages_per_chunk)
+    
+    Die Grenzen hängen nur von der Seitennummer ab: ändert sich eine Seite, ändert sich
+    nur ihr Abschnitt - alle anderen kommen beim nächsten Lauf aus dem AI-Cache. Verdichtet
+    wird deshalb auch nur innerhalb eines Abschnitts. Überschreitet ein Bereich max_tokens,
+    wird nur dieser Bereich weiter aufgeteilt (eine einzelne größere Seite bildet einen
+    eigenen Abschnitt).
+    
+    Args:
+        pages: [(Seitenindex, Text), ...] aus _read_pdf_pages()
+        pages_per_chunk: None = config.AI_EXTRACTION['chunk_pages']
+        max_tokens: None = config.AI_EXTRACTION['chunk_tokens']
+    """
+    pages_per_chunk = pages_per_chunk or config.AI_EXTRACTION['chunk_pages']
+    max_tokens = max_tokens or config.AI_EXTRACTION['chunk_tokens']
+    
+    ranges: Dict[int, List[Tuple[int, str]]] = {}
+    for index, text in pages:
+        ranges.setdefault(index // pages_per_chunk, []).append((index, text))
+    
+    chunks: List[str] = []
+    saved_tokens = before_tokens = 0
+    for _, range_pages in sorted(ranges.items()):
+        page_texts, saved, before = _format_pages(range_pages)
+        saved_tokens += saved
+        before_tokens += before
         
-        for i, page in enumerate(pdf.pages[:max_pages]):
-            page_text = page.extract_text()
-            if page_text:
-                text_parts.append(f"--- Seite {i+1} ---\n{page_text}")
+        current: List[str] = []
+        tokens = 0
+        for page_text in page_texts:
+            page_tokens = _estimate_tokens(page_text)
+            if current and tokens + page_tokens > max_tokens:
+                chunks.append("\n\n".join(current))
+                current, tokens = [], 0
+            current.append(page_text)
+            tokens += page_tokens
+        if current:
+            chunks.append("\n\n".join(current))
+    
+    _print_compaction(saved_tokens, before_tokens)
+    return chunks or [""]
+
+
+def _merge_chunk_results(chunk_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Führt die Kostenlisten der Abschnitte zusammen
+    
+    Posten, die in mehreren Abschnitten vorkommen (gleicher Name + Betrag, z.B. eine
+    Tabelle über eine Abschnittsgrenze), werden nur so oft übernommen, wie sie in
+    einem einzelnen Abschnitt vorkommen.
+    """
+    merged: List[Dict[str, Any]] = []
+    taken: Dict[Tuple[str, float], int] = {}
+    
+    for result_json in chunk_results:
+        seen: Dict[Tuple[str, float], int] = {}
+        for item in result_json.get('umlagefaehige_kosten', []):
+            for name, amount in item.items():
+                try:
+                    key = (' '.join(name.lower().split()), round(float(amount), 2))
+                except (TypeError, ValueError):
+                    continue
+                seen[key] = seen.get(key, 0) + 1
+                if seen[key] > taken.get(key, 0):
+                    taken[key] = seen[key]
+                    merged.append({name: amount})
+    
+    return {
+        'umlagefaehige_kosten': merged,
+        'gesamt_summe': round(sum(float(amount) for item in merged for amount in item.values()), 2)
+    }
+
+
+def _request_chunked_completion(
+    system_prompt: str,
+    prompt: str,
+    document_label: str,
+    chunks: List[str],
+    use_cache: bool = True
+) -> Tuple[str, bool]:
+    """
+    Map-Reduce: jeder Abschnitt als eigene Anfrage (parallel), Ergebnisse zusammengeführt
+    
+    Der Prompt ist für alle Abschnitte gleich, damit unveränderte Abschnitte bei
+    einem erneuten Lauf aus dem AI-Cache kommen und nur geänderte neu angefragt werden.
+    """
+    chunk_prompt = (
+        f"{prompt}\nDer Text ist ein Ausschnitt aus einem längeren Dokument. Gib nur Kosten zurück, "
+        f"die in diesem Ausschnitt stehen - wenn keine vorkommen, eine leere Liste."
+    )
+    print(f"🧩 Dokument in {len(chunks)} Abschnitte aufgeteilt - parallele Anfragen")
     
-    return "\n\n".join(text_parts)
+    def request(chunk: str) -> Tuple[str, bool]:
+        return _request_completion(system_prompt, chunk_prompt, document_label, chunk, use_cache=use_cache)
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(config.AI_EXTRACTION['workers'], len(chunks)))) as executor:
+        responses = list(executor.map(request, chunks))
+    
+    chunk_results = []
+    for number, (result_text, _) in enumerate(responses, 1):
+        try:
+            chunk_results.append(json.loads(result_text))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"AI-Antwort für Abschnitt {number} konnte nicht als JSON geparst werden: {e}")
+    merged = _merge_chunk_results(chunk_results)
+    cached_chunks = sum(1 for _, from_cache in responses if from_cache)
+    print(f"✓ {len(chunks)} Abschnitte zusammengeführt ({cached_chunks} aus dem AI-Cache)")
+    return json.dumps(merged, ensure_ascii=False), cached_chunks == len(chunks)
+
+
+def _request_completion(
+    system_prompt: str,
+    prompt: str,
+    document_label: str,
+    pdf_text: str,
+    use_cache: bool = True
+) -> Tuple[str, bool]:
+    """
+    Chat-Completion im JSON-Modus - bei gleichem Modell, Prompt und Dokumenttext
+    aus dem AI-Cache (src/ai_cache.py) statt einer neuen OpenAI-Anfrage
+    
+    Returns:
+        (Antworttext, aus dem Cache?)
+    """
+    params = {'temperature': TEMPERATURE, 'response_format': 'json_object'}
+    key = response_key(MODEL, params, system_prompt, prompt, pdf_text)
+    
+    if use_cache:
+        cached = load_response(key)
+        if cached is not None:
+            print("⚡ Antwort aus dem AI-Cache (keine OpenAI-Anfrage)")
+            return cached, True
+    
+    backend = get_backend()
+    print(f"🤖 Sende Anfrage an OpenAI ({backend.name})...")
+    result_text = backend.complete(
+        model=MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": f"{prompt}\n\n---\n\n{document_label}:\n{pdf_text}"
+            }
+        ],
+        temperature=TEMPERATURE,
+        response_format={"type": "json_object"}  # JSON-Modus
+    )
+    
+    print("✓ OpenAI Antwort erhalten")
+    
+    # Nur gültiges JSON cachen - eine kaputte Antwort soll beim nächsten Mal neu angefragt werden
+    try:
+        json.loads(result_text)
+    except (TypeError, ValueError):
+        return result_text, False
+    store_response(key, result_text, MODEL)
+    return result_text, False
+
+
+def _stream_completion(
+    system_prompt: str,
+    prompt: str,
+    document_label: str,
+    pdf_text: str,
+    stream: Dict[str, Any],
+    use_cache: bool = True
+) -> Iterator[str]:
+    """
+    Wie _request_completion(), liefert die Antwort aber stückweise, sobald sie eintrifft
+    
+    stream['parts'] sammelt alle Teile, stream['from_cache'] zeigt einen Cache-Treffer an.
+    Die vollständige Antwort wird am Ende gecacht (nur gültiges JSON).
+    """
+    params = {'temperature': TEMPERATURE, 'response_format': 'json_object'}
+    key = response_key(MODEL, params, system_prompt, prompt, pdf_text)
+    
+    if use_cache:
+        cached = load_response(key)
+        if cached is not None:
+            print("⚡ Antwort aus dem AI-Cache (keine OpenAI-Anfrage)")
+            stream['parts'].append(cached)
+            stream['from_cache'] = True
+            yield cached
+            return
+    
+    backend = get_backend()
+    print(f"🤖 Sende Anfrage an OpenAI ({backend.name}, Streaming)...")
+    for delta in backend.stream(
+        model=MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": f"{prompt}\n\n---\n\n{document_label}:\n{pdf_text}"
+            }
+        ],
+        temperature=TEMPERATURE,
+        response_format={"type": "json_object"}  # JSON-Modus
+    ):
+        stream['parts'].append(delta)
+        yield delta
+    
+    print("✓ OpenAI Antwort erhalten")
+    result_text = ''.join(stream['parts'])
+    try:
+        json.loads(result_text)
+    except (TypeError, ValueError):
+        return
+    store_response(key, result_text, MODEL)
+
+
+def _iter_json_array_items(deltas: Iterable[str], key: str) -> Iterator[Any]:
+    """
+    Inkrementeller Parser: liefert die Elemente des Arrays "key" einer JSON-Antwort,
+    sobald jedes Element vollständig empfangen ist (der Rest der Antwort wird trotzdem
+    gelesen, damit sie vollständig vorliegt)
+    
+    Nur "key" auf oberster Ebene des Antwortobjekts zählt - nicht ein gleichnamiger
+    Schlüssel in einem verschachtelten Objekt oder ein String mit diesem Inhalt.
+    """
+    buffer = ''
+    position = 0
+    state = 'seek'          # 'seek' → Array suchen, 'array' → Elemente lesen, 'done'
+    item_start = None
+    depth = 0
+    in_string = False
+    escaped = False
+    # Suche: Verschachtelungstiefe, Beginn des aktuellen Strings und ob zuletzt
+    # 'key' (→ 'key') bzw. 'key': (→ 'colon') auf oberster Ebene gelesen wurde
+    seek_depth = 0
+    string_start = None
+    pending = None
+    
+    for delta in deltas:
+        buffer += delta
+        while state == 'seek' and position < len(buffer):
+            char = buffer[position]
+            position += 1
+            if string_start is not None:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    is_key = seek_depth == 1 and buffer[string_start + 1:position - 1] == key
+                    pending = 'key' if is_key else None
+                    string_start = None
+            elif char == '"':
+                string_start, pending = position - 1, None
+            elif char in ' \t\r\n':
+                continue
+            elif char == ':' and pending == 'key':
+                pending = 'colon'
+            elif char == '[' and pending == 'colon':
+                state = 'array'
+            else:
+                pending = None
+                if char in '{[':
+                    seek_depth += 1
+                elif char in '}]':
+                    seek_depth -= 1
+        
+        while state == 'array' and position < len(buffer):
+            char = buffer[position]
+            if item_start is None:
+                # Zwischen den Elementen
+                if char == ']':
+                    state = 'done'
+                elif char in '{["' or char not in ' \t\r\n,':
+                    item_start, depth, in_string, escaped = position, 0, False, False
+                    continue
+            elif in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+                    if depth == 0:
+                        item_end = position + 1
+                        yield json.loads(buffer[item_start:item_end])
+                        item_start = None
+            elif char == '"':
+                in_string = True
+            elif char in '{[':
+                depth += 1
+            elif char in '}]':
+                if depth == 0:
+                    # Skalarer Wert direkt vor dem Array-Ende
+                    yield json.loads(buffer[item_start:position])
+                    item_start = None
+                    state = 'done'
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        yield json.loads(buffer[item_start:position + 1])
+                        item_start = None
+            elif char == ',' and depth == 0:
+                yield json.loads(buffer[item_start:position])
+                item_start = None
+            position += 1
 
 
 def _build_extraction_prompt(einheit: str = None) -> str:
@@ -190,13 +866,14 @@ Return the results as JSON in this format:
 """
 
 
-def extract_bank_statement_ai(pdf_path: str, tenant_name: str = None) -> Dict[str, Any]:
+def extract_bank_statement_ai(pdf_path: str, tenant_name: str = None, use_cache: bool = True) -> Dict[str, Any]:
     """
     Extrahiert Mietzahlungen aus Kontoauszug mit OpenAI
     
     Args:
         pdf_path: Pfad zur PDF-Datei
         tenant_name: Name des Mieters (optional, für bessere Filterung)
+        use_cache: False = AI-Cache umgehen und neu anfragen (Antwort wird trotzdem gespeichert)
     
     Returns:
         {
@@ -207,16 +884,8 @@ def extract_bank_statement_ai(pdf_path: str, tenant_name: str = None) -> Dict[st
             'extraction_method': 'ai'
         }
     """
-    if not OPENAI_AVAILABLE:
-        raise ImportError(
-            "OpenAI-Paket nicht installiert. Bitte installieren mit: pip install openai"
-        )
-    
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        raise ValueError(
-            "OPENAI_API_KEY nicht gefunden. Bitte in .env Datei eintragen."
-        )
+    # OpenAI-Paket/API-Key bzw. Aufzeichnungen (je nach config.AI_BACKEND)
+    get_backend().check()
     
     # Extract text from PDF
     print("📄 Extrahiere Kontoauszug-Text...")
@@ -226,32 +895,16 @@ def extract_bank_statement_ai(pdf_path: str, tenant_name: str = None) -> Dict[st
     # Prepare prompt
     prompt = _build_bank_extraction_prompt(tenant_name)
     
-    # Call OpenAI API
-    print("🤖 Sende Anfrage an OpenAI...")
-    client = OpenAI(api_key=api_key)
-    
+    # Call OpenAI API (oder Antwort aus dem AI-Cache)
     try:
-        response = client.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Du bist ein Experte für Bankkontoauszüge und Mietzahlungsanalyse."
-                },
-                {
-                    "role": "user",
-                    "content": f"{prompt}\n\n---\n\nKontoauszug:\n{pdf_text}"
-                }
-            ],
-            temperature=0.1,
-            response_format={"type": "json_object"}
+        result_text, from_cache = _request_completion(
+            "Du bist ein Experte für Bankkontoauszüge und Mietzahlungsanalyse.",
+            prompt,
+            "Kontoauszug",
+            pdf_text,
+            use_cache=use_cache
         )
         
-        print("✓ OpenAI Antwort erhalten")
-        
-        # Parse response
-        result_text = response.choices[0].message.content
-        
         # DEBUG: Print raw response
         print("\n" + "=" * 80)
         print("🤖 OPENAI RAW OUTPUT:")
@@ -278,7 +931,8 @@ def extract_bank_statement_ai(pdf_path: str, tenant_name: str = None) -> Dict[st
             'total_rent_paid_eur': result_json.get('total_rent_paid_eur', 0.0),
             'period': result_json.get('period', ''),
             'extraction_method': 'ai',
-            'model_used': 'gpt-4-turbo'
+            'model_used': MODEL,
+            'from_cache': from_cache
         }
         
     except json.JSONDecodeError as e:
@@ -321,12 +975,13 @@ Return the results as JSON in this format:
 """
 
 
-def extract_rental_contract_ai(pdf_path: str) -> Dict[str, Any]:
+def extract_rental_contract_ai(pdf_path: str, use_cache: bool = True) -> Dict[str, Any]:
     """
     Extrahiert Mieter-Name und Kaltmiete aus Mietvertrag mit OpenAI
     
     Args:
         pdf_path: Pfad zur PDF-Datei
+        use_cache: False = AI-Cache umgehen und neu anfragen (Antwort wird trotzdem gespeichert)
     
     Returns:
         {
@@ -335,16 +990,8 @@ def extract_rental_contract_ai(pdf_path: str) -> Dict[str, Any]:
             'extraction_method': 'ai'
         }
     """
-    if not OPENAI_AVAILABLE:
-        raise ImportError(
-            "OpenAI-Paket nicht installiert. Bitte installieren mit: pip install openai"
-        )
-    
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        raise ValueError(
-            "OPENAI_API_KEY nicht gefunden. Bitte in .env Datei eintragen."
-        )
+    # OpenAI-Paket/API-Key bzw. Aufzeichnungen (je nach config.AI_BACKEND)
+    get_backend().check()
     
     # Extract text from PDF
     print("📄 Extrahiere Mietvertrag-Text...")
@@ -354,32 +1001,16 @@ def extract_rental_contract_ai(pdf_path: str) -> Dict[str, Any]:
     # Prepare prompt
     prompt = _build_rental_extraction_prompt()
     
-    # Call OpenAI API
-    print("🤖 Sende Anfrage an OpenAI...")
-    client = OpenAI(api_key=api_key)
-    
+    # Call OpenAI API (oder Antwort aus dem AI-Cache)
     try:
-        response = client.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Du bist ein Experte für Mietverträge und Mietrecht."
-                },
-                {
-                    "role": "user",
-                    "content": f"{prompt}\n\n---\n\nMietvertrag:\n{pdf_text}"
-                }
-            ],
-            temperature=0.1,
-            response_format={"type": "json_object"}
+        result_text, from_cache = _request_completion(
+            "Du bist ein Experte für Mietverträge und Mietrecht.",
+            prompt,
+            "Mietvertrag",
+            pdf_text,
+            use_cache=use_cache
         )
         
-        print("✓ OpenAI Antwort erhalten")
-        
-        # Parse response
-        result_text = response.choices[0].message.content
-        
         # DEBUG: Print raw response
         print("\n" + "=" * 80)
         print("🤖 OPENAI RAW OUTPUT:")
@@ -399,7 +1030,8 @@ def extract_rental_contract_ai(pdf_path: str) -> Dict[str, Any]:
             'tenant_name': result_json.get('tenant_name', ''),
             'base_rent_eur': float(result_json.get('base_rent_eur', 0.0)),
             'extraction_method': 'ai',
-            'model_used': 'gpt-4-turbo'
+            'model_used': MODEL,
+            'from_cache': from_cache
         }
         
     except json.JSONDecodeError as e:
@@ -430,6 +1062,126 @@ Gib das Ergebnis ausschließlich in folgendem JSON-Format zurück, ohne zusätzl
 """
 
 
+def extract_all_ai(
+    weg_path: Optional[str],
+    year: int,
+    einheit: str = None,
+    rental_path: str = None,
+    bank_path: str = None,
+    speculative_bank: bool = None,
+    use_cache: bool = True
+) -> Dict[str, Any]:
+    """
+    Führt die AI-Extraktionen gleichzeitig aus statt nacheinander
+    
+    Die WEG-Abrechnung läuft parallel zur Kette Mietvertrag → Kontoauszug
+    (der Mietername aus dem Vertrag dient als Hinweis für den Kontoauszug-Prompt).
+    Mit speculative_bank startet der Kontoauszug sofort ohne Namenshinweis -
+    findet er keine Zahlungen (oder schlägt fehl), wird er sofort mit dem Namen
+    aus dem Mietvertrag wiederholt, ohne auf die WEG-Abrechnung zu warten.
+    
+    Gesamtdauer ≈ längste einzelne Anfrage statt Summe aller Anfragen.
+    
+    Args:
+        weg_path: Pfad zur WEG-Abrechnung (None = ohne, z.B. wenn sie per stream_weg_data_ai läuft)
+        year: Abrechnungsjahr
+        einheit: Einheit (optional)
+        rental_path: Mietvertrag (optional)
+        bank_path: Kontoauszug als PDF (optional)
+        speculative_bank: None = config.AI_EXTRACTION['speculative_bank']
+        use_cache: False = AI-Cache umgehen
+    
+    Returns:
+        {
+            'weg': dict | None, 'rental': dict | None, 'bank': dict | None,
+            'errors': {'weg'|'rental'|'bank': Exception},
+            'timings': {'weg'|'rental'|'bank': Sekunden},
+            'wall_seconds': float
+        }
+    """
+    if speculative_bank is None:
+        speculative_bank = config.AI_EXTRACTION['speculative_bank']
+    
+    results: Dict[str, Any] = {'weg': None, 'rental': None, 'bank': None}
+    errors: Dict[str, Exception] = {}
+    timings: Dict[str, float] = {}
+    
+    def timed(name, function, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timings[name] = round(time.perf_counter() - start, 2)
+    
+    def tenant_hint(rental_future) -> str:
+        try:
+            return (rental_future.result() or {}).get('tenant_name') or None
+        except Exception:
+            return None
+    
+    def rental_then_bank(rental_future):
+        return timed('bank', extract_bank_statement_ai, bank_path,
+                     tenant_name=tenant_hint(rental_future), use_cache=use_cache)
+    
+    def needs_bank_retry(bank_future) -> bool:
+        if not speculative_bank or rental_future is None:
+            return False
+        if bank_future.exception() is not None:
+            return True
+        return not (bank_future.result() or {}).get('payments')
+    
+    def retry_bank(bank_future):
+        # Spekulativer Kontoauszug ohne Treffer: mit dem Mieternamen nachfragen
+        tenant_name = tenant_hint(rental_future)
+        if not tenant_name:
+            return bank_future.result()
+        print("🔁 Kontoauszug ohne Zahlungen - erneut mit Mieternamen")
+        return timed('bank', extract_bank_statement_ai, bank_path,
+                     tenant_name=tenant_name, use_cache=use_cache)
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=config.AI_EXTRACTION['workers']) as executor:
+        futures = {}
+        if weg_path:
+            futures['weg'] = executor.submit(timed, 'weg', extract_weg_data_ai, weg_path, year,
+                                             einheit=einheit, use_cache=use_cache)
+        rental_future = None
+        if rental_path:
+            rental_future = futures['rental'] = executor.submit(
+                timed, 'rental', extract_rental_contract_ai, rental_path, use_cache=use_cache
+            )
+        if bank_path:
+            if speculative_bank or rental_future is None:
+                futures['bank'] = executor.submit(timed, 'bank', extract_bank_statement_ai, bank_path,
+                                                  use_cache=use_cache)
+            else:
+                futures['bank'] = executor.submit(rental_then_bank, rental_future)
+        
+        names = {future: name for name, future in futures.items()}
+        for future in as_completed(names):
+            name = names[future]
+            if name == 'bank' and needs_bank_retry(future):
+                # Wiederholung sofort starten, nicht erst nach den übrigen Anfragen
+                futures['bank'] = executor.submit(retry_bank, future)
+                continue
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                errors[name] = e
+        
+        if 'bank' in futures and futures['bank'] not in names:
+            try:
+                results['bank'] = futures['bank'].result()
+            except Exception as e:
+                errors['bank'] = e
+    
+    wall_seconds = time.perf_counter() - start
+    print(f"⏱️  AI-Extraktion: {wall_seconds:.1f}s gesamt "
+          f"(einzeln: {', '.join(f'{name} {seconds:.1f}s' for name, seconds in timings.items())})")
+    
+    return {**results, 'errors': errors, 'timings': timings, 'wall_seconds': round(wall_seconds, 2)}
+
+
 def calculate_monthly_prepayment_from_ai(
     bank_data: Dict[str, Any],
     rental_data: Dict[str, Any]
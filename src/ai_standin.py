@@ -0,0 +1,198 @@
+"""
+═══════════════════════════════════════════════════════════════
+AI STAND-IN - Lokaler OpenAI-kompatibler Server für Benchmarks
+═══════════════════════════════════════════════════════════════
+
+Beantwortet POST /v1/chat/completions (normal und gestreamt als Server-Sent
+Events) mit den Aufzeichnungen aus config.AI_BACKEND['recordings_dir'],
+im Tempo der simulierten Latenz (siehe ReplayBackend in src/ai_backend.py).
+Fehlt eine Aufzeichnung, antwortet der Server mit 404 im Fehlerformat der API.
+Mit server.inject_errors() lassen sich 429/5xx-Antworten simulieren, um
+Retries und Backoff zu messen; server.requests / server.connections zählen
+Anfragen und TCP-Verbindungen (Wiederverwendung des Verbindungspools).
+
+Start:  python -m src.ai_standin [port]
+Nutzung: config.AI_BACKEND['backend'] = 'standin' (startet den Server bei
+         Bedarf im eigenen Prozess) oder config.OPENAI_CLIENT['base_url']
+         = 'http://127.0.0.1:8765/v1' für den normalen OpenAI-Weg.
+"""
+
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from .ai_backend import ReplayBackend, load_recording
+
+_server = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-Alive, damit der Verbindungspool des Clients wie gegen die echte API arbeitet
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.count('connections')
+
+    def do_POST(self) -> None:
+        if self.path.rstrip('/') not in ('/v1/chat/completions', '/chat/completions'):
+            self._send_error(404, f"Unbekannter Pfad: {self.path}")
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_error(400, "Anfrage ist kein gültiges JSON")
+            return
+
+        self.server.count('requests')
+        injected = self.server.next_error()
+        if injected is not None:
+            status, retry_after = injected
+            headers = {'Retry-After': str(retry_after)} if retry_after is not None else {}
+            self._send_error(status, f"Simulierter Fehler {status}", headers)
+            return
+
+        try:
+            text = load_recording(request)
+        except LookupError as e:
+            self._send_error(404, str(e))
+            return
+
+        if request.get('stream'):
+            self._send_stream(request, text)
+        else:
+            self._send_completion(request, text)
+
+    def _send_completion(self, request: Dict[str, Any], text: str) -> None:
+        content = ''.join(ReplayBackend().paced(text))
+        self._send_json(200, {
+            'id': f"chatcmpl-{uuid.uuid4().hex}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', ''),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': _usage(request, content)
+        })
+
+    def _send_stream(self, request: Dict[str, Any], text: str) -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        def event(delta: Dict[str, Any], finish_reason: str = None) -> None:
+            self._write_chunk('data: ' + json.dumps({
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': request.get('model', ''),
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+            }, ensure_ascii=False) + '\n\n')
+
+        event({'role': 'assistant', 'content': ''})
+        for piece in ReplayBackend().paced(text):
+            event({'content': piece})
+        event({}, 'stop')
+        self._write_chunk('data: [DONE]\n\n')
+        self.wfile.write(b'0\r\n\r\n')
+
+    def _write_chunk(self, data: str) -> None:
+        encoded = data.encode('utf-8')
+        self.wfile.write(f"{len(encoded):x}\r\n".encode('ascii') + encoded + b'\r\n')
+        self.wfile.flush()
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self._send_json(
+            status,
+            {'error': {'message': message, 'type': 'invalid_request_error', 'code': None}},
+            headers
+        )
+
+    def log_message(self, format: str, *args) -> None:
+        pass  # Keine Zugriffslogs pro Anfrage
+
+
+def _usage(request: Dict[str, Any], content: str) -> Dict[str, int]:
+    """Grobe Token-Zahlen (~4 Zeichen pro Token)"""
+    prompt_tokens = sum(len(str(message.get('content', ''))) for message in request.get('messages', [])) // 4
+    completion_tokens = len(content) // 4
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'total_tokens': prompt_tokens + completion_tokens
+    }
+
+
+class StandinServer(ThreadingHTTPServer):
+    """
+    HTTP-Server mit Zählern und simulierten Fehlerantworten
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, handler=_Handler):
+        super().__init__(address, handler)
+        self.requests = 0
+        self.connections = 0
+        self._errors = []
+        self._lock = threading.Lock()
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def inject_errors(self, status: int, count: int = 1, retry_after: Optional[float] = None) -> None:
+        """
+        Die nächsten count Anfragen mit status beantworten (z.B. 429 oder 503),
+        optional mit Retry-After-Header
+        """
+        with self._lock:
+            self._errors.extend([(status, retry_after)] * count)
+
+    def next_error(self) -> Optional[tuple]:
+        with self._lock:
+            return self._errors.pop(0) if self._errors else None
+
+
+def start_server(host: str = '127.0.0.1', port: int = 8765) -> StandinServer:
+    """
+    Stand-in-Server im Hintergrund starten (einmal pro Prozess)
+    """
+    global _server
+    if _server is None:
+        _server = StandinServer((host, port))
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+        print(f"🧪 AI-Stand-in läuft auf http://{host}:{_server.server_port}/v1")
+    return _server
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    server = start_server('127.0.0.1', port)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
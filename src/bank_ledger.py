@@ -0,0 +1,334 @@
+"""
+═══════════════════════════════════════════════════════════════
+BANK LEDGER - Kontoauszug einmal parsen, pro Mieter nachschlagen
+═══════════════════════════════════════════════════════════════
+
+Ein Kontoauszug wird einmal komplett in ein persistentes Journal (SQLite)
+übernommen - alle Buchungen, nicht nur die eines Mieters. Indiziert nach
+Zahler (Wort-Index), Verwendungszweck (Wort-Index) und Valutadatum.
+
+Abfragen pro Mieter und Jahr sind danach reine Index-Lookups:
+40 Wohnungen auf einem Konto = 1 PDF-Parse + 40 Abfragen.
+
+Inkrementell: Neue Auszüge (PDF, CAMT.053, MT940, CSV) werden einfach
+dazugenommen. Bereits übernommene Dateien werden am Datei-Hash erkannt
+und nicht erneut gelesen; Buchungen, die in überlappenden Auszügen
+mehrfach vorkommen, über einen Hash-Index (Datum, Betrag, EREF) verworfen.
+"""
+
+import hashlib
+import re
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
+
+import config
+from .bank_import import detect_bank_format, iter_structured_transactions
+from .page_cache import file_hash, open_pdf
+from .pdf_extractor import is_bank_page_text, parse_bank_transactions, _match_rent_payments, _summarize_bank_payments
+from .text_backend import extract_page_text
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS statements (
+    file_hash TEXT PRIMARY KEY,
+    source TEXT,
+    ingested_at TEXT,
+    transaction_count INTEGER,
+    duplicate_count INTEGER DEFAULT 0,
+    format TEXT
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    statement_hash TEXT NOT NULL,
+    value_date TEXT NOT NULL,
+    amount REAL NOT NULL,
+    counterparty TEXT,
+    purpose TEXT,
+    reference TEXT,
+    fingerprint TEXT
+);
+CREATE TABLE IF NOT EXISTS transaction_tokens (
+    token TEXT NOT NULL,
+    field TEXT NOT NULL,
+    transaction_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_transactions_value_date ON transactions (value_date);
+CREATE INDEX IF NOT EXISTS ix_transactions_fingerprint ON transactions (fingerprint);
+CREATE INDEX IF NOT EXISTS ix_transaction_tokens ON transaction_tokens (field, token, transaction_id);
+"""
+
+_EREF_PATTERN = re.compile(r'EREF\s*[:+]\s*(\S+)', re.IGNORECASE)
+
+
+def _tokens(text: str) -> List[str]:
+    """Kleingeschriebene Wörter (Namen, Straßen, EREF ...) für den Index"""
+    return sorted(set(re.findall(r'\w+', (text or '').lower())))
+
+
+def _reference(transaction: Dict[str, Any]) -> str:
+    """EREF der Buchung (strukturierte Exporte liefern sie direkt, PDFs im Verwendungszweck)"""
+    if transaction.get('reference'):
+        return transaction['reference']
+    match = _EREF_PATTERN.search(transaction.get('purpose') or '')
+    return match.group(1) if match else ''
+
+
+def _dedupe_key(transaction: Dict[str, Any]) -> str:
+    """
+    Datum + Betrag + EREF; ohne EREF Zahler + Verwendungszweck (normalisiert),
+    damit verschiedene Buchungen mit gleichem Datum und Betrag getrennt bleiben
+    """
+    reference = _reference(transaction).lower()
+    if not reference:
+        reference = ' '.join(_tokens(transaction.get('counterparty')) + _tokens(transaction.get('purpose')))
+    return f"{transaction['date'].isoformat()}|{transaction['amount']:.2f}|{reference}"
+
+
+def _fingerprints(transactions: Iterable[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], str]]:
+    """
+    (Buchung, Fingerprint) - Hash aus Datum, Betrag, EREF und der laufenden Nummer
+    gleicher Schlüssel innerhalb eines Auszugs. So bleiben zwei identische Buchungen
+    am selben Tag erhalten, kommen aber aus einem überlappenden Auszug nicht doppelt hinzu.
+    """
+    occurrences: Dict[str, int] = {}
+    for transaction in transactions:
+        key = _dedupe_key(transaction)
+        occurrences[key] = occurrences.get(key, 0) + 1
+        yield transaction, hashlib.sha1(f"{key}#{occurrences[key]}".encode('utf-8')).hexdigest()
+
+
+class BankLedger:
+    """
+    Persistentes Buchungsjournal für einen oder mehrere Kontoauszüge
+
+    Verwendung:
+        ledger = BankLedger()
+        ledger.ingest_files(['data/input/Kontoauszug_2024_01.pdf', 'data/input/umsaetze.xml'])
+        bank_data = ledger.tenant_payments('Emanuela Mingo', 2024)
+        bank_data = ledger.rent_payments(2024)   # wie extract_bank_statement()
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or config.BANK_LEDGER['path']
+        if self.db_path != ':memory:':
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(_SCHEMA)
+
+    def __enter__(self) -> 'BankLedger':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def is_ingested(self, statement_hash: str) -> bool:
+        row = self.connection.execute(
+            "SELECT 1 FROM statements WHERE file_hash = ?", (statement_hash,)
+        ).fetchone()
+        return row is not None
+
+    def ingest_file(self, path: str) -> int:
+        """
+        Übernimmt alle Buchungen eines Kontoauszugs (einmalig pro Dateiinhalt)
+
+        PDF sowie CAMT.053 / MT940 / CSV (siehe bank_import). Buchungen, die schon
+        aus einem überlappenden Auszug bekannt sind, werden übersprungen.
+
+        Returns:
+            Anzahl neu übernommener Buchungen (0 wenn die Datei bereits bekannt ist)
+        """
+        statement_hash = file_hash(path)
+        if self.is_ingested(statement_hash):
+            return 0
+
+        bank_format = detect_bank_format(path)
+
+        def pdf_transactions():
+            with open_pdf(path) as pdf:
+                for page in pdf.pages:
+                    text = extract_page_text(page, accept=is_bank_page_text)
+                    page.close()
+                    yield from parse_bank_transactions(text)
+
+        transactions = pdf_transactions() if bank_format == 'pdf' else iter_structured_transactions(path, bank_format)
+        return self._store(statement_hash, Path(path).name, bank_format, transactions)
+
+    def ingest_files(self, paths: Iterable[str]) -> List[Tuple[str, int]]:
+        """
+        Mehrere Auszüge übernehmen - bereits bekannte Dateien werden nicht gelesen
+
+        Returns:
+            [(Pfad, neu übernommene Buchungen), ...] in der Reihenfolge von paths
+        """
+        return [(str(path), self.ingest_file(str(path))) for path in paths]
+
+    def _store(
+        self,
+        statement_hash: str,
+        source: str,
+        bank_format: str,
+        transactions: Iterable[Dict[str, Any]]
+    ) -> int:
+        count = 0
+        duplicates = 0
+        with self.connection:
+            for transaction, fingerprint in _fingerprints(transactions):
+                known = self.connection.execute(
+                    "SELECT 1 FROM transactions WHERE fingerprint = ? LIMIT 1", (fingerprint,)
+                ).fetchone()
+                if known:
+                    duplicates += 1
+                    continue
+
+                cursor = self.connection.execute(
+                    "INSERT INTO transactions "
+                    "(statement_hash, value_date, amount, counterparty, purpose, reference, fingerprint) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        statement_hash,
+                        transaction['date'].isoformat(),
+                        transaction['amount'],
+                        transaction.get('counterparty', ''),
+                        transaction.get('purpose', ''),
+                        _reference(transaction),
+                        fingerprint
+                    )
+                )
+                self._index(cursor.lastrowid, transaction)
+                count += 1
+
+            self.connection.execute(
+                "INSERT INTO statements "
+                "(file_hash, source, ingested_at, transaction_count, duplicate_count, format) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (statement_hash, source, datetime.now().isoformat(timespec='seconds'), count, duplicates, bank_format)
+            )
+        return count
+
+    def _index(self, transaction_id: int, transaction: Dict[str, Any]) -> None:
+        rows = [
+            (token, field, transaction_id)
+            for field in ('counterparty', 'purpose')
+            for token in _tokens(transaction.get(field, ''))
+        ]
+        self.connection.executemany(
+            "INSERT INTO transaction_tokens (token, field, transaction_id) VALUES (?, ?, ?)", rows
+        )
+
+    def statements(self) -> List[Dict[str, Any]]:
+        """Übernommene Auszüge: Datei, Format, Zeitpunkt, neue und doppelte Buchungen"""
+        rows = self.connection.execute(
+            "SELECT source, format, ingested_at, transaction_count, duplicate_count "
+            "FROM statements ORDER BY ingested_at, source"
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def transactions(
+        self,
+        counterparty: Union[str, List[str]] = None,
+        purpose: Union[str, List[str]] = None,
+        year: int = None,
+        incoming_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Buchungen über die Indizes nachschlagen
+
+        Args:
+            counterparty: Name/Wörter, die ALLE im Zahler vorkommen müssen (z.B. 'Emanuela Mingo')
+            purpose: Wörter, die ALLE im Verwendungszweck vorkommen müssen (z.B. 'Lietzenburger')
+            year: Nur Buchungen mit Valutadatum in diesem Jahr
+            incoming_only: Nur Gutschriften (Betrag > 0)
+
+        Returns:
+            [{'date': date, 'amount': float, 'counterparty': str, 'purpose': str}, ...] nach Datum sortiert
+        """
+        conditions = []
+        params: List[Any] = []
+
+        for field, words in (('counterparty', counterparty), ('purpose', purpose)):
+            if not words:
+                continue
+            tokens = _tokens(words if isinstance(words, str) else ' '.join(words))
+            if not tokens:
+                continue
+            placeholders = ', '.join('?' * len(tokens))
+            conditions.append(
+                f"id IN (SELECT transaction_id FROM transaction_tokens "
+                f"WHERE field = ? AND token IN ({placeholders}) "
+                f"GROUP BY transaction_id HAVING COUNT(DISTINCT token) = ?)"
+            )
+            params.extend([field, *tokens, len(tokens)])
+
+        if year is not None:
+            conditions.append("value_date BETWEEN ? AND ?")
+            params.extend([f"{year}-01-01", f"{year}-12-31"])
+
+        if incoming_only:
+            conditions.append("amount > 0")
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.connection.execute(
+            f"SELECT value_date, amount, counterparty, purpose FROM transactions {where} ORDER BY value_date, id",
+            params
+        ).fetchall()
+
+        return [
+            {
+                'date': datetime.strptime(row['value_date'], '%Y-%m-%d').date(),
+                'amount': row['amount'],
+                'counterparty': row['counterparty'],
+                'purpose': row['purpose']
+            }
+            for row in rows
+        ]
+
+    def tenant_payments(self, tenant: Union[str, List[str]], year: int) -> Dict[str, Any]:
+        """
+        Mietzahlungen eines Mieters in einem Jahr - gleiches Ergebnis-Format wie
+        extract_bank_statement() (payments, payment_count, months_covered, ...)
+        """
+        payer = tenant if isinstance(tenant, str) else ' '.join(tenant)
+        payments = (
+            {'date': transaction['date'], 'amount': transaction['amount'], 'payer': payer}
+            for transaction in self.transactions(counterparty=tenant, year=year, incoming_only=True)
+        )
+        return _summarize_bank_payments(payments)
+
+    def rent_payments(self, year: int) -> Dict[str, Any]:
+        """
+        Wie extract_bank_statement(): Mietzahlungen eines Jahres über die Zahler-Keywords
+        aus config.BANK_STATEMENT_PATTERNS - aus allen übernommenen Auszügen
+        """
+        transactions = (
+            {**transaction, 'line': transaction['counterparty']}
+            for transaction in self.transactions(year=year)
+        )
+        result = _summarize_bank_payments(_match_rent_payments(transactions))
+        result['source_format'] = 'ledger'
+        return result
+
+
+def ledger_bank_statement(paths: Iterable[str], year: int, db_path: str = None) -> Dict[str, Any]:
+    """
+    Neue Kontoauszüge ins Journal übernehmen (bekannte Dateien werden übersprungen)
+    und die Mietzahlungen eines Jahres wie extract_bank_statement() liefern
+    """
+    with BankLedger(db_path) as ledger:
+        ledger.ingest_files(paths)
+        return ledger.rent_payments(year)
+
+
+def tenant_bank_statement(pdf_path: str, tenant: Union[str, List[str]], year: int, db_path: str = None) -> Dict[str, Any]:
+    """
+    Kontoauszug ins Journal übernehmen (nur beim ersten Mal) und die Zahlungen
+    eines Mieters abfragen
+    """
+    with BankLedger(db_path) as ledger:
+        ledger.ingest_file(pdf_path)
+        return ledger.tenant_payments(tenant, year)
@@ -0,0 +1,131 @@
+"""
+═══════════════════════════════════════════════════════════════
+MEMORY BUDGET - Speicherverbrauch der PDF-Extraktion begrenzen
+═══════════════════════════════════════════════════════════════
+
+Während einer Extraktion wird nach jeder Seite der aktuelle
+Speicherverbrauch (RSS) gemessen. Liegt er über dem Budget aus
+config.MEMORY, schließt open_pdf() das Dokument und öffnet es bei der
+nächsten Seite neu - damit werden alle von pdfminer zwischengespeicherten
+Objekte (Content-Streams, Bilder gescannter Seiten) freigegeben.
+
+Der Höchststand wird mit dem Ergebnis zurückgegeben:
+
+    with track_memory() as memory:
+        ...
+    result['memory'] = memory.report()
+"""
+
+import gc
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import config
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    RESOURCE_AVAILABLE = False
+    resource = None
+
+_MB = 1024 * 1024
+_local = threading.local()
+
+
+def _maxrss_mb(who: int) -> Optional[float]:
+    """Höchststand laut getrusage (Linux: KB, macOS: Bytes)"""
+    if not RESOURCE_AVAILABLE:
+        return None
+    maxrss = resource.getrusage(who).ru_maxrss
+    return maxrss / _MB if sys.platform == 'darwin' else maxrss / 1024
+
+
+def current_rss_mb() -> Optional[float]:
+    """
+    Aktueller Speicherverbrauch des Prozesses in MB (None = nicht messbar, z.B. ohne /proc)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / _MB
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class MemoryTracker:
+    """
+    Höchststand (RSS) einer Extraktion und Prüfung gegen das Budget
+    """
+
+    def __init__(self, budget_mb: float = None):
+        self.budget_mb = config.MEMORY['budget_mb'] if budget_mb is None else budget_mb
+        self.peak_rss_mb = current_rss_mb() or 0.0
+        self.start_rss_mb = self.peak_rss_mb
+        self.children_peak_mb = 0.0
+        self.reopened = 0
+
+    def check(self) -> bool:
+        """
+        Misst den aktuellen Verbrauch
+
+        Returns:
+            True wenn das Budget überschritten ist (Aufrufer soll Speicher freigeben)
+        """
+        rss = current_rss_mb()
+        if rss is None:
+            # Ohne /proc nur der Höchststand des Prozesses messbar - kein Budget möglich
+            self.peak_rss_mb = max(self.peak_rss_mb, _maxrss_mb(resource.RUSAGE_SELF) if RESOURCE_AVAILABLE else 0.0)
+            return False
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        if not self.budget_mb or rss <= self.budget_mb:
+            return False
+
+        gc.collect()
+        rss = current_rss_mb() or 0.0
+        return rss > self.budget_mb
+
+    def note_children(self) -> None:
+        """Höchststand beendeter Worker-Prozesse (nach executor.shutdown) übernehmen"""
+        if RESOURCE_AVAILABLE:
+            self.children_peak_mb = max(self.children_peak_mb, _maxrss_mb(resource.RUSAGE_CHILDREN) or 0.0)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        {'peak_rss_mb': float, 'start_rss_mb': float, 'workers_peak_rss_mb': float,
+         'budget_mb': float, 'reopened': int}
+        """
+        return {
+            'peak_rss_mb': round(self.peak_rss_mb, 1),
+            'start_rss_mb': round(self.start_rss_mb, 1),
+            'workers_peak_rss_mb': round(self.children_peak_mb, 1),
+            'budget_mb': self.budget_mb,
+            'reopened': self.reopened
+        }
+
+
+def active_tracker() -> Optional[MemoryTracker]:
+    """Der MemoryTracker der laufenden Extraktion in diesem Thread (oder None)"""
+    return getattr(_local, 'tracker', None)
+
+
+@contextmanager
+def track_memory(budget_mb: float = None) -> Iterator[MemoryTracker]:
+    """
+    Misst den Speicher-Höchststand aller open_pdf()-Aufrufe innerhalb des Blocks
+
+    Verschachtelte Aufrufe verwenden den äußeren Tracker weiter.
+    """
+    outer = active_tracker()
+    if outer is not None:
+        yield outer
+        return
+
+    tracker = MemoryTracker(budget_mb)
+    _local.tracker = tracker
+    try:
+        yield tracker
+    finally:
+        _local.tracker = None
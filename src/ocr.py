@@ -0,0 +1,154 @@
+"""
+═══════════════════════════════════════════════════════════════
+OCR - Texterkennung für gescannte Seiten ohne Textebene
+═══════════════════════════════════════════════════════════════
+
+Ältere Hausverwaltungen verschicken Abrechnungen oft als Scan. Solche
+Seiten haben keine Textebene - ohne OCR liefert die Extraktion nichts.
+
+Ablauf:
+1. Seiten ohne (nennenswerte) Textebene erkennen (rohe Textebene, schnell)
+2. Seiten-Hash aus einem kleinen Rendering - identische Scans werden
+   nur einmal erkannt, auch wenn sie in einem anderen PDF stecken
+3. Nicht gecachte Seiten parallel rendern + mit Tesseract erkennen
+4. Ergebnis als document.ocr_texts - extract_page_text() und die
+   WEG-Extraktion verwenden es für Seiten ohne Textebene
+
+Benötigt pytesseract + Tesseract (Sprachpaket 'deu').
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import config
+from .page_cache import CachedDocument, open_pdf, _read_json, _write_json
+
+try:
+    import pytesseract
+    OCR_AVAILABLE = True
+except ImportError:
+    OCR_AVAILABLE = False
+    pytesseract = None
+
+
+def pages_without_text(pdf: CachedDocument, max_pages: int = None,
+                       page_indices: Iterable[int] = None) -> List[int]:
+    """
+    Seiten, deren Textebene weniger als config.OCR['min_text_chars'] Zeichen enthält
+    (nur die ersten max_pages Seiten bzw. nur page_indices)
+    """
+    min_chars = config.OCR['min_text_chars']
+    pages = pdf.pages[:max_pages]
+    if page_indices is not None:
+        selected = set(page_indices)
+        pages = [page for page in pages if page.index in selected]
+    missing = []
+    for page in pages:
+        raw_text = page.extract_raw_text() or ''
+        page.close()
+        if len(raw_text.strip()) < min_chars:
+            missing.append(page.index)
+    return missing
+
+
+def page_hash(pdf: CachedDocument, index: int) -> str:
+    """
+    Inhalts-Hash einer Seite aus einem Rendering mit geringer Auflösung
+    """
+    page = pdf.pdfium[index]
+    try:
+        bitmap = page.render(scale=config.OCR['hash_dpi'] / 72)
+        return hashlib.sha256(bytes(bitmap.buffer)).hexdigest()
+    finally:
+        page.close()
+
+
+def _cache_path(digest: str) -> Path:
+    settings = config.OCR
+    return Path(settings['dir']) / f"{digest}-{settings['lang']}-{settings['dpi']}.json"
+
+
+def _ocr_page(pdf_path: str, index: int, dpi: int, lang: str) -> str:
+    """
+    Worker: Seite rendern und mit Tesseract erkennen (läuft im Prozess-Pool)
+    """
+    with open_pdf(pdf_path, use_cache=False) as pdf:
+        page = pdf.pdfium[index]
+        try:
+            image = page.render(scale=dpi / 72).to_pil()
+        finally:
+            page.close()
+    return pytesseract.image_to_string(image, lang=lang)
+
+
+def ocr_missing_pages(pdf: CachedDocument, workers: int = None, max_pages: int = None,
+                      page_indices: Iterable[int] = None) -> Dict[int, str]:
+    """
+    OCR-Text aller Seiten ohne Textebene
+
+    Args:
+        pdf: Geöffnetes Dokument (open_pdf)
+        workers: Prozesse für die Erkennung (None = config.OCR['workers'], 0 = alle CPU-Kerne)
+        max_pages: Nur die ersten max_pages Seiten prüfen (None = alle)
+        page_indices: Nur diese Seiten prüfen (None = alle)
+
+    Returns:
+        {Seitenindex: erkannter Text} - leer, wenn alle Seiten eine Textebene haben
+    """
+    settings = config.OCR
+    if not settings['enabled']:
+        return {}
+
+    missing = pages_without_text(pdf, max_pages, page_indices)
+    if not missing:
+        return {}
+
+    if not OCR_AVAILABLE:
+        print(f"  ⚠️  {len(missing)} Seite(n) ohne Textebene in {Path(pdf.pdf_path).name} - "
+              f"für OCR bitte installieren: pip install pytesseract (+ Tesseract)")
+        return {}
+
+    texts = {}
+    todo = {}
+    for index in missing:
+        digest = page_hash(pdf, index)
+        cached = _read_json(_cache_path(digest))
+        if cached is not None:
+            texts[index] = cached['text']
+        else:
+            todo[index] = digest
+
+    if todo:
+        print(f"  🔍 OCR für {len(todo)} Seite(n) ohne Textebene ({len(texts)} aus dem Cache)")
+        if workers is None:
+            workers = settings['workers']
+        if workers == 0:
+            workers = os.cpu_count() or 1
+
+        indices = sorted(todo)
+        args = ([pdf.pdf_path] * len(indices), indices,
+                [settings['dpi']] * len(indices), [settings['lang']] * len(indices))
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(indices))) if workers > 1 and len(indices) > 1 else None
+        try:
+            results = (executor.map if executor else map)(_ocr_page, *args)
+            for index, text in zip(indices, results):
+                texts[index] = text
+                _write_json(_cache_path(todo[index]), {'text': text})
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    return texts
+
+
+def apply_ocr(pdf: CachedDocument, workers: int = None, max_pages: int = None,
+              page_indices: Iterable[int] = None) -> CachedDocument:
+    """
+    OCR-Texte am Dokument hinterlegen (pdf.ocr_texts), damit extract_page_text()
+    sie für Seiten ohne Textebene verwendet (mit page_indices nur für diese Seiten)
+    """
+    pdf.ocr_texts = ocr_missing_pages(pdf, workers, max_pages, page_indices)
+    return pdf
@@ -0,0 +1,241 @@
+"""
+═══════════════════════════════════════════════════════════════
+OPENAI CLIENT - Gemeinsamer Client mit Rate-Limit und Retries
+═══════════════════════════════════════════════════════════════
+
+Ein OpenAI-Client pro Prozess statt einem pro Anfrage: die HTTP-
+Verbindungen (inkl. TLS) bleiben im Pool des Clients offen und werden
+von allen Extraktionen und Threads wiederverwendet.
+
+Jede Anfrage läuft durch:
+1. Begrenzung gleichzeitiger Anfragen (config.OPENAI_CLIENT['max_concurrent'])
+2. Token-Buckets für Anfragen und Tokens pro Minute (Limits des Accounts)
+3. Retries bei 429 / 5xx / Verbindungsfehlern mit exponentiellem Backoff
+   und Jitter (Retry-After des Servers hat Vorrang)
+
+Mit config.OPENAI_CLIENT['base_url'] (oder OPENAI_BASE_URL) lässt sich
+ein lokaler, OpenAI-kompatibler Server verwenden.
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+import config
+
+try:
+    import openai
+    from openai import OpenAI
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+    openai = None
+    OpenAI = None
+
+_lock = threading.Lock()
+_client = None
+_limiter = None
+
+
+class TokenBucket:
+    """
+    Token-Bucket mit Kapazität = Rate pro Minute, wird kontinuierlich aufgefüllt
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """
+        Entnimmt amount (wartet, bis genug verfügbar ist)
+
+        Returns:
+            Wartezeit in Sekunden
+        """
+        if not self.capacity:
+            return 0.0
+        # Größere Anfragen als die Kapazität würden ewig warten
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.available = min(self.capacity, self.available + (now - self.updated) * self.capacity / 60)
+                self.updated = now
+                if self.available >= amount:
+                    self.available -= amount
+                    return waited
+                delay = (amount - self.available) * 60 / self.capacity
+            time.sleep(delay)
+            waited += delay
+
+
+class RateLimiter:
+    """
+    Gleichzeitige Anfragen + Anfragen/Tokens pro Minute
+    """
+
+    def __init__(self, max_concurrent: int, requests_per_minute: float, tokens_per_minute: float):
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def acquire(self, estimated_tokens: int) -> None:
+        self.slots.acquire()
+        waited = self.requests.acquire(1) + self.tokens.acquire(estimated_tokens)
+        if waited >= 1:
+            print(f"  ⏳ Rate-Limit: {waited:.1f}s gewartet")
+
+    def release(self) -> None:
+        self.slots.release()
+
+
+def get_client() -> 'OpenAI':
+    """
+    Der gemeinsame OpenAI-Client des Prozesses (wird beim ersten Aufruf erstellt)
+    """
+    global _client
+    if not OPENAI_AVAILABLE:
+        raise ImportError("OpenAI-Paket nicht installiert. Bitte installieren mit: pip install openai")
+
+    with _lock:
+        if _client is None:
+            _client = new_client(
+                config.OPENAI_CLIENT['base_url'] or os.getenv('OPENAI_BASE_URL') or None,
+                os.getenv('OPENAI_API_KEY')
+            )
+        return _client
+
+
+def new_client(base_url: Optional[str] = None, api_key: Optional[str] = None) -> 'OpenAI':
+    """
+    Eigener Client (z.B. für einen lokalen Server) mit den Einstellungen aus config.OPENAI_CLIENT
+    """
+    if not OPENAI_AVAILABLE:
+        raise ImportError("OpenAI-Paket nicht installiert. Bitte installieren mit: pip install openai")
+    return OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=config.OPENAI_CLIENT['timeout'],
+        # Retries übernimmt chat_completion() (mit Rate-Limit und Jitter)
+        max_retries=0
+    )
+
+
+def get_limiter() -> RateLimiter:
+    """Der gemeinsame RateLimiter des Prozesses"""
+    global _limiter
+    with _lock:
+        if _limiter is None:
+            settings = config.OPENAI_CLIENT
+            _limiter = RateLimiter(
+                settings['max_concurrent'],
+                settings['requests_per_minute'],
+                settings['tokens_per_minute']
+            )
+        return _limiter
+
+
+def reset_client() -> None:
+    """
+    Client und Limits verwerfen (z.B. nach Änderung von API-Key oder config.OPENAI_CLIENT)
+    """
+    global _client, _limiter
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _limiter = None
+
+
+def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """
+    Wartezeit vor dem nächsten Versuch oder None, wenn der Fehler endgültig ist
+    """
+    settings = config.OPENAI_CLIENT
+    if isinstance(error, openai.APIStatusError):
+        if error.status_code != 429 and error.status_code < 500:
+            return None
+        retry_after = error.response.headers.get('retry-after') if error.response is not None else None
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), settings['backoff_max'])
+        except ValueError:
+            pass
+    elif not isinstance(error, openai.APIConnectionError):
+        return None
+
+    # Exponentiell mit "full jitter" - parallele Anfragen laufen nicht im Gleichschritt
+    return random.uniform(0, min(settings['backoff_max'], settings['backoff_base'] * 2 ** attempt))
+
+
+def _estimate_request_tokens(messages: list, max_tokens: Optional[int]) -> int:
+    """Grobe Schätzung für den Token-Bucket (~4 Zeichen pro Token + erwartete Antwort)"""
+    prompt_tokens = sum(len(str(message.get('content', ''))) for message in messages) // 4
+    return prompt_tokens + (max_tokens or config.OPENAI_CLIENT['expected_output_tokens'])
+
+
+def chat_completion(client: Optional['OpenAI'] = None, **kwargs) -> Any:
+    """
+    client.chat.completions.create() über den gemeinsamen Client (oder client), mit
+    Rate-Limit und Retries (Argumente wie bei der OpenAI-API)
+    """
+    client = client or get_client()
+    limiter = get_limiter()
+    max_retries = config.OPENAI_CLIENT['max_retries']
+    estimated_tokens = _estimate_request_tokens(kwargs.get('messages', []), kwargs.get('max_tokens'))
+
+    attempt = 0
+    while True:
+        limiter.acquire(estimated_tokens)
+        try:
+            return client.chat.completions.create(**kwargs)
+        except Exception as e:
+            delay = _retry_delay(e, attempt) if OPENAI_AVAILABLE else None
+            if delay is None or attempt >= max_retries:
+                raise
+            attempt += 1
+            print(f"  🔁 OpenAI-Fehler ({e.__class__.__name__}), Versuch {attempt + 1}/{max_retries + 1} "
+                  f"in {delay:.1f}s")
+        finally:
+            limiter.release()
+        time.sleep(delay)
+
+
+def chat_completion_stream(client: Optional['OpenAI'] = None, **kwargs) -> Iterator[str]:
+    """
+    Wie chat_completion(), liefert aber die Textteile der Antwort, sobald sie eintreffen
+
+    Retries nur, solange noch nichts geliefert wurde - danach wird der Fehler weitergegeben.
+    """
+    client = client or get_client()
+    limiter = get_limiter()
+    max_retries = config.OPENAI_CLIENT['max_retries']
+    estimated_tokens = _estimate_request_tokens(kwargs.get('messages', []), kwargs.get('max_tokens'))
+
+    attempt = 0
+    while True:
+        limiter.acquire(estimated_tokens)
+        started = False
+        try:
+            for chunk in client.chat.completions.create(stream=True, **kwargs):
+                if chunk.choices and chunk.choices[0].delta.content:
+                    started = True
+                    yield chunk.choices[0].delta.content
+            return
+        except Exception as e:
+            delay = _retry_delay(e, attempt) if OPENAI_AVAILABLE and not started else None
+            if delay is None or attempt >= max_retries:
+                raise
+            attempt += 1
+            print(f"  🔁 OpenAI-Fehler ({e.__class__.__name__}), Versuch {attempt + 1}/{max_retries + 1} "
+                  f"in {delay:.1f}s")
+        finally:
+            # Auch wenn der Aufrufer das Streaming abbricht
+            limiter.release()
+        time.sleep(delay)
@@ -0,0 +1,317 @@
+"""
+═══════════════════════════════════════════════════════════════
+PAGE CACHE - Persistenter Cache für geparste PDF-Seiten
+═══════════════════════════════════════════════════════════════
+
+Schlüssel: SHA-256 des Dateiinhalts + Seitenindex + Extraktor-Version.
+Gespeichert werden die Ergebnisse von page.extract_text() und
+page.extract_tables(), damit eine erneute Analyse desselben Dokuments
+ohne pdfplumber-Layoutanalyse auskommt.
+
+Verwendung (analog zu pdfplumber.open):
+
+    with open_pdf(pdf_path) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text()
+            tables = page.extract_tables()
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import pdfplumber
+import config
+from .memory_budget import active_tracker
+
+try:
+    import pypdfium2
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+    pypdfium2 = None
+
+try:
+    from PyPDF2 import PdfReader
+    PYPDF2_AVAILABLE = True
+except ImportError:
+    PYPDF2_AVAILABLE = False
+    PdfReader = None
+
+# Erhöhen, sobald sich die gecachten Extraktionsergebnisse ändern -
+# alte Einträge werden dann automatisch ignoriert
+EXTRACTOR_VERSION = 2
+
+# Cache-Verzeichnisse, deren Schreiben fehlgeschlagen ist (einmal warnen, dann überspringen)
+_unwritable_dirs = set()
+
+
+def file_hash(pdf_path: str) -> str:
+    """
+    SHA-256 über den Dateiinhalt (unabhängig von Dateiname und Pfad)
+    """
+    sha = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _version_stamp() -> str:
+    return f"v{EXTRACTOR_VERSION}-pdfplumber{pdfplumber.__version__}"
+
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    """
+    Atomar schreiben (tmp-Datei + rename), damit parallele Läufe
+    nie eine halb geschriebene Datei lesen
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class CachedPage:
+    """
+    Stellvertreter für eine pdfplumber-Seite
+
+    Die echte Seite wird erst geöffnet, wenn ein Ergebnis nicht im Cache liegt.
+    """
+
+    def __init__(self, document: 'CachedDocument', index: int):
+        self.document = document
+        self.index = index
+        self.page_number = index + 1
+        self._entries = None
+        self._plumber_page = None
+        self._pdfium_page = None
+
+    @property
+    def plumber(self):
+        """Die zugrunde liegende pdfplumber-Seite (öffnet das PDF bei Bedarf)"""
+        if self._plumber_page is None:
+            self._plumber_page = self.document.plumber.pages[self.index]
+        return self._plumber_page
+
+    @property
+    def pdfium(self):
+        """Die pypdfium2-Seite für schnellen Zugriff auf die rohe Textebene"""
+        if self._pdfium_page is None:
+            self._pdfium_page = self.document.pdfium[self.index]
+        return self._pdfium_page
+
+    def cached(self, kind: str, compute: Callable[['CachedPage'], Any]) -> Any:
+        """
+        Liefert das gecachte Ergebnis `kind` oder berechnet es mit compute(page)
+        und speichert es (Ergebnis muss JSON-serialisierbar sein)
+        """
+        if self._entries is None:
+            self._entries = self.document.load_page(self.index)
+        if kind in self._entries:
+            return self._entries[kind]
+
+        value = compute(self)
+        self._entries[kind] = value
+        self.document.store_page(self.index, self._entries)
+        return value
+
+    def extract_text(self) -> Optional[str]:
+        return self.cached('text', lambda p: p.plumber.extract_text())
+
+    def extract_tables(self) -> list:
+        return self.cached('tables', lambda p: p.plumber.extract_tables())
+
+    def extract_raw_text(self) -> str:
+        """
+        Rohe Textebene ohne Layoutanalyse (pypdfium2) - nur für schnelle Vorprüfungen
+        """
+        return self.cached('raw_text', _pdfium_text)
+
+    def extract_pypdf2_text(self) -> str:
+        """Textebene über PyPDF2 (Alternative, falls pypdfium2 fehlt)"""
+        return self.cached('pypdf2_text', lambda p: p.document.pypdf2.pages[p.index].extract_text() or '')
+
+    def close(self) -> None:
+        """
+        Gibt die Layout-Objekte der Seite frei und prüft das Speicherbudget
+        (siehe CachedDocument.release)
+        """
+        if self._release_objects():
+            self.document.release()
+
+    def _release_objects(self) -> bool:
+        """Schließt die geöffneten Seitenobjekte; True wenn welche offen waren"""
+        was_open = self._plumber_page is not None or self._pdfium_page is not None
+        if self._plumber_page is not None:
+            self._plumber_page.close()
+            self._plumber_page = None
+        if self._pdfium_page is not None:
+            self._pdfium_page.close()
+            self._pdfium_page = None
+        return was_open
+
+
+def _pdfium_text(page: CachedPage) -> str:
+    textpage = page.pdfium.get_textpage()
+    try:
+        return textpage.get_text_bounded().replace('\r\n', '\n')
+    finally:
+        textpage.close()
+
+
+class CachedDocument:
+    """
+    Dokument mit Seiten-Cache - pdfplumber wird nur bei Cache-Miss geöffnet
+    """
+
+    def __init__(self, pdf_path: str, use_cache: bool = None):
+        self.pdf_path = str(pdf_path)
+        self.use_cache = config.PAGE_CACHE['enabled'] if use_cache is None else use_cache
+        self.memory = active_tracker()
+        # {Seitenindex: OCR-Text} für Seiten ohne Textebene (siehe ocr.apply_ocr)
+        self.ocr_texts: Dict[int, str] = {}
+        self._pdf = None
+        self._pdfium = None
+        self._pypdf2 = None
+
+        meta = None
+        if self.use_cache:
+            self.file_hash = file_hash(self.pdf_path)
+            self.cache_dir = Path(config.PAGE_CACHE['dir']) / f"{self.file_hash}-{_version_stamp()}"
+            meta = _read_json(self.cache_dir / 'meta.json')
+
+        if meta is None:
+            meta = {
+                'page_count': len(self.plumber.pages),
+                'source': Path(self.pdf_path).name
+            }
+            if self.use_cache:
+                self._write(self.cache_dir / 'meta.json', meta)
+
+        self.pages = [CachedPage(self, i) for i in range(meta['page_count'])]
+
+    @property
+    def plumber(self):
+        """Das pdfplumber-Dokument (wird erst bei Bedarf geöffnet)"""
+        if self._pdf is None:
+            self._pdf = pdfplumber.open(self.pdf_path)
+        return self._pdf
+
+    @property
+    def pdfium(self):
+        """Das pypdfium2-Dokument (wird erst bei Bedarf geöffnet)"""
+        if self._pdfium is None:
+            if not PDFIUM_AVAILABLE:
+                raise ImportError("pypdfium2 nicht installiert (wird mit pdfplumber mitgeliefert)")
+            self._pdfium = pypdfium2.PdfDocument(self.pdf_path)
+        return self._pdfium
+
+    @property
+    def pypdf2(self):
+        """Der PyPDF2-Reader (wird erst bei Bedarf geöffnet)"""
+        if self._pypdf2 is None:
+            if not PYPDF2_AVAILABLE:
+                raise ImportError("PyPDF2 nicht installiert. Bitte installieren mit: pip install PyPDF2")
+            self._pypdf2 = PdfReader(self.pdf_path)
+        return self._pypdf2
+
+    def _page_path(self, index: int) -> Path:
+        return self.cache_dir / f"page_{index + 1:04d}.json"
+
+    def load_page(self, index: int) -> Dict[str, Any]:
+        if not self.use_cache:
+            return {}
+        return _read_json(self._page_path(index)) or {}
+
+    def store_page(self, index: int, entries: Dict[str, Any]) -> None:
+        if self.use_cache:
+            self._write(self._page_path(index), entries)
+
+    def _write(self, path: Path, data: Dict[str, Any]) -> None:
+        """
+        Cache-Eintrag schreiben - der Cache ist nur eine Beschleunigung: ist das
+        Verzeichnis nicht beschreibbar (voll, schreibgeschützt), wird einmal gewarnt
+        und ohne Schreiben weitergearbeitet
+        """
+        cache_root = config.PAGE_CACHE['dir']
+        if cache_root in _unwritable_dirs:
+            return
+        try:
+            _write_json(path, data)
+        except OSError as e:
+            _unwritable_dirs.add(cache_root)
+            print(f"  ⚠️  Seiten-Cache nicht beschreibbar ({e}) - es wird ohne Schreiben weitergearbeitet")
+
+    def release(self) -> None:
+        """
+        Nach jeder Seite: liegt der Prozess über dem Speicherbudget, werden die
+        Dokumente geschlossen und bei der nächsten Seite neu geöffnet - damit sind
+        auch alle von pdfminer zwischengespeicherten Objekte freigegeben
+        """
+        if self.memory is not None and self.memory.check():
+            if any(page._plumber_page is not None or page._pdfium_page is not None for page in self.pages):
+                return  # noch Seiten in Benutzung
+            self._close_documents()
+            self.memory.reopened += 1
+
+    def close(self) -> None:
+        for page in self.pages:
+            page._release_objects()
+        self._close_documents()
+        if self.memory is not None:
+            self.memory.check()
+
+    def _close_documents(self) -> None:
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+        if self._pdfium is not None:
+            self._pdfium.close()
+            self._pdfium = None
+        self._pypdf2 = None
+
+
+@contextmanager
+def open_pdf(pdf_path: str, use_cache: bool = None) -> Iterator[CachedDocument]:
+    """
+    Öffnet ein PDF mit Seiten-Cache (Ersatz für `with pdfplumber.open(...)`)
+
+    Args:
+        pdf_path: Pfad zur PDF-Datei
+        use_cache: None = Einstellung aus config.PAGE_CACHE
+    """
+    document = CachedDocument(pdf_path, use_cache)
+    try:
+        yield document
+    finally:
+        document.close()
+
+
+def clear_cache() -> None:
+    """
+    Löscht den kompletten Seiten-Cache
+    """
+    cache_dir = Path(config.PAGE_CACHE['dir'])
+    if cache_dir.exists():
+        shutil.rmtree(cache_dir)
+    _unwritable_dirs.discard(config.PAGE_CACHE['dir'])
@@ -4,427 +4,1163 @@ PDF EXTRACTOR - WEG, Mietvertrag, Kontoauszug
 ═══════════════════════════════════════════════════════════════
 """
 
+import hashlib
+import os
 import pdfplumber
 import re
+import statistics
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Tuple
 import pandas as pd
+from pdfplumber.utils import cluster_objects
 import config
+from .bank_import import detect_bank_format, iter_structured_transactions
+from .memory_budget import active_tracker, track_memory
+from .ocr import apply_ocr, ocr_missing_pages
+from .page_cache import CachedPage, open_pdf, _read_json, _write_json
+from .text_backend import extract_page_text
 
+# Erhöhen, sobald sich der Aufbau gespeicherter WEG-Extraktionspläne ändert
+WEG_PLAN_VERSION = 1
 
-def extract_weg_data(pdf_path: str, year: int) -> Dict[str, Any]:
+# Summenzeile des Kostenteils (am Zeilenanfang, also nicht "Nicht umlagefähige Kosten:")
+_SUMMARY_LINE = re.compile(r'^\s*umlagef(?:ä|ae)hige kosten:', re.IGNORECASE | re.MULTILINE)
+
+# Betrag im deutschen Format mit zwei Nachkommastellen
+_AMOUNT_CELL = re.compile(r'-?\d{1,3}(?:\.\d{3})*,\d{2}')
+
+# Konfidenz eines Kostenpostens nach Herkunft des Betrags (siehe _score_weg_costs)
+_CONFIDENCE_BASE = {
+    'text_split': 0.95,       # WEG- und UG-Anteil aus den Aufteilungszeilen
+    'text_split_partial': 0.75,
+    'text_line': 0.85,        # Zeile mit Verteilerschlüssel und Betrag
+    'text_line_single': 0.6,  # Zeile mit nur einem Betrag - Spalte unbekannt
+    'table_split': 0.9,       # Mehrzeilige UG-Tabelle, Spalte aus Plan/Kopf
+    'table': 0.9,             # Betrag in der erwarteten Spalte
+    'table_fallback': 0.55,   # Betrag aus der Suche von rechts nach links
+}
+
+
+def extract_weg_data(pdf_path: str, year: int, workers: int = None) -> Dict[str, Any]:
     """
     Extrahiert umlagefähige Kosten aus WEG-Hausgeldabrechnung
     
     Returns nur die reinen Kosten - keine Kategorien oder Flags nötig!
     
+    Args:
+        pdf_path: Pfad zur PDF-Datei
+        year: Abrechnungsjahr
+        workers: Anzahl Prozesse für die Seitenanalyse
+                 (None = config.WEG_EXTRACTION['workers'], 0 = alle CPU-Kerne)
+    
     Returns:
         {
             'costs': [{'name': str, 'amount': float}, ...],
             'total': float,
-            'period': {'start': date, 'end': date}
+            'period': {'start': date, 'end': date},
+            'memory': {'peak_rss_mb': float, ...},  # Höchststand, siehe memory_budget
+            'reconciliation': {...},  # Abgleich mit der Summenzeile, siehe _reconcile_weg_costs
+            'confidence': {...}  # siehe _score_weg_costs
         }
+    
+    Jeder Kostenposten enthält zusätzlich 'confidence' (0-1) und 'page' (Seitenindex).
+    Ist reconciliation['status'] == 'ok', stimmen die Kosten auf den Cent mit der Zeile
+    "Umlagefähige Kosten:" überein - dann ist keine Prüfung oder AI-Nachextraktion nötig.
     """
     costs = []
+    details = {}
     
     # Use pdfplumber fruor reliable extraction
     try:
-        costs = _extract_weg_fallback(pdf_path, year)
+        with track_memory() as memory:
+            costs = _extract_weg_fallback(pdf_path, year, workers, details)
     except Exception as e:
         print(f"Extraction failed: {e}")
         raise
     
+    reconciliation = _reconcile_weg_costs(costs, details.get('summary_cents'))
+    
     return {
         'costs': costs,
         'total': sum(c['amount'] for c in costs),
         'period': {
             'start': datetime(year, 1, 1).date(),
             'end': datetime(year, 12, 31).date()
-        }
+        },
+        'memory': memory.report(),
+        'reconciliation': reconciliation,
+        'confidence': _score_weg_costs(costs, details, reconciliation)
     }
 
 
-def _extract_weg_fallback(pdf_path: str, year: int) -> List[Dict[str, Any]]:
+def _extract_weg_fallback(
+    pdf_path: str,
+    year: int,
+    workers: int = None,
+    details: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
     """
     Fallback extraction using pdfplumber
     
     Strategy: Extract ALL costs BEFORE "Umlagefähige Kosten:" or "Sonstige betriebliche" row
     Everything after those rows is summary/not relevant
+    
+    Die Seiten werden (optional parallel) analysiert, aber immer in
+    Seitenreihenfolge zusammengeführt - das Ergebnis ist identisch zum seriellen Lauf.
+    
+    Ist für die Vorlage der Abrechnung (Fingerprint aus der Vorprüfung) bereits ein
+    Extraktionsplan gespeichert, werden dessen Betragsspalte und Tabellenseiten
+    verwendet, sonst wird der Plan aus diesem Lauf gelernt.
+    
+    details: Wird mit Herkunft der Beträge ('sources'), Tabellenseiten der Vorprüfung
+             und dem Betrag der Summenzeile gefüllt (für _score_weg_costs)
     """
-    costs = []
+    if details is None:
+        details = {}
     costs_dict = {}  # To track duplicates and keep highest amount
-    found_summary = False  # Flag to stop when we hit "Umlagefähige Kosten:" or "Sonstige betriebliche"
+    sources = {}  # name_key -> Herkunft des Betrags
+    text_summary_cents = None   # Summenzeile aus dem Seitentext (Fallback)
+    table_summary = {}          # Summenzeile aus der Tabelle ('cents')
     found_text_summary = False  # Separate flag for text extraction
     
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            if found_summary:
-                break  # Stop processing once we've seen the summary
+    # Vorprüfung über die rohe Textebene: welche Seiten brauchen Tabellen-Extraktion?
+    prescan = _prescan_weg_pages(pdf_path) if config.WEG_EXTRACTION['prescan'] else None
+    
+    plan = None
+    if prescan and config.WEG_EXTRACTION['plans']:
+        plan = _load_weg_plan(prescan)
+        planned_pages = {prescan['last_page'] + offset for offset in plan['table_page_offsets']} if plan else set()
+        if plan and not set(prescan['table_pages']) <= planned_pages:
+            # Neue Kostenseiten, die der Plan nicht kennt: voller Lauf (Plan wird neu gelernt)
+            print(f"  ℹ️  Extraktionsplan {prescan['fingerprint']} kennt nicht alle Kostenseiten - voller Lauf")
+            plan = None
+        if plan:
+            prescan = {
+                **prescan,
+                'table_pages': [prescan['last_page'] + offset for offset in plan['table_page_offsets']],
+                'table_regions': {
+                    prescan['last_page'] + int(offset): region
+                    for offset, region in plan.get('table_regions', {}).items()
+                }
+            }
+    
+    share_rows = plan['share_rows'] if plan else config.WEG_EXTRACTION['share_rows']
+    column_hits = {}   # Betragsspalte (von rechts) -> {Seite: Treffer}, für den Plan
+    summary_page = None
+    
+    # Gescannte Seiten ohne Textebene: OCR-Text statt des leeren Seitentexts
+    with open_pdf(pdf_path) as pdf:
+        ocr_texts = ocr_missing_pages(pdf)
+    
+    for page_index, (text, tables) in enumerate(_iter_weg_pages(pdf_path, workers, prescan)):
+        if not text and page_index in ocr_texts:
+            text = ocr_texts[page_index]
+        
+        # FIRST: Extract text-based costs (like Niederschlagsentwässerung, Hausnebenkosten, etc.)
+        # These appear in green sections and are not in tables
+        # Vor der Summenseite der Vorprüfung (z.B. Anschreiben, das die Summe vorab
+        # nennt) beendet eine Summenzeile den Kostenteil noch nicht
+        before_summary = prescan is not None and page_index < prescan['last_page']
+        
+        if text and not found_text_summary:
+            found_text_summary = _parse_weg_text(text, costs_dict, share_rows, sources) and not before_summary
+        if text and not before_summary:
+            text_summary_cents = _weg_summary_cents(text) or text_summary_cents
+        
+        # SECOND: Extract tables
+        # Stop processing once we've seen "Umlagefähige Kosten:" or "Sonstige betriebliche"
+        page_hits = {}
+        reached_summary = _parse_weg_tables(
+            tables, costs_dict, plan, page_hits, sources, None if before_summary else table_summary
+        )
+        for column, count in page_hits.items():
+            column_hits.setdefault(column, {})[page_index] = count
+        
+        # Neu gesetzte Beträge dieser Seite zuordnen
+        for source in sources.values():
+            source.setdefault('page', page_index)
+        
+        if reached_summary and not before_summary:
+            summary_page = page_index
+            break
+    
+    # Plan nur aus vollständigen Läufen lernen (Summenzeile erreicht)
+    if prescan and plan is None and summary_page is not None and column_hits and config.WEG_EXTRACTION['plans']:
+        _store_weg_plan(pdf_path, prescan, column_hits, summary_page, share_rows)
+    
+    details.update({
+        # Herkunft je Posten, in der Reihenfolge der zurückgegebenen Kosten
+        'sources': [sources.get(name_key, {}) for name_key in costs_dict],
+        # Summenzeile bevorzugt aus der Tabelle (gleiche Betragsspalte wie die Kosten)
+        'summary_cents': table_summary.get('cents', text_summary_cents),
+        'table_pages': prescan['table_pages'] if prescan else None
+    })
+    
+    # Convert dict back to list
+    costs = list(costs_dict.values())
+    for cost, source in zip(costs, details['sources']):
+        cost['page'] = source.get('page')
+    return costs
+
+
+def _weg_summary_cents(text: str) -> Optional[int]:
+    """
+    Betrag der Summenzeile "Umlagefähige Kosten:" (nicht "Nicht umlagefähige Kosten:") in Cent
+    
+    Fallback für Seiten ohne erkannte Tabelle: der letzte Betrag der Zeile - bei
+    Zeilen mit Gesamtbetrag, Anteil und Betrag steht der eigene Betrag rechts.
+    """
+    match = re.search(r'^\s*umlagef(?:ä|ae)hige kosten:?(.*)$', text, re.IGNORECASE | re.MULTILINE)
+    if not match:
+        return None
+    amounts = _AMOUNT_CELL.findall(match.group(1))
+    return _parse_cents(amounts[-1]) if amounts else None
+
+
+def _parse_cents(value: str) -> Optional[int]:
+    """Deutscher Betrag ("1.234,56") in Cent, None wenn keiner enthalten ist"""
+    match = _AMOUNT_CELL.search(value)
+    if not match:
+        return None
+    return int(match.group(0).replace('.', '').replace(',', ''))
+
+
+def _to_cents(amount: float) -> int:
+    """Betrag in ganze Cent (kaufmännisch gerundet, ohne Float-Rundungsfehler)"""
+    return int(Decimal(str(amount)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP) * 100)
+
+
+def _reconcile_weg_costs(costs: List[Dict[str, Any]], expected_cents: Optional[int]) -> Dict[str, Any]:
+    """
+    Summe der Kosten centgenau mit der Summenzeile "Umlagefähige Kosten:" abgleichen
+    
+    Returns:
+        {
+            'status': 'ok' | 'mismatch' | 'missing',  # missing = keine Summenzeile gefunden
+            'expected_cents': int|None,
+            'actual_cents': int,
+            'difference_cents': int|None   # Kosten - Summenzeile
+        }
+    """
+    actual_cents = sum(_to_cents(c['amount']) for c in costs)
+    
+    if expected_cents is None:
+        print("  ⚠️  Abgleich: keine Summenzeile \"Umlagefähige Kosten:\" gefunden")
+        return {'status': 'missing', 'expected_cents': None, 'actual_cents': actual_cents, 'difference_cents': None}
+    
+    difference = actual_cents - expected_cents
+    if difference == 0:
+        print(f"  ✓ Abgleich: Summe {actual_cents / 100:.2f} € stimmt mit \"Umlagefähige Kosten:\" überein")
+    else:
+        print(f"  ⚠️  Abgleich: Summe {actual_cents / 100:.2f} € weicht um {difference / 100:+.2f} € "
+              f"von \"Umlagefähige Kosten: {expected_cents / 100:.2f}\" ab")
+    return {
+        'status': 'ok' if difference == 0 else 'mismatch',
+        'expected_cents': expected_cents,
+        'actual_cents': actual_cents,
+        'difference_cents': difference
+    }
+
+
+def _score_weg_costs(
+    costs: List[Dict[str, Any]],
+    details: Dict[str, Any],
+    reconciliation: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Konfidenz (0-1) je Kostenposten, wird in cost['confidence'] eingetragen
+    
+    Ausgangswert nach Herkunft des Betrags (_CONFIDENCE_BASE), dann Abschläge für
+    Posten außerhalb der Kostenseiten der Vorprüfung und für Ausreißer (mehr als
+    outlier_factor x Median). Stimmt die Summe mit der Zeile "Umlagefähige Kosten:"
+    überein (reconciliation, siehe _reconcile_weg_costs), gelten alle Posten als
+    bestätigt; weicht sie ab, sinkt die Konfidenz aller Posten.
+    
+    Returns:
+        {
+            'document': float,  # niedrigste Konfidenz
+            'low': [str, ...],  # Posten unter config.WEG_EXTRACTION['confidence']['threshold']
+            'reasons': {name: [str, ...]}
+        }
+    """
+    settings = config.WEG_EXTRACTION['confidence']
+    sources = details.get('sources') or [{}] * len(costs)
+    table_pages = details.get('table_pages')
+    status = reconciliation['status']
+    
+    amounts = [c['amount'] for c in costs]
+    median = statistics.median(amounts) if amounts else 0
+    
+    reasons = {}
+    for cost, source in zip(costs, sources):
+        kind = source.get('kind')
+        cost_reasons = []
+        
+        if kind == 'text_split' and source.get('shares', 0) < 2:
+            kind = 'text_split_partial'
+            cost_reasons.append('nur ein Anteil gefunden')
+        elif kind == 'text_line' and source.get('numbers', 0) < 2:
+            kind = 'text_line_single'
+            cost_reasons.append('nur ein Betrag in der Zeile')
+        elif kind == 'table' and not source.get('primary'):
+            kind = 'table_fallback'
+            cost_reasons.append('Betrag nicht in der erwarteten Spalte')
+        confidence = _CONFIDENCE_BASE.get(kind, 0.5)
+        
+        if table_pages is not None and source.get('page') not in table_pages:
+            confidence *= 0.5
+            cost_reasons.append('außerhalb der Kostenseiten')
+        if len(amounts) >= 3 and median > 0 and cost['amount'] > settings['outlier_factor'] * median:
+            confidence *= 0.5
+            cost_reasons.append('Ausreißer')
+        
+        if status == 'ok':
+            confidence = max(confidence, 0.95)
+        elif status == 'mismatch':
+            confidence *= 0.8
+        
+        cost['confidence'] = round(confidence, 2)
+        if cost_reasons:
+            reasons[cost['name']] = cost_reasons
+    
+    return {
+        'document': min((c['confidence'] for c in costs), default=0.0),
+        'low': [c['name'] for c in costs if c['confidence'] < settings['threshold']],
+        'reasons': reasons
+    }
+
+
+def _prescan_weg_pages(pdf_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Schnelle Vorprüfung über die rohe Textebene (ohne Layoutanalyse)
+    
+    Findet die Seite mit der Summenzeile "Umlagefähige Kosten:" und die Seiten,
+    auf denen Kostentabellen stehen können. Anschreiben, Wirtschaftsplan und
+    Rücklagen-Seiten (erkannt an ihrer Überschrift) brauchen keine Tabellen-Extraktion.
+    Nebenbei wird der Fingerprint der Vorlage bestimmt (siehe _weg_fingerprint).
+    
+    Als Summenzeile zählt nur eine Zeile, die mit "Umlagefähige Kosten:" beginnt
+    (nicht "Nicht umlagefähige Kosten:"), auf einer Kostenseite (Beträge, keine
+    Anschreiben-/Übersprung-Überschrift). Bei mehreren gilt die letzte - ein Anschreiben
+    oder eine Übersicht, die die Summe vorab nennt, kürzt das Dokument so nicht.
+    
+    Returns:
+        {'last_page': int, 'table_pages': [int, ...], 'fingerprint': str} oder None,
+        wenn keine Summenzeile gefunden wurde (dann werden wie bisher alle Seiten analysiert)
+    """
+    heading_lines = config.WEG_EXTRACTION['prescan_heading_lines']
+    skip_headings = config.WEG_EXTRACTION['prescan_skip_headings']
+    amount_pattern = re.compile(r'\d{1,3}(?:\.\d{3})*,\d{2}')
+    
+    table_pages = []
+    raw_pages = []
+    last_page = None
+    try:
+        with open_pdf(pdf_path) as pdf:
+            for page in pdf.pages:
+                raw_text = page.extract_raw_text() or ''
+                page.close()
+                raw_lower = raw_text.lower()
+                raw_pages.append(raw_lower)
+                
+                heading = '\n'.join(raw_lower.split('\n')[:heading_lines])
+                is_irrelevant = any(marker in heading for marker in skip_headings)
+                
+                if amount_pattern.search(raw_text) and not is_irrelevant:
+                    table_pages.append(page.index)
+                    # "Umlagefähige Kosten:" am Zeilenanfang beendet den Kostenteil
+                    if _SUMMARY_LINE.search(raw_lower):
+                        last_page = page.index
+    except Exception as e:
+        print(f"Prescan failed, analysing all pages: {e}")
+        return None
+    
+    if last_page is None:
+        return None
+    return {
+        'last_page': last_page,
+        'table_pages': [index for index in table_pages if index <= last_page],
+        'fingerprint': _weg_fingerprint(raw_pages[:last_page + 1])
+    }
+
+
+def _weg_fingerprint(raw_pages: List[str]) -> str:
+    """
+    Fingerprint der Abrechnungs-Vorlage aus der rohen Textebene (kleingeschrieben)
+    
+    Bestandteile: Hausverwaltung (erste Firmenzeile), Spaltenköpfe der Kostentabelle
+    ("Kostenart ...") und welche Marker-Phrasen vorkommen. Zahlen werden entfernt,
+    damit Abrechnungen verschiedener Jahre derselben Vorlage gleich aussehen.
+    """
+    lines = [line.strip() for text in raw_pages for line in text.split('\n') if line.strip()]
+    
+    manager = next(
+        (line.split(',')[0] for line in lines if re.search(r'gmbh|verwaltung|immobilien|\bag\b', line)),
+        ''
+    )
+    headers = next((line for line in lines if line.startswith('kostenart')), '')
+    full_text = '\n'.join(raw_pages)
+    markers = [marker for marker in config.WEG_EXTRACTION['fingerprint_markers'] if marker in full_text]
+    
+    template = '|'.join([
+        re.sub(r'\d+', '', manager).strip(),
+        ' '.join(headers.split()),
+        ','.join(markers)
+    ])
+    return hashlib.sha1(template.encode('utf-8')).hexdigest()[:16]
+
+
+def _plan_path(fingerprint: str) -> Path:
+    return Path(config.WEG_EXTRACTION['plan_dir']) / f"{fingerprint}.json"
+
+
+def _load_weg_plan(prescan: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Gespeicherten Extraktionsplan zur Vorlage laden
+    
+    Die Tabellenseiten sind relativ zur Seite mit der Summenzeile gespeichert, damit
+    der Plan auch bei mehr oder weniger Anschreiben-/Wirtschaftsplan-Seiten passt.
+    Liegt eine Plan-Seite vor Seite 1, hat sich der Aufbau geändert - dann wird neu gelernt.
+    """
+    plan = _read_json(_plan_path(prescan['fingerprint']))
+    if not plan or plan.get('plan_version') != WEG_PLAN_VERSION:
+        return None
+    if any(prescan['last_page'] + offset < 0 for offset in plan['table_page_offsets']):
+        print(f"  ℹ️  Extraktionsplan {prescan['fingerprint']} passt nicht (Seitenaufbau geändert)")
+        return None
+    return plan
+
+
+def _store_weg_plan(
+    pdf_path: str,
+    prescan: Dict[str, Any],
+    column_hits: Dict[int, Dict[int, int]],
+    summary_page: int,
+    share_rows: Dict[str, str]
+) -> None:
+    """
+    Extraktionsplan aus einem heuristischen Lauf speichern
+    
+    - amount_column: Spalte (von rechts), aus der die meisten Beträge stammen
+    - amount_fallback: nur True, wenn Beträge auch aus anderen Spalten kamen -
+      dann bleibt die Suche von rechts nach links (mit MEA-Filter) aktiv
+    - table_page_offsets: Kostenseiten der Vorprüfung plus alle Seiten von der ersten
+      Kostenseite bis zur Summenzeile (auch Folgeseiten einer Tabelle ohne eigene
+      Treffer), relativ zur Seite mit "Umlagefähige Kosten:"
+    - table_regions: Bereich der Kostentabellen je Tabellenseite (gleiche Offsets)
+    """
+    amount_column = max(column_hits, key=lambda column: sum(column_hits[column].values()))
+    table_pages = {page for pages in column_hits.values() for page in pages}
+    table_pages.update(prescan['table_pages'])
+    table_pages.update([summary_page, prescan['last_page']])
+    table_pages.update(range(min(table_pages), max(summary_page, prescan['last_page']) + 1))
+    
+    plan = {
+        'plan_version': WEG_PLAN_VERSION,
+        'fingerprint': prescan['fingerprint'],
+        'amount_column': amount_column,
+        'amount_fallback': len(column_hits) > 1,
+        'table_page_offsets': sorted(page - prescan['last_page'] for page in table_pages),
+        'table_regions': {
+            str(page - prescan['last_page']): region
+            for page, region in _learn_table_regions(pdf_path, sorted(table_pages)).items()
+        },
+        'share_rows': dict(share_rows),
+        'learned_from': Path(pdf_path).name,
+        'learned_at': datetime.now().isoformat(timespec='seconds')
+    }
+    try:
+        _write_json(_plan_path(prescan['fingerprint']), plan)
+        print(f"  💾 Extraktionsplan für Vorlage {prescan['fingerprint']} gespeichert")
+    except OSError as e:
+        print(f"  ⚠️  Extraktionsplan konnte nicht gespeichert werden: {e}")
+
+
+def _learn_table_regions(pdf_path: str, page_indices: List[int]) -> Dict[int, List[float]]:
+    """
+    Bereich (x0, top, x1, bottom) aller Tabellen je Seite plus Rand
+    
+    Beim Lernen liegen die Tabellengrenzen meist schon im Seiten-Cache
+    ('layout'), es wird also in der Regel nichts neu analysiert.
+    """
+    margin = config.WEG_EXTRACTION['table_region_margin']
+    engine = config.WEG_EXTRACTION['engine']
+    regions = {}
+    try:
+        with open_pdf(pdf_path) as pdf:
+            for index in page_indices:
+                page = pdf.pages[index]
+                if engine == 'words':
+                    bboxes = page.cached('layout', _layout_page)['table_bboxes']
+                else:
+                    bboxes = page.cached('table_bboxes', lambda p: [list(t.bbox) for t in p.plumber.find_tables()])
+                page.close()
+                if bboxes:
+                    regions[index] = [
+                        min(b[0] for b in bboxes) - margin,
+                        min(b[1] for b in bboxes) - margin,
+                        max(b[2] for b in bboxes) + margin,
+                        max(b[3] for b in bboxes) + margin
+                    ]
+    except Exception as e:
+        print(f"  ⚠️  Tabellenbereiche konnten nicht gelernt werden: {e}")
+    return regions
+
+
+def _iter_weg_pages(
+    pdf_path: str,
+    workers: int = None,
+    prescan: Optional[Dict[str, Any]] = None
+) -> Iterator[Tuple[Optional[str], list]]:
+    """
+    Liefert (text, tables) pro Seite in Seitenreihenfolge
+    
+    workers: Anzahl Prozesse (None = config.WEG_EXTRACTION['workers'], 0 = alle CPU-Kerne).
+    Bei workers > 1 werden die Seiten blockweise in einem Prozess-Pool analysiert;
+    bricht der Aufrufer ab (Summenzeile gefunden), werden offene Blöcke verworfen.
+    
+    prescan: Ergebnis von _prescan_weg_pages() - Seiten nach der Summenzeile werden
+    nicht geöffnet, Tabellen nur auf den Kandidaten-Seiten extrahiert (sonst tables = []).
+    Enthält es 'table_regions' (aus dem Extraktionsplan), wird die Tabellensuche auf
+    diese Bereiche beschränkt.
+    """
+    if workers is None:
+        workers = config.WEG_EXTRACTION['workers']
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    
+    table_pages = set(prescan['table_pages']) if prescan else None
+    regions = prescan.get('table_regions', {}) if prescan else {}
+    engine = config.WEG_EXTRACTION['engine']
+    
+    if workers <= 1:
+        with open_pdf(pdf_path) as pdf:
+            pages = pdf.pages[:prescan['last_page'] + 1] if prescan else pdf.pages
+            for page in pages:
+                with_tables = table_pages is None or page.index in table_pages
+                yield _read_weg_page(page, with_tables, engine, _table_region(regions, page.index))
+                page.close()
+        return
+    
+    if prescan:
+        page_count = prescan['last_page'] + 1
+    else:
+        with open_pdf(pdf_path) as pdf:
+            page_count = len(pdf.pages)
+    
+    # Kleine Blöcke, damit nach der Summenzeile möglichst wenig umsonst gerechnet wird
+    chunk_size = max(1, min(config.WEG_EXTRACTION['chunk_pages'], -(-page_count // workers)))
+    chunks = [
+        list(range(start, min(start + chunk_size, page_count)))
+        for start in range(0, page_count, chunk_size)
+    ]
+    
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(chunks) or 1))
+    try:
+        # executor.map liefert die Ergebnisse in Eingabereihenfolge
+        chunk_results = executor.map(
+            _analyze_weg_pages,
+            [pdf_path] * len(chunks),
+            chunks,
+            [table_pages] * len(chunks),
+            [engine] * len(chunks),
+            [regions] * len(chunks)
+        )
+        for chunk_result in chunk_results:
+            for text, tables in chunk_result:
+                yield text, tables
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        if active_tracker() is not None:
+            active_tracker().note_children()
+
+
+def _analyze_weg_pages(
+    pdf_path: str,
+    page_indices: List[int],
+    table_pages: Optional[set] = None,
+    engine: str = 'words',
+    regions: Optional[Dict[int, List[float]]] = None
+) -> List[Tuple[Optional[str], list]]:
+    """
+    Worker: Text + Tabellen für einen Block von Seiten (läuft im Prozess-Pool)
+    
+    Jeder Worker hält sich selbst an config.MEMORY['budget_mb'].
+    """
+    results = []
+    with track_memory(), open_pdf(pdf_path) as pdf:
+        for index in page_indices:
+            page = pdf.pages[index]
+            with_tables = table_pages is None or index in table_pages
+            results.append(_read_weg_page(page, with_tables, engine, _table_region(regions or {}, index)))
+            page.close()
+    return results
+
+
+def _table_region(regions: Dict[int, List[float]], index: int) -> Optional[List[float]]:
+    """Gelernter Tabellenbereich der Seite, sonst der konfigurierte (oder None = ganze Seite)"""
+    return regions.get(index) or config.WEG_EXTRACTION['table_region']
+
+
+def _read_weg_page(
+    page: CachedPage,
+    with_tables: bool,
+    engine: str,
+    region: Optional[List[float]] = None
+) -> Tuple[Optional[str], list]:
+    """
+    Text (+ Tabellen) einer Seite mit der gewählten Engine
+    
+    'words':      ein einziger Layout-Durchlauf (extract_words), Zeilen und
+                  Tabellenzellen werden daraus aufgebaut
+    'pdfplumber': page.extract_text() + page.extract_tables() (zwei Durchläufe)
+    
+    region: Tabellensuche nur in diesem Bereich (x0, top, x1, bottom)
+    """
+    if not with_tables:
+        return page.extract_text(), []
+    
+    if engine == 'words':
+        if region:
+            layout = page.cached(_region_kind('layout_region', region), lambda p: _layout_page(p, region))
+        else:
+            layout = page.cached('layout', _layout_page)
+        return layout['text'], layout['tables']
+    
+    if region:
+        tables = page.cached(_region_kind('tables_region', region), lambda p: [t.extract() for t in _find_tables(p.plumber, region)])
+        return page.extract_text(), tables
+    
+    return page.extract_text(), page.extract_tables()
+
+
+def _region_kind(kind: str, region: List[float]) -> str:
+    """Cache-Eintrag je Bereich - ein geänderter Plan-/Config-Bereich wird neu analysiert"""
+    x0, top, x1, bottom = region
+    return f"{kind}:{x0:.0f},{top:.0f},{x1:.0f},{bottom:.0f}"
+
+
+def _find_tables(plumber_page, region: Optional[List[float]] = None) -> list:
+    """
+    Tabellensuche, bei gegebenem Bereich nur im Ausschnitt page.crop(region)
+    
+    Findet der Ausschnitt keine Tabelle, wird die ganze Seite durchsucht.
+    Die Koordinaten der gefundenen Tabellen bleiben seitenbezogen.
+    """
+    if region:
+        x0, top, x1, bottom = plumber_page.bbox
+        bbox = (
+            max(region[0], x0), max(region[1], top),
+            min(region[2], x1), min(region[3], bottom)
+        )
+        if bbox[0] < bbox[2] and bbox[1] < bbox[3]:
+            tables = plumber_page.crop(bbox).find_tables()
+            if tables:
+                return tables
+    return plumber_page.find_tables()
+
+
+def _layout_page(page: CachedPage, region: Optional[List[float]] = None) -> Dict[str, Any]:
+    """
+    Single-Pass-Layout: Zeichen -> Wörter einmal pro Seite, daraus
+    - die Zeilenansicht (wie page.extract_text())
+    - die Tabellenansicht (Zellgrenzen aus page.find_tables(), Zelltext aus den Wörtern)
+    
+    Returns:
+        {'text': str, 'tables': [[[cell, ...], ...], ...], 'table_bboxes': [...]} -
+        gleiche Struktur wie extract_text() / extract_tables(), damit die UG2/WEG-Logik
+        unverändert bleibt; table_bboxes dient zum Lernen der Tabellenbereiche
+    """
+    plumber_page = page.plumber
+    words = plumber_page.extract_words()
+    
+    tables = []
+    found_tables = _find_tables(plumber_page, region)
+    for table in found_tables:
+        rows = []
+        for row in table.rows:
+            rows.append([
+                None if cell is None else '\n'.join(_words_to_lines(_words_in_bbox(words, cell)))
+                for cell in row.cells
+            ])
+        tables.append(rows)
+    
+    return {
+        'text': '\n'.join(_words_to_lines(words)),
+        'tables': tables,
+        'table_bboxes': [list(table.bbox) for table in found_tables]
+    }
+
+
+def _words_to_lines(words: List[Dict[str, Any]]) -> List[str]:
+    """
+    Wörter nach vertikaler Position zu Zeilen gruppieren (y-Toleranz wie pdfplumber)
+    """
+    lines = []
+    for cluster in cluster_objects(words, itemgetter('top'), 3):
+        cluster.sort(key=itemgetter('x0'))
+        lines.append(' '.join(word['text'] for word in cluster))
+    return lines
+
+
+def _words_in_bbox(words: List[Dict[str, Any]], bbox: Tuple[float, float, float, float]) -> List[Dict[str, Any]]:
+    """
+    Wörter, deren Mittelpunkt in der Zelle liegt (gleiches Kriterium wie pdfplumber für Zeichen)
+    """
+    x0, top, x1, bottom = bbox
+    return [
+        word for word in words
+        if x0 <= (word['x0'] + word['x1']) / 2 < x1 and top <= (word['top'] + word['bottom']) / 2 < bottom
+    ]
+
+
+def _parse_weg_text(
+    text: str,
+    costs_dict: Dict[str, Dict[str, Any]],
+    share_rows: Optional[Dict[str, str]] = None,
+    sources: Optional[Dict[str, Dict[str, Any]]] = None
+) -> bool:
+    """
+    Text-basierte Kosten einer Seite in costs_dict übernehmen
+    
+    share_rows: Zeilen für WEG- und UG-Anteil (None = config.WEG_EXTRACTION['share_rows'])
+    sources: Wird je Kostenposten mit der Herkunft des Betrags gefüllt (für die Konfidenz)
+    
+    Returns:
+        True sobald "Umlagefähige Kosten:" / "Nicht umlagefähige Kosten:" erreicht ist
+    """
+    share_rows = share_rows or config.WEG_EXTRACTION['share_rows']
+    if sources is None:
+        sources = {}
+    weg_label = share_rows['weg'].lower()
+    ug_unit, _, ug_address = share_rows['ug'].partition(' ')
+    
+    lines = text.split('\n')
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        
+        # Stop ONLY at "Umlagefähige Kosten:" - this is the summary row
+        if 'umlagefähige kosten:' in line.lower():
+            return True  # Stop text extraction, but let table extraction continue
+        
+        # Skip "Nicht umlagefähige Kosten:" section
+        if 'nicht umlagefähige kosten:' in line.lower() or 'nicht umlagefaehige kosten:' in line.lower():
+            return True  # Stop text extraction, but let table extraction continue
+        
+        # MULTI-ROW PATTERN: "Cost Name ... number Der Betrag wurde wie folgt aufgeteilt:"
+        # Next lines: May have "=> Objekt WEG...", "=> UG1 ...", "=> UG2 ... AMOUNT"
+        # WICHTIG: Wir müssen BEIDE nehmen: WEG Anteil + UG2 Anteil
+        if 'der betrag wurde wie folgt aufgeteilt:' in line.lower():
+            # Extract cost name (remove total amount and the text at end)
+            cost_name = line.split('Der Betrag')[0].strip()
+            # Remove trailing number (total building amount)
+            cost_name = re.sub(r'\s+[-]?\d{1,3}(?:\.\d{3})*,\d{2}\s*$', '', cost_name)
+            cost_name = cost_name.strip()
             
-            text = page.extract_text()
+            # Search for WEG Anteil AND UG2 lines in next lines
+            # STOP when we hit another "Der Betrag wurde wie folgt aufgeteilt" or other cost line
+            weg_amount = None
+            ug2_amount = None
             
-            # FIRST: Extract text-based costs (like Niederschlagsentwässerung, Hausnebenkosten, etc.)
-            # These appear in green sections and are not in tables
-            if text and not found_text_summary:
-                lines = text.split('\n')
-                i = 0
-                while i < len(lines):
-                    line = lines[i].strip()
-                    
-                    # Stop ONLY at "Umlagefähige Kosten:" - this is the summary row
-                    if 'umlagefähige kosten:' in line.lower():
-                        found_text_summary = True
-                        break  # Stop text extraction, but let table extraction continue
-                    
-                    # Skip "Nicht umlagefähige Kosten:" section
-                    if 'nicht umlagefähige kosten:' in line.lower() or 'nicht umlagefaehige kosten:' in line.lower():
-                        found_text_summary = True
-                        break  # Stop text extraction, but let table extraction continue
-                    
-                    # MULTI-ROW PATTERN: "Cost Name ... number Der Betrag wurde wie folgt aufgeteilt:"
-                    # Next lines: May have "=> Objekt WEG...", "=> UG1 ...", "=> UG2 ... AMOUNT"
-                    # WICHTIG: Wir müssen BEIDE nehmen: WEG Anteil + UG2 Anteil
-                    if 'der betrag wurde wie folgt aufgeteilt:' in line.lower():
-                        # Extract cost name (remove total amount and the text at end)
-                        cost_name = line.split('Der Betrag')[0].strip()
-                        # Remove trailing number (total building amount)
-                        cost_name = re.sub(r'\s+[-]?\d{1,3}(?:\.\d{3})*,\d{2}\s*$', '', cost_name)
-                        cost_name = cost_name.strip()
-                        
-                        # Search for WEG Anteil AND UG2 lines in next lines
-                        # STOP when we hit another "Der Betrag wurde wie folgt aufgeteilt" or other cost line
-                        weg_amount = None
-                        ug2_amount = None
-                        
-                        for j in range(1, 10):  # Check more lines
-                            if i + j >= len(lines):
-                                break
-                            
-                            check_line = lines[i + j].strip()
-                            
-                            # Stop if we hit another multi-row marker or a single-line cost
-                            if 'der betrag wurde wie folgt aufgeteilt' in check_line.lower():
-                                break
-                            
-                            # WEG Anteil (Objekt WEG Lietzenburger Straße 1-9)
-                            if 'Objekt WEG' in check_line or 'objekt weg' in check_line.lower():
-                                parts = check_line.split()
-                                if parts:
-                                    last_part = parts[-1]
-                                    amount_match = re.match(r'^([-]?\d{1,3}(?:\.\d{3})*,\d{2})$', last_part)
-                                    if amount_match:
-                                        try:
-                                            weg_amount = float(amount_match.group(1).replace('.', '').replace(',', '.'))
-                                        except:
-                                            pass
-                            
-                            # UG2 Anteil
-                            if ('UG2' in check_line or 'ug2' in check_line.lower()) and 'Lietzenburger Straße 3-9' in check_line:
-                                parts = check_line.split()
-                                if parts:
-                                    last_part = parts[-1]
-                                    amount_match = re.match(r'^([-]?\d{1,3}(?:\.\d{3})*,\d{2})$', last_part)
-                                    if amount_match:
-                                        try:
-                                            ug2_amount = float(amount_match.group(1).replace('.', '').replace(',', '.'))
-                                        except:
-                                            pass
-                        
-                        # Addiere WEG Anteil + UG2 Anteil
-                        total_amount = (weg_amount or 0) + (ug2_amount or 0)
-                        
-                        # Speichere den Kostenpunkt wenn mindestens einer der Beträge vorhanden ist
-                        if (weg_amount is not None or ug2_amount is not None) and len(cost_name) >= 3:
-                            name_key = cost_name.lower().replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
-                            
-                            # Immer den neuen Wert überschreiben (nicht vergleichen, da wir jetzt beide Anteile haben)
-                            costs_dict[name_key] = {
-                                'name': cost_name,
-                                'amount': total_amount
-                            }
-                        
-                        # NICHT skip_lines verwenden - verarbeite Zeile für Zeile
-                        i += 1
-                        continue
-                    
-                    # SINGLE-LINE PATTERN: "Cost Name ... numbers ... 365/365 AMOUNT"
-                    # The final amount is after "365/365" or at the end
-                    # Example: "Niederschlagsentwässerung 3.840,51 10.000,00 Miteigentumsanteile 57,00 365/365 21,89"
-                    
-                    # Extract cost name (first word(s) before numbers start)
-                    parts = line.split()
-                    if len(parts) >= 2:
-                        # The last part should be the amount
+            for j in range(1, 10):  # Check more lines
+                if i + j >= len(lines):
+                    break
+                
+                check_line = lines[i + j].strip()
+                
+                # Stop if we hit another multi-row marker or a single-line cost
+                if 'der betrag wurde wie folgt aufgeteilt' in check_line.lower():
+                    break
+                
+                # WEG Anteil (Objekt WEG Lietzenburger Straße 1-9)
+                if weg_label in check_line.lower():
+                    parts = check_line.split()
+                    if parts:
                         last_part = parts[-1]
-                        amount_match = re.match(r'^(\d{1,3}(?:\.\d{3})*,\d{2})$', last_part)
-                        
+                        amount_match = re.match(r'^([-]?\d{1,3}(?:\.\d{3})*,\d{2})$', last_part)
                         if amount_match:
-                            amount_str = amount_match.group(1)
-                            
-                            # Find where the cost name ends (before first number)
-                            cost_name_parts = []
-                            for part in parts:
-                                # Stop at first number or keyword
-                                if re.search(r'\d', part) or part.lower() in ['miteigentumsanteile', 'festbetrag', 'anzahl']:
-                                    break
-                                cost_name_parts.append(part)
-                            
-                            if cost_name_parts:
-                                cost_name = ' '.join(cost_name_parts).strip()
-                                
-                                # Skip non-cost lines
-                                if len(cost_name) >= 3 and not any(skip in cost_name.lower() for skip in [
-                                    'gesamt betrag', 'basis', 'verteilung', 'hausgeld', 'betrag',
-                                    'kostenart', 'objekt weg', 'einheitennr', 'abrechnungszeitraum',
-                                    'vorauszahlung', 'abrechnungsspitze', 'datum', 'debitorennr',
-                                    'nutzungszeitraum', 'abrechnung', 'berech.tage', 'wohnung'
-                                ]):
-                                    # Parse amount
-                                    try:
-                                        amount = float(amount_str.replace('.', '').replace(',', '.'))
-                                        if amount > 0:
-                                            name_key = cost_name.lower().replace(' ', '').replace('-', '')
-                                            
-                                            if name_key in costs_dict:
-                                                if amount > costs_dict[name_key]['amount']:
-                                                    costs_dict[name_key] = {
-                                                        'name': cost_name,
-                                                        'amount': amount
-                                                    }
-                                            else:
-                                                costs_dict[name_key] = {
-                                                    'name': cost_name,
-                                                    'amount': amount
-                                                }
-                                    except:
-                                        pass
-                    
-                    i += 1
+                            try:
+                                weg_amount = float(amount_match.group(1).replace('.', '').replace(',', '.'))
+                            except:
+                                pass
+                
+                # UG2 Anteil
+                if ug_unit.lower() in check_line.lower() and ug_address in check_line:
+                    parts = check_line.split()
+                    if parts:
+                        last_part = parts[-1]
+                        amount_match = re.match(r'^([-]?\d{1,3}(?:\.\d{3})*,\d{2})$', last_part)
+                        if amount_match:
+                            try:
+                                ug2_amount = float(amount_match.group(1).replace('.', '').replace(',', '.'))
+                            except:
+                                pass
             
-            # SECOND: Extract tables
-            tables = page.extract_tables()
+            # Addiere WEG Anteil + UG2 Anteil
+            total_amount = (weg_amount or 0) + (ug2_amount or 0)
             
-            for table in tables:
-                if not table or found_summary:
-                    continue
+            # Speichere den Kostenpunkt wenn mindestens einer der Beträge vorhanden ist
+            if (weg_amount is not None or ug2_amount is not None) and len(cost_name) >= 3:
+                name_key = cost_name.lower().replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
                 
-                # Check if this is a multi-row table with "=>" rows
-                # Pattern: Row 0 = Cost name, Row 1 = "=> UG1 ...", Row 2 = "=> UG2 ..."
-                has_ug2_rows = any(
-                    row and len(row) > 1 and row[0] and 
-                    ('=>' in str(row[0]) or 'UG2 Lietzenburger Straße 3-9' in str(row[1] if len(row) > 1 else ''))
-                    for row in table[1:] if row
-                )
-                
-                if has_ug2_rows:
-                    # MULTI-ROW TABLE: Extract from UG2 row
-                    cost_name = None
-                    amount = None
-                    
-                    # First row should have the cost name
-                    if table[0] and table[0][0]:
-                        cost_name = str(table[0][0]).strip()
-                    
-                    # Find the UG2 row (should be row 2 typically)
-                    for row in table[1:]:
-                        if not row or len(row) < 2:
-                            continue
-                        
-                        # Check if this is the UG2 row
-                        if (row[0] and '=>' in str(row[0])) and (row[1] and 'UG2 Lietzenburger Straße 3-9' in str(row[1])):
-                            # Extract amount from column [-2]
-                            if len(row) >= 3:
-                                cell = row[-2]
-                                if cell and str(cell).strip():
-                                    cell_str = str(cell).strip()
-                                    
-                                    # Parse German number format
-                                    amount_match = re.search(r'(-?\d{1,3}(?:\.\d{3})*,\d{2})', cell_str)
-                                    if not amount_match:
-                                        amount_match = re.search(r'(-?\d{1,3}(?:\.\d{3})*)', cell_str)
-                                    
-                                    if amount_match:
-                                        try:
-                                            amount_str = amount_match.group(1).replace('.', '').replace(',', '.')
-                                            parsed = float(amount_str)
-                                            if abs(parsed) > 0.01 and abs(parsed) < 10000:
-                                                amount = parsed
-                                        except:
-                                            pass
-                            break
-                    
-                    # Add this cost if we found both name and amount
-                    # ABER: Nicht überschreiben wenn bereits ein Text-basierter Wert existiert
-                    # (Text-basierte Multi-Row-Werte haben WEG + UG2, Tabellen haben nur UG2)
-                    if cost_name and amount:
-                        cost_name_lower = cost_name.lower()
-                        
-                        # Skip if this is a summary row
-                        if 'umlagefähige kosten:' in cost_name_lower or 'nicht umlagefähige' in cost_name_lower:
-                            found_summary = True
-                            break
-                        
-                        name_key = cost_name_lower.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
-                        
-                        # Nur hinzufügen wenn noch nicht vorhanden (Text-Extraktion hat Vorrang)
-                        if name_key not in costs_dict:
-                            costs_dict[name_key] = {
-                                'name': cost_name,
-                                'amount': amount
-                            }
-                    
-                    continue  # Skip normal row processing for this table
+                # Immer den neuen Wert überschreiben (nicht vergleichen, da wir jetzt beide Anteile haben)
+                costs_dict[name_key] = {
+                    'name': cost_name,
+                    'amount': total_amount
+                }
+                sources[name_key] = {
+                    'kind': 'text_split',
+                    'shares': (weg_amount is not None) + (ug2_amount is not None)
+                }
+            
+            # NICHT skip_lines verwenden - verarbeite Zeile für Zeile
+            i += 1
+            continue
+        
+        # SINGLE-LINE PATTERN: "Cost Name ... numbers ... 365/365 AMOUNT"
+        # The final amount is after "365/365" or at the end
+        # Example: "Niederschlagsentwässerung 3.840,51 10.000,00 Miteigentumsanteile 57,00 365/365 21,89"
+        
+        # Extract cost name (first word(s) before numbers start)
+        parts = line.split()
+        if len(parts) >= 2:
+            # The last part should be the amount
+            last_part = parts[-1]
+            amount_match = re.match(r'^(\d{1,3}(?:\.\d{3})*,\d{2})$', last_part)
+            
+            if amount_match:
+                amount_str = amount_match.group(1)
                 
-                # NORMAL SINGLE-ROW TABLES
-                for row in table:
-                    if not row or len(row) < 2:
-                        continue
-                    
-                    # Try to find cost items
-                    cost_name = str(row[0]).strip() if row[0] else ""
-                    
-                    # Skip empty or very short names
-                    if not cost_name or len(cost_name) < 3:
-                        continue
-                    
-                    cost_name_lower = cost_name.lower()
-                    
-                    # STOP if we hit "Umlagefähige Kosten:" - everything after this is summary
-                    if 'umlagefähige kosten:' in cost_name_lower or 'umlagefaehige kosten:' in cost_name_lower:
-                        found_summary = True
-                        break
-                    
-                    # Also stop at "Nicht umlagefähige Kosten:" or "Sonstige betriebliche"
-                    if any(marker in cost_name_lower for marker in [
-                        'nicht umlagefähige kosten:', 'nicht umlagefaehige kosten:',
-                        'sonstige betriebliche', 'eigentümerversammlung', 
-                        'verwaltung', 'gutachten', 'laufende reparaturen'
-                    ]):
-                        found_summary = True
+                # Find where the cost name ends (before first number)
+                cost_name_parts = []
+                for part in parts:
+                    # Stop at first number or keyword
+                    if re.search(r'\d', part) or part.lower() in ['miteigentumsanteile', 'festbetrag', 'anzahl']:
                         break
+                    cost_name_parts.append(part)
+                
+                if cost_name_parts:
+                    cost_name = ' '.join(cost_name_parts).strip()
                     
-                    # STRICT FILTER: Skip all non-cost rows
-                    if any(skip in cost_name_lower for skip in [
-                        'kostenart', 'gesamt betrag', 'summe:', 'total',
-                        'anfangsbestand', 'endbestand', 'entnahmen',  # Balance rows
-                        'gesamtkosten:', 'hausgeld',  # Headers (but NOT hausnebenkosten!)
-                        'abrechnungszeitraum', 'objekt:', 'eigentümernr',  # Metadata
-                        'vertragsnr', 'einheitennr', 'sehr geehrte',  # Metadata
-                        'anbei erhalten', 'mit freundlichen',  # Text
-                        'wir freuen uns', 'bitte teilen',  # Text
-                        '=>', 'ug1 ', 'ug2 ', 'untergruppe',  # Subgroups markers
-                        'abrechnungsspitze',  # Summary
-                        'ungezieferbekämpfung (nicht'  # Specifically "nicht umlagefähig"
+                    # Skip non-cost lines
+                    if len(cost_name) >= 3 and not any(skip in cost_name.lower() for skip in [
+                        'gesamt betrag', 'basis', 'verteilung', 'hausgeld', 'betrag',
+                        'kostenart', 'objekt weg', 'einheitennr', 'abrechnungszeitraum',
+                        'vorauszahlung', 'abrechnungsspitze', 'datum', 'debitorennr',
+                        'nutzungszeitraum', 'abrechnung', 'berech.tage', 'wohnung'
                     ]):
-                        continue
-                    
-                    # SPECIAL: Skip "Anlagen" (attachments) but ALLOW "Außenanlagen", "Aufzugsanlagen", etc.
-                    if cost_name_lower == 'anlagen':
-                        continue
-                    
-                    # SPECIAL: Skip "Hausgeldabrechnung" but ALLOW "Hausnebenkosten"
-                    if 'hausgeld' in cost_name_lower and 'neben' not in cost_name_lower:
-                        continue
-                    
-                    # SPECIAL: Skip generic "abrechnung" but ALLOW "Heiz- und Wasserkostenabrechnung"
-                    if 'abrechnung' in cost_name_lower and not any(keep in cost_name_lower for keep in 
-                        ['heiz', 'wasser', 'kosten']):
-                        continue
-                    
-                    # Find "Betrag" column 
-                    # In this PDF format, the amount is typically in the SECOND-TO-LAST column
-                    # (last column is often empty)
-                    amount = None
-                    found_in_primary_column = False
-                    
-                    # Try second-to-last column first (this is where "Betrag" usually is)
-                    if len(row) >= 3:  # Need at least 3 columns
-                        # Try column [-2] (second from right)
-                        cell = row[-2] if len(row) > 1 else None
-                        if cell and str(cell).strip():
-                            cell_str = str(cell).strip()
-                            
-                            # Skip if it's text, not a number
-                            if not any(skip in cell_str.lower() for skip in 
-                                ['miteigentumsanteile', 'festbetrag', 'tage', 'verteilung', 'ug1', 'ug2']):
-                                
-                                # Parse German number format
-                                amount_match = re.search(r'(\d{1,3}(?:\.\d{3})*,\d{2})', cell_str)
-                                if not amount_match:
-                                    amount_match = re.search(r'(\d{1,3}(?:\.\d{3})*)', cell_str)
+                        # Parse amount
+                        try:
+                            amount = float(amount_str.replace('.', '').replace(',', '.'))
+                            if amount > 0:
+                                name_key = cost_name.lower().replace(' ', '').replace('-', '')
+                                source = {
+                                    'kind': 'text_line',
+                                    'numbers': sum(1 for part in parts if re.search(r'\d', part))
+                                }
                                 
-                                if amount_match:
-                                    try:
-                                        amount_str = amount_match.group(1).replace('.', '').replace(',', '.')
-                                        parsed = float(amount_str)
-                                        # Accept ANY value including 0.00 from primary column
-                                        if -10000 < parsed < 10000:
-                                            amount = parsed
-                                            found_in_primary_column = True
-                                    except:
-                                        pass
-                    
-                    # If not found in [-2], try searching from right to left
-                    # But ONLY if we didn't find a valid number in the primary column
-                    if not found_in_primary_column:
-                        for cell in reversed(row[1:]):  # Skip first column (name)
-                            if not cell or not str(cell).strip():
-                                continue
-                            
+                                if name_key in costs_dict:
+                                    if amount > costs_dict[name_key]['amount']:
+                                        costs_dict[name_key] = {
+                                            'name': cost_name,
+                                            'amount': amount
+                                        }
+                                        sources[name_key] = source
+                                else:
+                                    costs_dict[name_key] = {
+                                        'name': cost_name,
+                                        'amount': amount
+                                    }
+                                    sources[name_key] = source
+                        except:
+                            pass
+        
+        i += 1
+    
+    return False
+
+
+def _parse_weg_tables(
+    tables: list,
+    costs_dict: Dict[str, Dict[str, Any]],
+    plan: Optional[Dict[str, Any]] = None,
+    column_hits: Optional[Dict[int, int]] = None,
+    sources: Optional[Dict[str, Dict[str, Any]]] = None,
+    summary: Optional[Dict[str, Any]] = None
+) -> bool:
+    """
+    Tabellen-Kosten einer Seite in costs_dict übernehmen
+    
+    plan: Gelernter Extraktionsplan der Vorlage - Betragsspalte steht fest,
+          die Suche von rechts nach links entfällt (außer plan['amount_fallback'])
+    column_hits: Wird mit {Spalte von rechts: Anzahl übernommener Beträge} gefüllt
+    sources: Wird je Kostenposten mit der Herkunft des Betrags gefüllt (für die Konfidenz)
+    summary: Wird mit dem Betrag der Zeile "Umlagefähige Kosten:" in Cent gefüllt ('cents'),
+             gelesen aus derselben Betragsspalte wie die Kosten
+    
+    Returns:
+        True sobald eine Summenzeile erreicht ist (danach keine Seiten mehr verarbeiten)
+    """
+    amount_column = plan['amount_column'] if plan else -2
+    search_other_columns = plan is None or plan['amount_fallback']
+    ug_row = (plan['share_rows'] if plan else config.WEG_EXTRACTION['share_rows'])['ug']
+    if column_hits is None:
+        column_hits = {}
+    if sources is None:
+        sources = {}
+    
+    for table in tables:
+        if not table:
+            continue
+        
+        # Check if this is a multi-row table with "=>" rows
+        # Pattern: Row 0 = Cost name, Row 1 = "=> UG1 ...", Row 2 = "=> UG2 ..."
+        has_ug2_rows = any(
+            row and len(row) > 1 and row[0] and 
+            ('=>' in str(row[0]) or ug_row in str(row[1] if len(row) > 1 else ''))
+            for row in table[1:] if row
+        )
+        
+        if has_ug2_rows:
+            # MULTI-ROW TABLE: Extract from UG2 row
+            cost_name = None
+            amount = None
+            
+            # First row should have the cost name
+            if table[0] and table[0][0]:
+                cost_name = str(table[0][0]).strip()
+            
+            # Find the UG2 row (should be row 2 typically)
+            for row in table[1:]:
+                if not row or len(row) < 2:
+                    continue
+                
+                # Check if this is the UG2 row
+                if (row[0] and '=>' in str(row[0])) and (row[1] and ug_row in str(row[1])):
+                    # Extract amount from column [-2] (bzw. Betragsspalte des Plans)
+                    if len(row) >= 3:
+                        cell = row[amount_column]
+                        if cell and str(cell).strip():
                             cell_str = str(cell).strip()
                             
-                            # Skip text cells
-                            if any(skip in cell_str.lower() for skip in 
-                                ['miteigentumsanteile', 'festbetrag', 'aufgeteilt', 'direkt',
-                                 'tage', 'der betrag wurde', 'verteilung', 'ug1', 'ug2']):
-                                continue
-                            
-                            # Skip MEA values
-                            if cell_str in ['5424.00', '5.424,00', '5424,00', '4504,00', '10000,00', '57,00', '57.00']:
-                                continue
-                            
-                            # Parse number
-                            amount_match = re.search(r'(\d{1,3}(?:\.\d{3})*,\d{2})', cell_str)
+                            # Parse German number format
+                            amount_match = re.search(r'(-?\d{1,3}(?:\.\d{3})*,\d{2})', cell_str)
                             if not amount_match:
-                                amount_match = re.search(r'(\d{1,3}(?:\.\d{3})*)', cell_str)
+                                amount_match = re.search(r'(-?\d{1,3}(?:\.\d{3})*)', cell_str)
                             
                             if amount_match:
                                 try:
                                     amount_str = amount_match.group(1).replace('.', '').replace(',', '.')
                                     parsed = float(amount_str)
-                                    if 0.01 < parsed < 10000:
+                                    if abs(parsed) > 0.01 and abs(parsed) < 10000:
                                         amount = parsed
-                                        break
+                                        column_hits[amount_column] = column_hits.get(amount_column, 0) + 1
                                 except:
                                     pass
+                    break
+            
+            # Add this cost if we found both name and amount
+            # ABER: Nicht überschreiben wenn bereits ein Text-basierter Wert existiert
+            # (Text-basierte Multi-Row-Werte haben WEG + UG2, Tabellen haben nur UG2)
+            if cost_name and amount:
+                cost_name_lower = cost_name.lower()
+                
+                # Skip if this is a summary row
+                if 'umlagefähige kosten:' in cost_name_lower or 'nicht umlagefähige' in cost_name_lower:
+                    return True
+                
+                name_key = cost_name_lower.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
+                
+                # Nur hinzufügen wenn noch nicht vorhanden (Text-Extraktion hat Vorrang)
+                if name_key not in costs_dict:
+                    costs_dict[name_key] = {
+                        'name': cost_name,
+                        'amount': amount
+                    }
+                    sources[name_key] = {'kind': 'table_split', 'column': amount_column}
+            
+            continue  # Skip normal row processing for this table
+        
+        # NORMAL SINGLE-ROW TABLES
+        for row in table:
+            if not row or len(row) < 2:
+                continue
+            
+            # Try to find cost items
+            cost_name = str(row[0]).strip() if row[0] else ""
+            
+            # Skip empty or very short names
+            if not cost_name or len(cost_name) < 3:
+                continue
+            
+            cost_name_lower = cost_name.lower()
+            
+            # STOP if we hit "Umlagefähige Kosten:" - everything after this is summary
+            if 'umlagefähige kosten:' in cost_name_lower or 'umlagefaehige kosten:' in cost_name_lower:
+                if summary is not None and not cost_name_lower.startswith('nicht'):
+                    cell = row[amount_column] if len(row) >= -amount_column else None
+                    cents = _parse_cents(str(cell)) if cell else None
+                    if cents is None:
+                        # Betragsspalte leer: letzter Betrag der Zeile
+                        cents = next(
+                            (_parse_cents(str(c)) for c in reversed(row[1:]) if c and _parse_cents(str(c)) is not None),
+                            None
+                        )
+                    if cents is not None:
+                        summary['cents'] = cents
+                return True
+            
+            # Also stop at "Nicht umlagefähige Kosten:" or "Sonstige betriebliche"
+            if any(marker in cost_name_lower for marker in [
+                'nicht umlagefähige kosten:', 'nicht umlagefaehige kosten:',
+                'sonstige betriebliche', 'eigentümerversammlung', 
+                'verwaltung', 'gutachten', 'laufende reparaturen'
+            ]):
+                return True
+            
+            # STRICT FILTER: Skip all non-cost rows
+            if any(skip in cost_name_lower for skip in [
+                'kostenart', 'gesamt betrag', 'summe:', 'total',
+                'anfangsbestand', 'endbestand', 'entnahmen',  # Balance rows
+                'gesamtkosten:', 'hausgeld',  # Headers (but NOT hausnebenkosten!)
+                'abrechnungszeitraum', 'objekt:', 'eigentümernr',  # Metadata
+                'vertragsnr', 'einheitennr', 'sehr geehrte',  # Metadata
+                'anbei erhalten', 'mit freundlichen',  # Text
+                'wir freuen uns', 'bitte teilen',  # Text
+                '=>', 'ug1 ', 'ug2 ', 'untergruppe',  # Subgroups markers
+                'abrechnungsspitze',  # Summary
+                'ungezieferbekämpfung (nicht'  # Specifically "nicht umlagefähig"
+            ]):
+                continue
+            
+            # SPECIAL: Skip "Anlagen" (attachments) but ALLOW "Außenanlagen", "Aufzugsanlagen", etc.
+            if cost_name_lower == 'anlagen':
+                continue
+            
+            # SPECIAL: Skip "Hausgeldabrechnung" but ALLOW "Hausnebenkosten"
+            if 'hausgeld' in cost_name_lower and 'neben' not in cost_name_lower:
+                continue
+            
+            # SPECIAL: Skip generic "abrechnung" but ALLOW "Heiz- und Wasserkostenabrechnung"
+            if 'abrechnung' in cost_name_lower and not any(keep in cost_name_lower for keep in 
+                ['heiz', 'wasser', 'kosten']):
+                continue
+            
+            # Find "Betrag" column 
+            # In this PDF format, the amount is typically in the SECOND-TO-LAST column
+            # (last column is often empty)
+            amount = None
+            amount_found_in = None
+            found_in_primary_column = False
+            
+            # Try second-to-last column first (this is where "Betrag" usually is)
+            if len(row) >= 3:  # Need at least 3 columns
+                # Try column [-2] (second from right) - bzw. die Betragsspalte des Plans
+                cell = row[amount_column] if len(row) >= -amount_column else None
+                if cell and str(cell).strip():
+                    cell_str = str(cell).strip()
                     
-                    # Check if this is a valid cost item
-                    # Note: amount can be 0.00 (from primary column), but we only add if > 0
-                    if cost_name and amount is not None and amount > 0:
-                        # Normalize name for duplicate detection
-                        name_key = cost_name_lower.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
+                    # Skip if it's text, not a number
+                    if not any(skip in cell_str.lower() for skip in 
+                        ['miteigentumsanteile', 'festbetrag', 'tage', 'verteilung', 'ug1', 'ug2']):
                         
-                        # If duplicate, keep the HIGHER amount (main table usually has higher values)
-                        if name_key in costs_dict:
-                            if amount > costs_dict[name_key]['amount']:
-                                costs_dict[name_key] = {
-                                    'name': cost_name,
-                                    'amount': amount
-                                }
-                        else:
-                            costs_dict[name_key] = {
-                                'name': cost_name,
-                                'amount': amount
-                            }
+                        # Parse German number format
+                        amount_match = re.search(r'(\d{1,3}(?:\.\d{3})*,\d{2})', cell_str)
+                        if not amount_match:
+                            amount_match = re.search(r'(\d{1,3}(?:\.\d{3})*)', cell_str)
+                        
+                        if amount_match:
+                            try:
+                                amount_str = amount_match.group(1).replace('.', '').replace(',', '.')
+                                parsed = float(amount_str)
+                                # Accept ANY value including 0.00 from primary column
+                                if -10000 < parsed < 10000:
+                                    amount = parsed
+                                    amount_found_in = amount_column
+                                    found_in_primary_column = True
+                            except:
+                                pass
+            
+            # If not found in [-2], try searching from right to left
+            # But ONLY if we didn't find a valid number in the primary column
+            # (entfällt bei einem Plan, dessen Beträge alle aus einer Spalte kamen)
+            if not found_in_primary_column and search_other_columns:
+                for column in range(-1, -len(row), -1):  # Skip first column (name)
+                    cell = row[column]
+                    if not cell or not str(cell).strip():
+                        continue
+                    
+                    cell_str = str(cell).strip()
+                    
+                    # Skip text cells
+                    if any(skip in cell_str.lower() for skip in 
+                        ['miteigentumsanteile', 'festbetrag', 'aufgeteilt', 'direkt',
+                         'tage', 'der betrag wurde', 'verteilung', 'ug1', 'ug2']):
+                        continue
+                    
+                    # Skip MEA values
+                    if cell_str in ['5424.00', '5.424,00', '5424,00', '4504,00', '10000,00', '57,00', '57.00']:
+                        continue
+                    
+                    # Parse number
+                    amount_match = re.search(r'(\d{1,3}(?:\.\d{3})*,\d{2})', cell_str)
+                    if not amount_match:
+                        amount_match = re.search(r'(\d{1,3}(?:\.\d{3})*)', cell_str)
+                    
+                    if amount_match:
+                        try:
+                            amount_str = amount_match.group(1).replace('.', '').replace(',', '.')
+                            parsed = float(amount_str)
+                            if 0.01 < parsed < 10000:
+                                amount = parsed
+                                amount_found_in = column
+                                break
+                        except:
+                            pass
+            
+            # Check if this is a valid cost item
+            # Note: amount can be 0.00 (from primary column), but we only add if > 0
+            if cost_name and amount is not None and amount > 0:
+                column_hits[amount_found_in] = column_hits.get(amount_found_in, 0) + 1
+                
+                # Normalize name for duplicate detection
+                name_key = cost_name_lower.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
+                
+                source = {'kind': 'table', 'column': amount_found_in, 'primary': found_in_primary_column}
+                
+                # If duplicate, keep the HIGHER amount (main table usually has higher values)
+                if name_key in costs_dict:
+                    if amount > costs_dict[name_key]['amount']:
+                        costs_dict[name_key] = {
+                            'name': cost_name,
+                            'amount': amount
+                        }
+                        sources[name_key] = source
+                else:
+                    costs_dict[name_key] = {
+                        'name': cost_name,
+                        'amount': amount
+                    }
+                    sources[name_key] = source
     
-    # Convert dict back to list
-    return list(costs_dict.values())
+    return False
 
 
-def extract_rental_contract(pdf_path: str) -> Dict[str, Any]:
+def extract_rental_contract(pdf_path: str, early_exit: bool = None) -> Dict[str, Any]:
     """
     Extrahiert Mieter-Informationen aus Mietvertrag
     
+    Args:
+        pdf_path: Pfad zur PDF-Datei
+        early_exit: Seiten einzeln scannen und aufhören, sobald alle Felder feststehen
+                    (None = config.RENTAL_EXTRACTION['early_exit'])
+    
     Returns:
         {
             'name': str,
@@ -432,9 +1168,13 @@ def extract_rental_contract(pdf_path: str) -> Dict[str, Any]:
             'monthly_rent': float,
             'betriebskosten_voraus': float,
             'heizkosten_voraus': float,
-            'monthly_prepayment': float  # Total: Betriebskosten + Heizkosten
+            'monthly_prepayment': float,  # Total: Betriebskosten + Heizkosten
+            'memory': {'peak_rss_mb': float, ...}
         }
     """
+    if early_exit is None:
+        early_exit = config.RENTAL_EXTRACTION['early_exit']
+    
     result = {
         'name': None,
         'start_date': None,
@@ -444,76 +1184,164 @@ def extract_rental_contract(pdf_path: str) -> Dict[str, Any]:
         'monthly_prepayment': None
     }
     
-    with pdfplumber.open(pdf_path) as pdf:
-        # Extract text from all pages
-        full_text = ""
-        for page in pdf.pages:
-            full_text += page.extract_text() + "\n"
-        
-        # Extract tenant name
-        for pattern in config.RENTAL_CONTRACT_PATTERNS['mieter_name']:
-            match = re.search(pattern, full_text, re.IGNORECASE)
-            if match:
-                result['name'] = match.group(1).strip()
-                break
-        
-        # Extract rental start date
-        for pattern in config.RENTAL_CONTRACT_PATTERNS['mietbeginn']:
-            match = re.search(pattern, full_text, re.IGNORECASE)
-            if match:
-                date_str = match.group(1)
-                # Try to parse date
-                for fmt in ['%d.%m.%Y', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%y']:
-                    try:
-                        result['start_date'] = datetime.strptime(date_str, fmt).date()
-                        break
-                    except:
-                        pass
-                if result['start_date']:
-                    break
-        
-        # Extract Grundmiete/Kaltmiete
-        for pattern in config.RENTAL_CONTRACT_PATTERNS['kaltmiete']:
-            match = re.search(pattern, full_text, re.IGNORECASE)
-            if match:
-                try:
-                    amount_str = match.group(1).replace('.', '').replace(',', '.').replace('--', '')
-                    result['monthly_rent'] = float(amount_str)
-                    break
-                except:
-                    pass
-        
-        # Extract Betriebskostenvorauszahlung
-        for pattern in config.RENTAL_CONTRACT_PATTERNS['nebenkosten_voraus']:
-            match = re.search(pattern, full_text, re.IGNORECASE)
-            if match:
-                try:
-                    amount_str = match.group(1).replace('.', '').replace(',', '.').replace('--', '')
-                    result['betriebskosten_voraus'] = float(amount_str)
-                    break
-                except:
-                    pass
-        
-        # Extract Heizkosten/Heizung Vorauszahlung
-        for pattern in config.RENTAL_CONTRACT_PATTERNS['heizkosten_voraus']:
-            match = re.search(pattern, full_text, re.IGNORECASE)
-            if match:
-                try:
-                    amount_str = match.group(1).replace('.', '').replace(',', '.').replace('--', '')
-                    result['heizkosten_voraus'] = float(amount_str)
+    # {field: {pattern_index: roher Treffer}} - erster Treffer je Pattern
+    candidates = {field: {} for field in config.RENTAL_CONTRACT_PATTERNS}
+    
+    with track_memory() as memory, open_pdf(pdf_path) as pdf:
+        apply_ocr(pdf)
+        if early_exit:
+            # Alle Patterns in einem Scanner, Seite für Seite
+            scanner, group_fields = _rental_scanner(_pattern_key(config.RENTAL_CONTRACT_PATTERNS))
+            previous_text = None
+            for page in pdf.pages:
+                page_text = extract_page_text(page)
+                page.close()
+                # Zwei-Seiten-Fenster, damit Treffer über den Seitenumbruch nicht verloren gehen
+                window = page_text if previous_text is None else previous_text + "\n" + page_text
+                is_last_page = page.index == len(pdf.pages) - 1
+                _scan_rental_text(scanner, group_fields, window, candidates, open_end=not is_last_page)
+                previous_text = page_text
+                
+                # Keine weiteren Seiten öffnen, sobald kein Feld mehr einen besseren Treffer bekommen kann
+                if all(_rental_field_final(field, found) for field, found in candidates.items()):
                     break
-                except:
-                    pass
-        
-        # Calculate total monthly prepayment (Betriebskosten + Heizkosten)
-        betriebskosten = result['betriebskosten_voraus'] or 0
-        heizkosten = result['heizkosten_voraus'] or 0
-        if betriebskosten > 0 or heizkosten > 0:
-            result['monthly_prepayment'] = betriebskosten + heizkosten
+        else:
+            # Extract text from all pages
+            page_texts = []
+            for page in pdf.pages:
+                page_texts.append(extract_page_text(page))
+                page.close()
+            full_text = "\n".join(page_texts)
+            for field, patterns in config.RENTAL_CONTRACT_PATTERNS.items():
+                for pattern_index, pattern in enumerate(patterns):
+                    match = re.search(pattern, full_text, re.IGNORECASE)
+                    if match:
+                        candidates[field][pattern_index] = match.group(1)
+    
+    for field, result_key in RENTAL_RESULT_KEYS.items():
+        result[result_key] = _resolve_rental_field(field, candidates.get(field, {}))
     
+    # Calculate total monthly prepayment (Betriebskosten + Heizkosten)
+    betriebskosten = result['betriebskosten_voraus'] or 0
+    heizkosten = result['heizkosten_voraus'] or 0
+    if betriebskosten > 0 or heizkosten > 0:
+        result['monthly_prepayment'] = betriebskosten + heizkosten
+    
+    result['memory'] = memory.report()
     return result
 
 
+# Feld in config.RENTAL_CONTRACT_PATTERNS -> Schlüssel im Ergebnis
+RENTAL_RESULT_KEYS = {
+    'mieter_name': 'name',
+    'mietbeginn': 'start_date',
+    'kaltmiete': 'monthly_rent',
+    'nebenkosten_voraus': 'betriebskosten_voraus',
+    'heizkosten_voraus': 'heizkosten_voraus',
+}
+
+
+def _pattern_key(patterns: Dict[str, List[str]]) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    return tuple((field, tuple(field_patterns)) for field, field_patterns in patterns.items())
+
+
+@lru_cache(maxsize=None)
+def _rental_scanner(pattern_key: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> Tuple[re.Pattern, Dict[str, Tuple[str, int, int]]]:
+    """
+    Kompiliert alle Mietvertrags-Patterns zu einem Scanner mit benannten Gruppen
+    
+    Jedes Pattern steckt in einem Lookahead, damit ein Treffer (z.B. ein Name, der
+    über den Zeilenumbruch hinaus "Mietbeginn" mitnimmt) die Treffer anderer Felder
+    an späteren Positionen nicht verdeckt.
+    
+    Returns:
+        (scanner, {group_name: (field, pattern_index, value_group_index)})
+    """
+    alternatives = []
+    group_fields = {}
+    group_index = 0
+    
+    for field, patterns in pattern_key:
+        for pattern_index, pattern in enumerate(patterns):
+            group_name = f"{field}__{pattern_index}"
+            alternatives.append(f"(?P<{group_name}>{pattern})")
+            group_index += 1
+            # Die erste Gruppe innerhalb des Patterns enthält den Wert
+            group_fields[group_name] = (field, pattern_index, group_index + 1)
+            group_index += re.compile(pattern).groups
+    
+    scanner = re.compile('(?=' + '|'.join(alternatives) + ')', re.IGNORECASE)
+    return scanner, group_fields
+
+
+def _scan_rental_text(
+    scanner: re.Pattern,
+    group_fields: Dict[str, Tuple[str, int, int]],
+    text: str,
+    candidates: Dict[str, Dict[int, str]],
+    open_end: bool = False
+) -> None:
+    """
+    Erste Treffer je Pattern aus einem Textstück in candidates übernehmen
+    
+    open_end: Text geht auf der nächsten Seite weiter - Werte, die bis ans Ende
+    reichen, könnten dort noch länger werden und kommen erst im nächsten Fenster dran
+    """
+    for match in scanner.finditer(text):
+        field, pattern_index, value_group = group_fields[match.lastgroup]
+        if pattern_index in candidates[field]:
+            continue
+        if open_end and match.end(value_group) == len(text):
+            continue
+        candidates[field][pattern_index] = match.group(value_group)
+
+
+def _rental_field_final(field: str, found: Dict[int, str]) -> bool:
+    """
+    True, wenn weitere Seiten den Wert eines Feldes nicht mehr ändern können:
+    jedes Pattern mit höherer Priorität als der gültige Treffer hat schon getroffen
+    """
+    for pattern_index in range(len(config.RENTAL_CONTRACT_PATTERNS[field])):
+        if pattern_index not in found:
+            return False
+        if _parse_rental_value(field, found[pattern_index]) is not None:
+            return True
+    return True
+
+
+def _resolve_rental_field(field: str, found: Dict[int, str]) -> Any:
+    """
+    Wert eines Feldes nach Pattern-Priorität (wie bisher: erstes Pattern, dessen
+    Treffer sich parsen lässt)
+    """
+    for pattern_index in sorted(found):
+        value = _parse_rental_value(field, found[pattern_index])
+        if value is not None:
+            return value
+    return None
+
+
+def _parse_rental_value(field: str, raw_value: str) -> Any:
+    if field == 'mieter_name':
+        return raw_value.strip()
+    
+    if field == 'mietbeginn':
+        # Try to parse date
+        for fmt in ['%d.%m.%Y', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%y']:
+            try:
+                return datetime.strptime(raw_value, fmt).date()
+            except:
+                pass
+        return None
+    
+    # Beträge: Grundmiete/Kaltmiete, Betriebskosten-, Heizkostenvorauszahlung
+    try:
+        amount_str = raw_value.replace('.', '').replace(',', '.').replace('--', '')
+        return float(amount_str)
+    except:
+        return None
+
+
 def extract_bank_statement(pdf_path: str, year: int) -> Dict[str, Any]:
     """
     Extrahiert Mietzahlungen aus Kontoauszug
@@ -522,120 +1350,303 @@ def extract_bank_statement(pdf_path: str, year: int) -> Dict[str, Any]:
     Zeile 1: Emanuela Mingo +1.100,00 EUR
     Zeile 2: MIETE LIETZENBURGER STR 3 EREF: ... 24.08.2023
     
+    Strukturierte Exporte (CAMT.053 .xml, MT940 .sta, CSV) werden direkt gelesen
+    (siehe bank_import) - gleiches Ergebnis-Format, ohne PDF-Layoutanalyse.
+    
     Returns:
         {
-            'payments': [{'date': date, 'amount': float}, ...],
+            'payments': [{'date': date, 'amount': float, 'payer': str}, ...],
             'payment_count': int,
             'avg_payment': float,
             'first_payment_date': date,
             'last_payment_date': date,
             'months_covered': [1, 2, 3, ...],
             'missing_months': [10, 11, 12],
-            'is_full_year': bool
+            'is_full_year': bool,
+            'source_format': str,   # 'pdf', 'camt053', 'mt940' oder 'csv'
+            'memory': {'peak_rss_mb': float, ...}
         }
     """
-    payments = []
+    with track_memory() as memory:
+        result = _summarize_bank_payments(iter_bank_payments(pdf_path, year))
+    result['source_format'] = detect_bank_format(pdf_path)
+    result['memory'] = memory.report()
+    return result
+
+
+def iter_bank_payments(pdf_path: str, year: int = None, stop_early: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Liefert Mietzahlungen Seite für Seite (Generator, konstanter Speicherbedarf)
+    
+    Jede Seite wird nach der Verarbeitung wieder freigegeben. Mit stop_early
+    wird abgebrochen, sobald die Daten des Kontoauszugs das angefragte Jahr
+    verlassen haben (funktioniert für auf- und absteigend sortierte Auszüge).
+    
+    Args:
+        pdf_path: Pfad zur PDF-Datei
+        year: Nur Zahlungen aus diesem Jahr (None = alle)
+        stop_early: Restliche Seiten nicht mehr lesen, sobald das Jahr vorbei ist
+    
+    Yields:
+        {'date': date, 'amount': float, 'payer': str}  # payer = erkanntes Keyword aus der Config
+    """
+    bank_format = detect_bank_format(pdf_path)
+    if bank_format != 'pdf':
+        # Strukturierter Export: Buchungen exakt, Jahresfilter pro Buchung
+        for payment in _match_rent_payments(iter_structured_transactions(pdf_path, bank_format)):
+            if year is None or payment['date'].year == year:
+                yield payment
+        return
     
-    with pdfplumber.open(pdf_path) as pdf:
+    seen_until_year = False   # Seite mit Daten <= year gesehen (aufsteigend)
+    seen_from_year = False    # Seite mit Daten >= year gesehen (absteigend)
+    
+    with open_pdf(pdf_path) as pdf:
         for page in pdf.pages:
-            text = page.extract_text()
-            lines = text.split('\n')
+            text = extract_page_text(page, accept=is_bank_page_text)
+            page.close()
             
-            # Process lines in pairs (name+amount, then description+date)
-            for i in range(len(lines) - 1):
-                current_line = lines[i]
-                next_line = lines[i + 1]
-                
-                # Check if current line has name and amount
-                has_name = any(
-                    keyword.lower() in current_line.lower() 
-                    for keyword in config.BANK_STATEMENT_PATTERNS['mietzahlung']
-                )
-                
-                if has_name and 'EUR' in current_line:
-                    # Extract amount from current line
-                    amount_match = re.search(r'([+-]?\s*[\d.,]+)\s*EUR', current_line)
-                    
-                    if not amount_match:
-                        continue
-                    
-                    # Parse amount
+            for payment in _parse_bank_page(text):
+                if year is None or payment['date'].year == year:
+                    yield payment
+            
+            if year is None or not stop_early:
+                continue
+            
+            # Alle Daten auf der Seite (Buchungs-, Valuta-, Auszugsdatum)
+            page_years = [int(y) for y in re.findall(r'\d{2}\.\d{2}\.(\d{4})', text)]
+            if not page_years:
+                continue
+            
+            # Ganze Seite nach dem Jahr, nachdem das Jahr schon erreicht war -> fertig
+            if min(page_years) > year and seen_until_year:
+                break
+            if max(page_years) < year and seen_from_year:
+                break
+            
+            seen_until_year = seen_until_year or min(page_years) <= year
+            seen_from_year = seen_from_year or max(page_years) >= year
+
+
+_BANK_AMOUNT = re.compile(r'\d,\d{2}\s*EUR')
+
+
+def is_bank_page_text(text: str) -> bool:
+    """
+    Prüfung für die schnelle Textebene einer Kontoauszugsseite: stehen Beträge
+    auf der Seite, müssen sich Buchungen mit Zahler daraus lesen lassen
+    (sonst z.B. Zahler und Betrag auf getrennten Zeilen -> pdfplumber)
+    """
+    if not _BANK_AMOUNT.search(text):
+        return True
+    transactions = list(parse_bank_transactions(text))
+    return bool(transactions) and all(re.search(r'[^\W\d_]', t['counterparty']) for t in transactions)
+
+
+def _parse_bank_page(text: str) -> Iterator[Dict[str, Any]]:
+    """
+    Zahlungen einer Kontoauszugsseite (alle Jahre)
+    """
+    return _match_rent_payments(parse_bank_transactions(text))
+
+
+def _match_rent_payments(transactions: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Mietzahlungen aus Buchungen (PDF-Seite oder strukturierter Export) über die
+    Zahler-Keywords aus config.BANK_STATEMENT_PATTERNS['mietzahlung']
+    """
+    keywords = config.BANK_STATEMENT_PATTERNS['mietzahlung']
+    payer_matcher = _keyword_matcher(tuple(keywords))
+    
+    for transaction in transactions:
+        # Check if current line has name and amount
+        payer_match = payer_matcher.search(transaction['line'].lower())
+        amount = abs(transaction['amount'])
+        
+        # Add payment if we found a date (year filter happens in iter_bank_payments)
+        if payer_match and amount > 0:
+            yield {
+                'date': transaction['date'],
+                'amount': amount,
+                'payer': _canonical_keyword(keywords, payer_match.group(0))
+            }
+
+
+def parse_bank_transactions(text: str) -> Iterator[Dict[str, Any]]:
+    """
+    Alle Buchungen einer Kontoauszugsseite (unabhängig vom Zahler)
+    
+    Format: 
+    Zeile 1: Emanuela Mingo +1.100,00 EUR
+    Zeile 2: MIETE LIETZENBURGER STR 3 EREF: ... 24.08.2023
+    
+    Yields:
+        {
+            'date': date,
+            'amount': float,        # mit Vorzeichen
+            'counterparty': str,    # Zeile 1 ohne Betrag
+            'purpose': str,         # Zeile 2 (Verwendungszweck)
+            'line': str             # Zeile 1 unverändert
+        }
+    """
+    lines = text.split('\n')
+    description_matcher = _keyword_matcher(PAYMENT_DESCRIPTION_KEYWORDS)
+    
+    # Process lines in pairs (name+amount, then description+date)
+    for i in range(len(lines) - 1):
+        current_line = lines[i]
+        next_line = lines[i + 1]
+        
+        if 'EUR' not in current_line:
+            continue
+        
+        # Extract amount from current line
+        amount_match = re.search(r'([+-]?\s*[\d.,]+)\s*EUR', current_line)
+        
+        if not amount_match:
+            continue
+        
+        # Parse amount (mit Vorzeichen: Gutschrift +, Lastschrift -)
+        try:
+            amt_str = amount_match.group(1).replace('+', '').replace(' ', '').replace('.', '').replace(',', '.')
+            amount = float(amt_str)
+        except:
+            continue
+        
+        payment_date = None
+        
+        # FORMAT 1: Check if next line has payment description (Emanuela Mingo format)
+        # "MIETE LIETZENBURGER STR 3 EREF: ... 24.08.2023"
+        has_payment_desc = description_matcher.search(next_line.lower()) is not None
+        
+        if has_payment_desc:
+            # Extract date from next line (rightmost date)
+            date_matches = re.findall(r'(\d{2}\.\d{2}\.\d{4})', next_line)
+            
+            if date_matches:
+                # Parse date (take last/rightmost date)
+                try:
+                    payment_date = datetime.strptime(date_matches[-1], '%d.%m.%Y').date()
+                except:
+                    pass
+        
+        # FORMAT 2: Check if next line has MM/YY format (Vinayak Gopi format)
+        # "miete10/24                           Valuta 03.10.2024 - 04.10.2024"
+        # OR "12/24                                    03.12.2024"
+        if not payment_date:
+            # Try to find date in DD.MM.YYYY format
+            date_matches = re.findall(r'(\d{2}\.\d{2}\.\d{4})', next_line)
+            if date_matches:
+                try:
+                    # Take the FIRST date (not last, as in Format 1)
+                    payment_date = datetime.strptime(date_matches[0], '%d.%m.%Y').date()
+                except:
+                    pass
+            
+            # If still no date, try to parse MM/YY at start of line
+            if not payment_date:
+                month_year_match = re.search(r'^(\d{1,2})/(\d{2})', next_line)
+                if month_year_match:
                     try:
-                        amt_str = amount_match.group(1).replace('+', '').replace(' ', '').replace('.', '').replace(',', '.')
-                        amount = abs(float(amt_str))
+                        month = int(month_year_match.group(1))
+                        year_short = int(month_year_match.group(2))
+                        # Assume 20XX for year
+                        full_year = 2000 + year_short
+                        # Use first day of month as payment date
+                        payment_date = datetime(full_year, month, 1).date()
                     except:
-                        continue
-                    
-                    payment_date = None
-                    
-                    # FORMAT 1: Check if next line has payment description (Emanuela Mingo format)
-                    # "MIETE LIETZENBURGER STR 3 EREF: ... 24.08.2023"
-                    has_payment_desc = any(
-                        keyword.lower() in next_line.lower() 
-                        for keyword in ['miete', 'rent', 'lietzenburger']
-                    )
-                    
-                    if has_payment_desc:
-                        # Extract date from next line (rightmost date)
-                        date_matches = re.findall(r'(\d{2}\.\d{2}\.\d{4})', next_line)
-                        
-                        if date_matches:
-                            # Parse date (take last/rightmost date)
-                            try:
-                                payment_date = datetime.strptime(date_matches[-1], '%d.%m.%Y').date()
-                            except:
-                                pass
-                    
-                    # FORMAT 2: Check if next line has MM/YY format (Vinayak Gopi format)
-                    # "miete10/24                           Valuta 03.10.2024 - 04.10.2024"
-                    # OR "12/24                                    03.12.2024"
-                    if not payment_date:
-                        # Try to find date in DD.MM.YYYY format
-                        date_matches = re.findall(r'(\d{2}\.\d{2}\.\d{4})', next_line)
-                        if date_matches:
-                            try:
-                                # Take the FIRST date (not last, as in Format 1)
-                                payment_date = datetime.strptime(date_matches[0], '%d.%m.%Y').date()
-                            except:
-                                pass
-                        
-                        # If still no date, try to parse MM/YY at start of line
-                        if not payment_date:
-                            month_year_match = re.search(r'^(\d{1,2})/(\d{2})', next_line)
-                            if month_year_match:
-                                try:
-                                    month = int(month_year_match.group(1))
-                                    year_short = int(month_year_match.group(2))
-                                    # Assume 20XX for year
-                                    full_year = 2000 + year_short
-                                    # Use first day of month as payment date
-                                    payment_date = datetime(full_year, month, 1).date()
-                                except:
-                                    pass
-                    
-                    # Add payment if we found a date and it's in the requested year
-                    if payment_date and payment_date.year == year and amount > 0:
-                        payments.append({
-                            'date': payment_date,
-                            'amount': amount
-                        })
+                        pass
+        
+        if payment_date:
+            counterparty = current_line[:amount_match.start()] + current_line[amount_match.end():]
+            yield {
+                'date': payment_date,
+                'amount': amount,
+                'counterparty': ' '.join(counterparty.split()),
+                'purpose': ' '.join(next_line.split()),
+                'line': current_line
+            }
+
+
+# Verwendungszweck-Keywords für Format 1 ("MIETE LIETZENBURGER STR 3 EREF: ...")
+PAYMENT_DESCRIPTION_KEYWORDS = ('miete', 'rent', 'lietzenburger')
+
+
+@lru_cache(maxsize=None)
+def _keyword_matcher(keywords: Tuple[str, ...]) -> re.Pattern:
+    """
+    Kompiliert alle Keywords zu einem Präfixbaum-Regex (Automat, eine Suche pro Zeile)
+    
+    Ersetzt any(keyword.lower() in line.lower() ...). Gesucht wird in der bereits
+    kleingeschriebenen Zeile; gemeinsame Präfixe werden nur einmal geprüft, sodass
+    die Kosten kaum mit der Anzahl der Keywords wachsen. Bei gleicher Startposition
+    gewinnt das längste Keyword. Ohne Keywords trifft der Regex nie (wie any([])).
+    """
+    if not keywords:
+        return re.compile(r'(?!)')
+    
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword.lower():
+            node = node.setdefault(char, {})
+        node[''] = {}  # Ende eines Keywords
+    
+    return re.compile(_trie_to_regex(trie))
+
+
+def _trie_to_regex(node: Dict[str, Dict]) -> str:
+    branches = [re.escape(char) + _trie_to_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    
+    pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        # Keyword endet hier, längere Keywords sind optional (greedy -> längster Treffer)
+        pattern = '(?:' + pattern + ')?'
+    return pattern
+
+
+def _canonical_keyword(keywords: List[str], matched_text: str) -> str:
+    """
+    Schreibweise des Keywords aus der Config für einen Treffer (z.B. 'vinayak' -> 'Vinayak')
+    """
+    matched_lower = matched_text.lower()
+    for keyword in keywords:
+        if keyword.lower() == matched_lower:
+            return keyword
+    return matched_text
+
+
+def _summarize_bank_payments(payments: Iterator[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Baut das Ergebnis-Dict inkrementell aus einem Zahlungs-Stream auf
+    """
+    collected = []
+    months = set()
+    total_amount = 0.0
+    
+    for payment in payments:
+        collected.append(payment)
+        months.add(payment['date'].month)
+        total_amount += payment['amount']
     
     # Sort by date
-    payments.sort(key=lambda x: x['date'])
+    collected.sort(key=lambda x: x['date'])
     
     # Determine which months are covered
-    months_covered = sorted(list(set(p['date'].month for p in payments))) if payments else []
+    months_covered = sorted(months)
     all_months = list(range(1, 13))
     missing_months = [m for m in all_months if m not in months_covered]
     is_full_year = len(missing_months) == 0
     
     # Calculate stats
     result = {
-        'payments': payments,
-        'payment_count': len(payments),
-        'avg_payment': sum(p['amount'] for p in payments) / len(payments) if payments else 0,
-        'first_payment_date': payments[0]['date'] if payments else None,
-        'last_payment_date': payments[-1]['date'] if payments else None,
+        'payments': collected,
+        'payment_count': len(collected),
+        'avg_payment': total_amount / len(collected) if collected else 0,
+        'first_payment_date': collected[0]['date'] if collected else None,
+        'last_payment_date': collected[-1]['date'] if collected else None,
         'months_covered': months_covered,
         'missing_months': missing_months,
         'is_full_year': is_full_year
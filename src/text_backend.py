@@ -0,0 +1,131 @@
+"""
+═══════════════════════════════════════════════════════════════
+TEXT BACKEND - Schnelle Textebene für reine Text-Extraktionen
+═══════════════════════════════════════════════════════════════
+
+Mietvertrag, Kontoauszug und AI-Extraktion brauchen nur den Text einer
+Seite, keine Tabellen. Statt der vollen Zeichen-Layoutanalyse von
+pdfplumber wird die Textebene nativ gelesen:
+
+    'pypdfium2'  - wird mit pdfplumber mitgeliefert (Standard)
+    'pypdf2'     - PyPDF2 aus requirements.txt
+    'pdfplumber' - volle Layoutanalyse wie bisher
+
+Liefert der schnelle Backend eine unplausible Zeilenstruktur (leer,
+Zeichen-für-Zeichen-Zeilen, alles in einer Zeile) oder lehnt die Prüfung
+des Aufrufers den Text ab (accept, z.B. Kontoauszug: Beträge, aber keine
+erkannte Buchung), wird für diese Seite automatisch auf pdfplumber zurückgefallen. Für gescannte Seiten ohne
+Textebene wird der OCR-Text des Dokuments verwendet (ocr.apply_ocr).
+
+Benchmark:
+    python -m src.text_backend data/input/*.pdf
+"""
+
+import sys
+import time
+from glob import glob
+from typing import Callable, Dict, List, Optional
+
+import config
+from .page_cache import CachedPage, open_pdf
+
+BACKENDS: Dict[str, Callable[[CachedPage], str]] = {
+    'pypdfium2': lambda page: page.extract_raw_text(),
+    'pypdf2': lambda page: page.extract_pypdf2_text(),
+    'pdfplumber': lambda page: page.extract_text() or '',
+}
+
+
+def is_plausible_text(text: str) -> bool:
+    """
+    Plausibilitätsprüfung der Zeilenstruktur eines schnellen Backends
+
+    Unplausibel sind: leerer Text, fast nur Ein-Zeichen-Zeilen (Text wurde
+    Zeichen für Zeichen ausgegeben) und überlange Zeilen (Zeilenumbrüche fehlen).
+    """
+    settings = config.TEXT_BACKEND
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines:
+        return False
+
+    average_length = sum(len(line) for line in lines) / len(lines)
+    if not settings['min_avg_line_length'] <= average_length <= settings['max_avg_line_length']:
+        return False
+
+    single_chars = sum(1 for line in lines if len(line) == 1)
+    return single_chars / len(lines) <= settings['max_single_char_line_ratio']
+
+
+def extract_page_text(page: CachedPage, backend: str = None,
+                      accept: Optional[Callable[[str], bool]] = None) -> str:
+    """
+    Text einer Seite über den konfigurierten Backend
+
+    Args:
+        page: Seite aus open_pdf()
+        backend: None = config.TEXT_BACKEND['backend']
+        accept: Zusätzliche Prüfung des schnellen Textes für diese Seitenart
+                (False = Fallback auf pdfplumber)
+
+    Returns:
+        Seitentext ('' wenn die Seite keinen Text hat)
+    """
+    if page.index in page.document.ocr_texts:
+        return page.document.ocr_texts[page.index]
+
+    backend = backend or config.TEXT_BACKEND['backend']
+    if backend == 'pdfplumber':
+        return BACKENDS['pdfplumber'](page)
+
+    try:
+        text = BACKENDS[backend](page)
+    except ImportError:
+        text = ''
+
+    if is_plausible_text(text) and (accept is None or accept(text)):
+        return text
+
+    # Fallback: volle Layoutanalyse (auch für Seiten ohne Textebene)
+    return BACKENDS['pdfplumber'](page)
+
+
+def benchmark(pdf_paths: List[str], backends: List[str] = None) -> List[Dict]:
+    """
+    Vergleicht die Backends auf den angegebenen PDFs (ohne Seiten-Cache)
+
+    Returns:
+        [{'file', 'backend', 'pages', 'seconds', 'plausible_pages', 'chars'}, ...]
+    """
+    results = []
+    for pdf_path in pdf_paths:
+        for backend in backends or list(BACKENDS):
+            start = time.perf_counter()
+            try:
+                with open_pdf(pdf_path, use_cache=False) as pdf:
+                    texts = [BACKENDS[backend](page) for page in pdf.pages]
+            except ImportError as e:
+                print(f"  ⚠️  {backend}: {e}")
+                continue
+            results.append({
+                'file': pdf_path,
+                'backend': backend,
+                'pages': len(texts),
+                'seconds': time.perf_counter() - start,
+                'plausible_pages': sum(1 for text in texts if is_plausible_text(text)),
+                'chars': sum(len(text) for text in texts)
+            })
+    return results
+
+
+if __name__ == '__main__':
+    paths = sys.argv[1:] or sorted(glob('data/input/*.pdf'))
+    if not paths:
+        print("❌ Keine PDFs angegeben (und keine in data/input/)")
+        sys.exit(1)
+
+    print(f"{'Datei':<40} {'Backend':<12} {'Seiten':>6} {'Sekunden':>9} {'plausibel':>9} {'Zeichen':>9}")
+    for row in benchmark(paths):
+        print(
+            f"{row['file'][-40:]:<40} {row['backend']:<12} {row['pages']:>6} "
+            f"{row['seconds']:>9.3f} {row['plausible_pages']:>9} {row['chars']:>9}"
+        )
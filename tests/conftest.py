@@ -0,0 +1,24 @@
+"""
+Gemeinsame Fixtures: Projektwurzel im Importpfad, Caches im temporären Verzeichnis
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    """Seiten-, Plan-, AI-Cache und Aufzeichnungen je Test in tmp_path"""
+    monkeypatch.setitem(config.PAGE_CACHE, 'dir', str(tmp_path / 'cache' / 'pages'))
+    monkeypatch.setitem(config.WEG_EXTRACTION, 'plan_dir', str(tmp_path / 'cache' / 'weg_plans'))
+    monkeypatch.setitem(config.AI_CACHE, 'dir', str(tmp_path / 'cache' / 'ai'))
+    monkeypatch.setitem(config.AI_BACKEND, 'recordings_dir', str(tmp_path / 'recordings'))
+    monkeypatch.setitem(config.BANK_LEDGER, 'path', str(tmp_path / 'cache' / 'ledger.sqlite3'))
+    monkeypatch.setitem(config.OCR, 'dir', str(tmp_path / 'cache' / 'ocr'))
+    monkeypatch.setitem(config.OCR, 'enabled', False)
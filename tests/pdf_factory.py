@@ -0,0 +1,35 @@
+"""
+Test-PDFs mit reportlab erzeugen
+"""
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Table, TableStyle
+
+STYLES = getSampleStyleSheet()
+GRID = TableStyle([('GRID', (0, 0), (-1, -1), 0.5, colors.black), ('FONTSIZE', (0, 0), (-1, -1), 7)])
+
+# Kostentabelle (Betrag in der vorletzten Spalte) mit Summenzeilen
+COST_ROWS = [
+    ["Kostenart", "Gesamt Betrag", "Verteilung", "Basis", "Anteil", "Betrag", ""],
+    ["Niederschlagsentwässerung", "3.840,51", "Miteigentumsanteile", "10.000,00", "57,00", "21,89", ""],
+    ["Trinkwasseruntersuchung", "4.507,02", "Miteigentumsanteile", "10.000,00", "57,00", "25,69", ""],
+    ["Grundsteuer", "44.047,37", "Miteigentumsanteile", "10.000,00", "57,00", "251,07", ""],
+]
+SUMMARY_ROWS = [
+    ["Umlagefähige Kosten:", "", "", "", "", "298,65", ""],
+    ["Nicht umlagefähige Kosten:", "", "", "", "", "300,00", ""],
+]
+
+
+def build_pdf(path, pages):
+    """pages: Liste von Seiten, je Seite Liste aus Textzeilen (str) und Tabellen (list)"""
+    elements = []
+    for index, page in enumerate(pages):
+        if index:
+            elements.append(PageBreak())
+        for part in page:
+            elements.append(Table(part, style=GRID) if isinstance(part, list) else Paragraph(part, STYLES['Normal']))
+    SimpleDocTemplate(str(path), pagesize=A4).build(elements)
+    return str(path)
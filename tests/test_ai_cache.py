@@ -0,0 +1,68 @@
+"""
+AI-Cache: Ablauf, Verdrängung, Umgehen
+"""
+
+import os
+import time
+
+import config
+from src import ai_cache, ai_extractor
+from src.ai_cache import load_response, store_response
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    store_response('ab' * 32, '{"ok": true}', 'gpt-4o-mini')
+    assert load_response('ab' * 32) == '{"ok": true}'
+
+    later = time.time() + (config.AI_CACHE['ttl_days'] + 1) * 86400
+    monkeypatch.setattr(ai_cache.time, 'time', lambda: later)
+
+    assert load_response('ab' * 32) is None
+    assert not ai_cache._entry_path('ab' * 32).exists()
+
+
+def test_least_recently_used_entries_are_evicted_first(monkeypatch):
+    response = '{"text": "' + 'x' * 300 + '"}'
+    monkeypatch.setitem(config.AI_CACHE, 'max_size_mb', 1000 / (1024 * 1024))
+    first, second, third = ('a1' * 32, 'b2' * 32, 'c3' * 32)
+    store_response(first, response, 'gpt-4o-mini')
+    store_response(second, response, 'gpt-4o-mini')
+    # Beide alt, dann first wieder verwendet
+    for number, key in enumerate((first, second), 1):
+        os.utime(ai_cache._entry_path(key), (number * 100, number * 100))
+    assert load_response(first) == response
+
+    store_response(third, response, 'gpt-4o-mini')
+
+    assert load_response(first) == response
+    assert load_response(second) is None
+    assert load_response(third) == response
+
+
+class _CountingBackend:
+    name = 'test'
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+
+    def complete(self, **kwargs):
+        self.calls += 1
+        return self.answer
+
+
+def test_bypass_requests_again_and_refreshes_entry(monkeypatch):
+    backend = _CountingBackend('{"version": 1}')
+    monkeypatch.setattr(ai_extractor, 'get_backend', lambda: backend)
+
+    def request(use_cache=True):
+        return ai_extractor._request_completion('System', 'Prompt', 'PDF-Inhalt', 'Seitentext', use_cache=use_cache)
+
+    assert request() == ('{"version": 1}', False)
+    assert request() == ('{"version": 1}', True)
+    assert backend.calls == 1
+
+    backend.answer = '{"version": 2}'
+    assert request(use_cache=False) == ('{"version": 2}', False)
+    assert backend.calls == 2
+    assert request() == ('{"version": 2}', True)
@@ -0,0 +1,211 @@
+"""
+AI-Extraktion ohne OpenAI: Seitenauswahl, Hybrid-Modus, Prompt-Verdichtung
+"""
+
+import json
+import time
+
+import pytest
+
+import config
+from pdf_factory import COST_ROWS, SUMMARY_ROWS, build_pdf
+from src import ai_extractor, ocr
+from src.ai_extractor import _relevant_weg_pages, extract_weg_data_hybrid
+
+
+def test_relevance_filter_keeps_cost_page_after_cover_letter(tmp_path):
+    pdf = build_pdf(tmp_path / 'weg.pdf', [
+        ["Übersicht Hausgeldabrechnung 2023", "Umlagefähige Kosten: 298,65"],
+        ["Einzelabrechnung", COST_ROWS + SUMMARY_ROWS],
+        ["Erhaltungsrücklage", [["Anfangsbestand", "10.000,00"], ["Endbestand", "12.000,00"]]],
+    ])
+
+    relevant = _relevant_weg_pages(pdf)
+    assert 1 in relevant['pages']
+    assert 2 not in relevant['pages']
+
+
+def test_relevance_filter_sends_everything_without_summary_row(tmp_path):
+    pdf = build_pdf(tmp_path / 'weg.pdf', [
+        ["Sehr geehrte Frau Rosenkranz,"],
+        ["Einzelabrechnung", COST_ROWS],
+    ])
+
+    assert _relevant_weg_pages(pdf) is None
+
+
+class _AvailableBackend:
+    name = 'test'
+
+    def check(self):
+        pass
+
+
+@pytest.fixture
+def uncertain_weg_pdf(tmp_path, monkeypatch):
+    """Abrechnung mit einem unsicheren Posten (Betrag nur in der Gesamtspalte, Ausreißer)"""
+    monkeypatch.setattr(ai_extractor, 'get_backend', lambda: _AvailableBackend())
+    rows = COST_ROWS + [["Aufzug", "5.000,00", "", "", "", "", ""]] + SUMMARY_ROWS
+    return build_pdf(tmp_path / 'weg.pdf', [["Einzelabrechnung", rows]])
+
+
+def test_hybrid_keeps_rule_based_result_when_ai_fails(uncertain_weg_pdf, monkeypatch):
+    def fail(*args, **kwargs):
+        raise ConnectionError("Netzwerk nicht erreichbar")
+    monkeypatch.setattr(ai_extractor, '_request_completion', fail)
+
+    result = extract_weg_data_hybrid(uncertain_weg_pdf, 2023)
+
+    assert result['extraction_method'] == 'rule_based'
+    assert 'Netzwerk' in result['warning']
+    assert 'Aufzug' in [cost['name'] for cost in result['costs']]
+
+
+def _answer_with(monkeypatch, *items):
+    answer = {'umlagefaehige_kosten': [dict([item]) for item in items]}
+    monkeypatch.setattr(ai_extractor, '_request_completion', lambda *args, **kwargs: (json.dumps(answer), False))
+
+
+def test_hybrid_keeps_ai_items_sharing_an_amount(uncertain_weg_pdf, monkeypatch):
+    # Die AI liest die ganze Seite neu: sichere Posten kommen noch einmal mit
+    _answer_with(monkeypatch, ('Niederschlagsentwässerung', 21.89), ('Trinkwasseruntersuchung', 25.69),
+                 ('Grundsteuer', 251.07), ('Aufzug', 21.89))
+
+    result = extract_weg_data_hybrid(uncertain_weg_pdf, 2023)
+
+    assert result['extraction_method'] == 'hybrid'
+    amounts = sorted((cost['name'], cost['amount']) for cost in result['costs'])
+    # Aufzug hat denselben Betrag wie Niederschlagsentwässerung
+    assert amounts == [
+        ('Aufzug', 21.89), ('Grundsteuer', 251.07),
+        ('Niederschlagsentwässerung', 21.89), ('Trinkwasseruntersuchung', 25.69)
+    ]
+
+
+def test_speculative_bank_retry_does_not_wait_for_weg(monkeypatch):
+    calls = []
+
+    def weg(*args, **kwargs):
+        time.sleep(0.5)
+        calls.append(('weg fertig', None))
+        return {'costs': []}
+
+    def bank(path, tenant_name=None, use_cache=True):
+        calls.append(('bank', tenant_name))
+        return {'payments': [{'amount': 850.0}] if tenant_name else []}
+
+    monkeypatch.setattr(ai_extractor, 'extract_weg_data_ai', weg)
+    monkeypatch.setattr(ai_extractor, 'extract_rental_contract_ai', lambda *a, **k: {'tenant_name': 'Max Mustermann'})
+    monkeypatch.setattr(ai_extractor, 'extract_bank_statement_ai', bank)
+
+    result = ai_extractor.extract_all_ai('weg.pdf', 2023, rental_path='mv.pdf', bank_path='konto.pdf',
+                                         speculative_bank=True)
+
+    assert result['bank'] == {'payments': [{'amount': 850.0}]}
+    # Die Wiederholung mit Mieternamen läuft, während die WEG-Abrechnung noch aussteht
+    assert calls == [('bank', None), ('bank', 'Max Mustermann'), ('weg fertig', None)]
+
+
+def test_hybrid_skips_certain_items_under_another_name(uncertain_weg_pdf, monkeypatch):
+    _answer_with(monkeypatch, ('Regenwasser', 21.89), ('Trinkwasser', 25.69),
+                 ('Grundbesitzabgaben', 251.07), ('Aufzug', 50.0))
+
+    result = extract_weg_data_hybrid(uncertain_weg_pdf, 2023)
+
+    amounts = sorted((cost['name'], cost['amount']) for cost in result['costs'])
+    assert amounts == [
+        ('Aufzug', 50.0), ('Grundsteuer', 251.07),
+        ('Niederschlagsentwässerung', 21.89), ('Trinkwasseruntersuchung', 25.69)
+    ]
+    assert result['total'] == pytest.approx(348.65)
+
+
+def test_page_selection_only_ocrs_selected_pages(tmp_path, monkeypatch):
+    # Drei Seiten ohne Textebene (kürzer als config.OCR['min_text_chars'])
+    pdf = build_pdf(tmp_path / 'scan.pdf', [["1"], ["2"], ["3"]])
+    recognised = []
+
+    def fake_ocr(pdf_path, index, dpi, lang):
+        recognised.append(index)
+        return f"Erkannter Text von Seite {index + 1}"
+    monkeypatch.setitem(config.OCR, 'enabled', True)
+    monkeypatch.setitem(config.OCR, 'workers', 1)
+    monkeypatch.setattr(ocr, 'OCR_AVAILABLE', True)
+    monkeypatch.setattr(ocr, '_ocr_page', fake_ocr)
+
+    pages = ai_extractor._extract_pdf_pages(pdf, page_indices=[1])
+
+    assert recognised == [1]
+    assert 'Erkannter Text von Seite 2' in pages[0]
+
+
+def _statement_pages(count, changed=None, changed_text=''):
+    return [
+        (index, "Hausverwaltung Muster GmbH\nObjekt Lietzenburger Str. 3\n"
+                f"Posten {index}: {index + 1},00 {changed_text if index == changed else ''}\n"
+                f"Seite {index + 1} von {count}")
+        for index in range(count)
+    ]
+
+
+def test_chunks_follow_fixed_page_ranges():
+    chunks = ai_extractor._chunk_pages(_statement_pages(25), pages_per_chunk=10, max_tokens=12000)
+    edited = ai_extractor._chunk_pages(_statement_pages(25, changed=3, changed_text='korrigiert'),
+                                       pages_per_chunk=10, max_tokens=12000)
+    grown = ai_extractor._chunk_pages(_statement_pages(25, changed=3, changed_text='x' * 4000),
+                                      pages_per_chunk=10, max_tokens=500)
+
+    assert len(chunks) == 3
+    # Nur der Abschnitt der geänderten Seite ändert sich - auch wenn er geteilt werden muss
+    assert edited[0] != chunks[0] and edited[1:] == chunks[1:]
+    assert grown[-2:] == ai_extractor._chunk_pages(_statement_pages(25), pages_per_chunk=10, max_tokens=500)[-2:]
+    # Verdichtet wird je Abschnitt: jeder Abschnitt behält den Briefkopf einmal
+    assert [chunk.count("Hausverwaltung Muster GmbH") for chunk in chunks] == [1, 1, 1]
+
+
+@pytest.mark.parametrize('delta_size', [1, 7, 1000])
+def test_streamed_array_items_only_at_top_level(delta_size):
+    response = json.dumps({
+        'hinweis': 'Liste "umlagefaehige_kosten": [folgt]',
+        'meta': {'umlagefaehige_kosten': [{'Verschachtelt': 1.0}]},
+        'umlagefaehige_kosten': [{'Grundsteuer': 251.07}, {'Hausstrom': 44.1, 'Notiz': 'a]b'}],
+        'gesamt_summe': 295.17
+    }, ensure_ascii=False)
+    deltas = [response[i:i + delta_size] for i in range(0, len(response), delta_size)]
+
+    items = list(ai_extractor._iter_json_array_items(deltas, 'umlagefaehige_kosten'))
+
+    assert items == [{'Grundsteuer': 251.07}, {'Hausstrom': 44.1, 'Notiz': 'a]b'}]
+
+
+def test_compaction_keeps_content_and_saves_tokens():
+    pages = [
+        "Hausverwaltung Muster GmbH\nObjekt Lietzenburger Str. 3\n"
+        f"Posten {index}:   1.234,56 EUR am 01.02.2024\nHausgeld monatlich 250,00\n"
+        f"Seite {index + 1} von 3"
+        for index in range(3)
+    ]
+
+    compacted = ai_extractor._compact_pages(pages)
+    lines = [page.splitlines() for page in compacted['pages']]
+
+    # Briefkopf nur auf der ersten Seite, Seitenzahlen entfallen
+    assert lines[0][:2] == ["Hausverwaltung Muster GmbH", "Objekt Lietzenburger Str. 3"]
+    assert not any("Muster GmbH" in line for page in lines[1:] for line in page)
+    assert not any(line.startswith("Seite") for page in lines for line in page)
+    # Wiederkehrende Zeilen mit Betrag bleiben, Inhalt in Reihenfolge erhalten
+    assert [page[-2:] for page in lines] == [
+        [f"Posten {index}: 1234,56 EUR am 01.02.2024", "Hausgeld monatlich 250,00"]
+        for index in range(3)
+    ]
+    assert compacted['saved_tokens'] > 0 and 0 < compacted['saved_ratio'] < 1
+
+
+def test_compaction_can_be_disabled(monkeypatch):
+    monkeypatch.setitem(config.AI_EXTRACTION, 'compact_prompt', False)
+    pages = _statement_pages(3)
+
+    texts, saved_tokens, _ = ai_extractor._format_pages(pages)
+
+    assert saved_tokens == 0
+    assert texts == [f"--- Seite {index + 1} ---\n{text}" for index, text in pages]
@@ -0,0 +1,137 @@
+"""
+Kontoauszüge: CAMT.053, CSV und PDF-Textebene
+"""
+
+import re
+from datetime import date
+
+import pytest
+
+import config
+from pdf_factory import build_pdf
+from src import pdf_extractor
+from src.bank_import import iter_camt053_transactions, iter_csv_transactions
+from src.page_cache import CachedPage
+from src.pdf_extractor import (
+    _keyword_matcher, _match_rent_payments, extract_bank_statement, iter_bank_payments, parse_bank_transactions
+)
+from src.text_backend import extract_page_text
+
+CAMT = """<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02"><BkToCstmrStmt><Stmt>
+<Ntry><Amt Ccy="EUR">850.00</Amt><CdtDbtInd>CRDT</CdtDbtInd><ValDt><Dt>2023-03-01</Dt></ValDt>
+  <AddtlNtryInf>Miete Maerz</AddtlNtryInf></Ntry>
+<Ntry><Amt Ccy="EUR"></Amt><CdtDbtInd>CRDT</CdtDbtInd><ValDt><Dt>2023-03-02</Dt></ValDt>
+  <AddtlNtryInf>Betrag fehlt</AddtlNtryInf></Ntry>
+<Ntry><CdtDbtInd>DBIT</CdtDbtInd><ValDt><Dt>2023-03-03</Dt></ValDt>
+  <NtryDtls><TxDtls><RmtInf><Ustrd>ohne Amt</Ustrd></RmtInf></TxDtls></NtryDtls></Ntry>
+<Ntry><Amt Ccy="EUR">120.50</Amt><CdtDbtInd>DBIT</CdtDbtInd><ValDt><Dt>2023-03-04</Dt></ValDt>
+  <AddtlNtryInf>Hausgeld</AddtlNtryInf></Ntry>
+</Stmt></BkToCstmrStmt></Document>
+"""
+
+
+def test_camt_skips_entries_without_amount(tmp_path, capsys):
+    path = tmp_path / 'auszug.xml'
+    path.write_text(CAMT, encoding='utf-8')
+
+    transactions = list(iter_camt053_transactions(str(path)))
+
+    assert [(t['date'], t['amount']) for t in transactions] == [
+        (date(2023, 3, 1), 850.0), (date(2023, 3, 4), -120.5)
+    ]
+    assert capsys.readouterr().out.count('ohne gültigen Betrag') == 2
+
+
+def test_csv_utf8_detected_when_sample_cuts_a_character(tmp_path):
+    header = "Buchungstag;Betrag;Name;Verwendungszweck\n"
+    filler = "01.02.2023;-10,00;Bäckerei;Brötchen\n" * 100
+    row = "01.03.2023;850,00;Max Mustermann;"
+    padding = "x" * (4095 - len((header + filler + row + "Miete M").encode('utf-8')))
+    # "ä" beginnt genau beim letzten Byte der 4096-Byte-Stichprobe
+    content = header + filler + row + padding + "Miete März\n"
+    assert content.encode('utf-8')[4095:4097] == "ä".encode('utf-8')
+    path = tmp_path / 'umsaetze.csv'
+    path.write_bytes(content.encode('utf-8'))
+
+    transactions = list(iter_csv_transactions(str(path)))
+
+    assert transactions[0]['counterparty'] == 'Bäckerei'
+    assert transactions[-1]['purpose'].endswith('Miete März')
+    assert transactions[-1]['amount'] == 850.0
+
+
+def test_pdf_bank_page_falls_back_when_fast_text_splits_payer_and_amount(tmp_path, monkeypatch):
+    pdf = build_pdf(tmp_path / 'konto.pdf', [[
+        "Kontoauszug 2023",
+        "Emanuela Mingo +1.100,00 EUR", "MIETE LIETZENBURGER STR 3 EREF: M1 01.03.2023",
+        "Stadtwerke Berlin -45,00 EUR", "ABSCHLAG STROM 02.03.2023",
+        "Emanuela Mingo +1.100,00 EUR", "MIETE LIETZENBURGER STR 3 EREF: M2 01.04.2023",
+    ]])
+
+    def split_text(page):
+        # Wie PyPDF2 bei manchen Auszügen: Zahler und Betrag auf getrennten Zeilen
+        text = page.extract_text()
+        return re.sub(r' ([+-][\d.,]+ EUR)', r'\n\1', text)
+    monkeypatch.setattr(CachedPage, 'extract_pypdf2_text', split_text)
+    monkeypatch.setitem(config.TEXT_BACKEND, 'backend', 'pypdf2')
+
+    result = extract_bank_statement(pdf, 2023)
+
+    assert result['payment_count'] == 2
+
+
+def test_no_payer_keywords_match_no_payments(monkeypatch):
+    assert _keyword_matcher(()).search('emanuela mingo +1.100,00 eur') is None
+    assert _keyword_matcher(('mingo', 'miete')).search('emanuela mingo').group() == 'mingo'
+
+    monkeypatch.setitem(config.BANK_STATEMENT_PATTERNS, 'mietzahlung', [])
+    transactions = parse_bank_transactions(
+        "Emanuela Mingo +1.100,00 EUR\nMIETE LIETZENBURGER STR 3 EREF: M1 01.03.2023"
+    )
+    assert list(_match_rent_payments(transactions)) == []
+
+
+@pytest.mark.parametrize('amounts', [
+    ("1.100,00", "-45,50", "12.345,67"),
+    ("1,100.00", "-45.50", "12,345.67"),
+])
+def test_csv_amounts_with_thousands_separators(tmp_path, amounts):
+    rows = [f"0{month}.03.2023;{amount};Max Mustermann;Miete" for month, amount in enumerate(amounts, 1)]
+    path = tmp_path / 'umsaetze.csv'
+    path.write_text("Buchungstag;Betrag;Name;Verwendungszweck\n" + "\n".join(rows) + "\n", encoding='utf-8')
+
+    transactions = list(iter_csv_transactions(str(path)))
+
+    assert [t['amount'] for t in transactions] == [1100.0, -45.5, 12345.67]
+
+
+def _yearly_statement(tmp_path, years):
+    return build_pdf(tmp_path / 'konto.pdf', [
+        [f"Kontoauszug {year}",
+         "Emanuela Mingo +1.100,00 EUR", f"MIETE LIETZENBURGER STR 3 EREF: M1 01.03.{year}",
+         "Emanuela Mingo +1.100,00 EUR", f"MIETE LIETZENBURGER STR 3 EREF: M2 01.04.{year}"]
+        for year in years
+    ])
+
+
+@pytest.mark.parametrize('years, read', [
+    ((2021, 2022, 2023, 2024, 2025, 2026), [0, 1, 2, 3]),
+    ((2026, 2025, 2024, 2023, 2022, 2021), [0, 1, 2, 3, 4]),
+])
+def test_bank_payments_stop_after_the_requested_year(tmp_path, monkeypatch, years, read):
+    pdf = _yearly_statement(tmp_path, years)
+    read_pages = []
+
+    def counting_text(page, *args, **kwargs):
+        read_pages.append(page.index)
+        return extract_page_text(page, *args, **kwargs)
+    monkeypatch.setattr(pdf_extractor, 'extract_page_text', counting_text)
+
+    payments = list(iter_bank_payments(pdf, 2023))
+    # Die erste Seite jenseits des Jahres zeigt, dass es vorbei ist - danach wird keine mehr geöffnet
+    assert read_pages == read
+
+    assert payments == list(iter_bank_payments(pdf, 2023, stop_early=False))
+    assert [payment['date'] for payment in payments] == [date(2023, 3, 1), date(2023, 4, 1)]
+    assert extract_bank_statement(pdf, 2023)['payment_count'] == 2
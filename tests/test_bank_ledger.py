@@ -0,0 +1,50 @@
+"""
+Buchungsjournal: Übernahme mehrerer Auszüge
+"""
+
+from src.bank_ledger import BankLedger
+
+HEADER = "Buchungstag;Betrag;Name;Verwendungszweck\n"
+
+
+def write_csv(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(HEADER + ''.join(f"{row}\n" for row in rows), encoding='utf-8')
+    return str(path)
+
+
+def test_ingest_files_reports_every_path(tmp_path):
+    first = write_csv(tmp_path / '2023' / 'umsaetze.csv', [
+        "01.03.2023;850,00;Max Mustermann;Miete Maerz",
+        "01.04.2023;850,00;Max Mustermann;Miete April",
+    ])
+    second = write_csv(tmp_path / '2024' / 'umsaetze.csv', [
+        "01.03.2024;870,00;Max Mustermann;Miete Maerz",
+    ])
+
+    with BankLedger() as ledger:
+        counts = ledger.ingest_files([first, second, first])
+
+    assert counts == [(first, 2), (second, 1), (first, 0)]
+
+
+def test_overlapping_statements_are_deduplicated(tmp_path):
+    first = write_csv(tmp_path / 'jan_feb.csv', [
+        "02.01.2023;850,00;Max Mustermann;Miete Januar",
+        "01.02.2023;850,00;Max Mustermann;Miete Februar",
+        "01.02.2023;850,00;Max Mustermann;Miete Februar",   # zweimal überwiesen - beide zählen
+    ])
+    second = write_csv(tmp_path / 'feb_mar.csv', [
+        "01.02.2023;850,00;Max Mustermann;Miete Februar",
+        "01.02.2023;850,00;Max Mustermann;Miete Februar",
+        "01.03.2023;850,00;Max Mustermann;Miete Maerz",
+    ])
+
+    with BankLedger() as ledger:
+        counts = ledger.ingest_files([first, second])
+        payments = ledger.tenant_payments('Max Mustermann', 2023)
+        statements = {statement['source']: statement for statement in ledger.statements()}
+
+    assert counts == [(first, 3), (second, 1)]
+    assert payments['payment_count'] == 4
+    assert statements['feb_mar.csv']['duplicate_count'] == 2
@@ -0,0 +1,112 @@
+"""
+Gemeinsamer OpenAI-Client gegen den lokalen Stand-in-Server: Rate-Limit, Retries, Verbindungspool
+"""
+
+import threading
+import time
+
+import pytest
+
+import config
+from src import openai_client
+from src.ai_backend import StandinBackend, store_recording
+from src.ai_standin import start_server
+
+openai = pytest.importorskip('openai')
+
+REQUEST = {
+    'model': 'gpt-4o-mini',
+    'messages': [{'role': 'user', 'content': 'Kosten?'}],
+    'max_tokens': 10,
+}
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    """Stand-in-Server ohne Latenz, frischer Client und Limiter je Test"""
+    server = start_server('127.0.0.1', 0)
+    url = f"http://127.0.0.1:{server.server_port}/v1"
+    monkeypatch.setitem(config.AI_BACKEND, 'standin_url', url)
+    monkeypatch.setitem(config.AI_BACKEND, 'latency_s', 0)
+    monkeypatch.setitem(config.AI_BACKEND, 'latency_jitter_s', 0)
+    monkeypatch.setitem(config.AI_BACKEND, 'tokens_per_second', 0)
+    monkeypatch.setitem(config.OPENAI_CLIENT, 'backoff_base', 0.01)
+    openai_client.reset_client()
+    store_recording(REQUEST, '{"ok": true}')
+
+    yield server
+
+    server._errors.clear()  # nicht abgerufene Fehler nicht in den nächsten Test tragen
+    openai_client.reset_client()
+
+
+def test_token_bucket_throttles_requests(standin, monkeypatch):
+    monkeypatch.setitem(config.OPENAI_CLIENT, 'requests_per_minute', 600)  # 10 pro Sekunde
+    client = openai_client.new_client(config.AI_BACKEND['standin_url'], 'test')
+    openai_client.get_limiter().requests.available = 0  # Bucket leer
+
+    started = time.monotonic()
+    for _ in range(3):
+        openai_client.chat_completion(client=client, **REQUEST)
+
+    assert time.monotonic() - started >= 0.25
+    client.close()
+
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_retries_transient_errors(standin, status):
+    client = openai_client.new_client(config.AI_BACKEND['standin_url'], 'test')
+    requests_before = standin.requests
+    standin.inject_errors(status, count=2, retry_after=0 if status == 429 else None)
+
+    response = openai_client.chat_completion(client=client, **REQUEST)
+
+    assert response.choices[0].message.content == '{"ok": true}'
+    assert standin.requests - requests_before == 3
+    client.close()
+
+
+def test_gives_up_after_max_retries(standin, monkeypatch):
+    monkeypatch.setitem(config.OPENAI_CLIENT, 'max_retries', 1)
+    client = openai_client.new_client(config.AI_BACKEND['standin_url'], 'test')
+    requests_before = standin.requests
+    standin.inject_errors(429, count=2, retry_after=0)
+
+    with pytest.raises(openai.RateLimitError):
+        openai_client.chat_completion(client=client, **REQUEST)
+    assert standin.requests - requests_before == 2
+    client.close()
+
+
+def test_client_errors_are_not_retried(standin):
+    client = openai_client.new_client(config.AI_BACKEND['standin_url'], 'test')
+    requests_before = standin.requests
+    standin.inject_errors(400)
+
+    with pytest.raises(openai.BadRequestError):
+        openai_client.chat_completion(client=client, **REQUEST)
+    assert standin.requests - requests_before == 1
+    client.close()
+
+
+def test_concurrent_calls_share_one_pooled_client(standin, monkeypatch):
+    monkeypatch.setitem(config.OPENAI_CLIENT, 'max_concurrent', 2)
+    backend = StandinBackend()
+    connections_before = standin.connections
+    clients, answers = [], []
+
+    def call():
+        clients.append(backend._client())
+        answers.append(backend.complete(**REQUEST))
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert answers == ['{"ok": true}'] * 8
+    assert len(clients) == 8 and all(client is clients[0] for client in clients)
+    # Verbindungen werden über Keep-Alive wiederverwendet statt pro Anfrage neu aufgebaut
+    assert standin.connections - connections_before < len(threads) / 2
+    clients[0].close()
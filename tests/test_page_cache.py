@@ -0,0 +1,62 @@
+"""
+Seiten-Cache: Treffer, Versionierung, nicht beschreibbares Cache-Verzeichnis
+"""
+
+import pytest
+
+import config
+from pdf_factory import COST_ROWS, SUMMARY_ROWS, build_pdf
+from src import page_cache
+from src.pdf_extractor import extract_weg_data
+
+
+def test_unwritable_cache_dir_only_warns(tmp_path, monkeypatch, capsys):
+    blocker = tmp_path / 'blocker'
+    blocker.write_text('kein Verzeichnis')
+    monkeypatch.setitem(config.PAGE_CACHE, 'enabled', True)
+    monkeypatch.setitem(config.PAGE_CACHE, 'dir', str(blocker / 'pages'))
+    pdf = build_pdf(tmp_path / 'weg.pdf', [["Einzelabrechnung", COST_ROWS + SUMMARY_ROWS]])
+
+    result = extract_weg_data(pdf, 2023)
+
+    assert result['reconciliation']['status'] == 'ok'
+    assert capsys.readouterr().out.count('Seiten-Cache nicht beschreibbar') == 1
+
+
+@pytest.fixture
+def cached_weg_pdf(tmp_path, monkeypatch):
+    monkeypatch.setitem(config.PAGE_CACHE, 'enabled', True)
+    monkeypatch.setitem(config.WEG_EXTRACTION, 'plans', False)
+    return build_pdf(tmp_path / 'weg.pdf', [["Einzelabrechnung", COST_ROWS + SUMMARY_ROWS]])
+
+
+def _count_pdfplumber_opens(monkeypatch):
+    opened = []
+    real_open = page_cache.pdfplumber.open
+
+    def counting_open(*args, **kwargs):
+        opened.append(args[0])
+        return real_open(*args, **kwargs)
+    monkeypatch.setattr(page_cache.pdfplumber, 'open', counting_open)
+    return opened
+
+
+def test_cache_hit_skips_pdfplumber(cached_weg_pdf, monkeypatch):
+    first = extract_weg_data(cached_weg_pdf, 2023)
+    opened = _count_pdfplumber_opens(monkeypatch)
+
+    second = extract_weg_data(cached_weg_pdf, 2023)
+
+    assert opened == []
+    assert second['costs'] == first['costs']
+
+
+def test_extractor_version_bump_invalidates_cache(cached_weg_pdf, monkeypatch):
+    first = extract_weg_data(cached_weg_pdf, 2023)
+    monkeypatch.setattr(page_cache, 'EXTRACTOR_VERSION', page_cache.EXTRACTOR_VERSION + 1)
+    opened = _count_pdfplumber_opens(monkeypatch)
+
+    second = extract_weg_data(cached_weg_pdf, 2023)
+
+    assert opened
+    assert second['costs'] == first['costs']
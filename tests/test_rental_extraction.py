@@ -0,0 +1,53 @@
+"""
+Mietvertrag: seitenweiser Scan mit vorzeitigem Abbruch
+"""
+
+import pytest
+
+import config
+from pdf_factory import build_pdf
+from src.pdf_extractor import extract_rental_contract
+
+FIELDS = [
+    "Mieter: Max Mustermann",
+    "Mietbeginn: 01.05.2020",
+    "Betriebskostenvorauszahlung: 180,00",
+    "Heizung: 70,00",
+]
+
+
+@pytest.fixture
+def contract_pdf(tmp_path):
+    def build(pages):
+        return build_pdf(tmp_path / 'mietvertrag.pdf', pages)
+    return build
+
+
+@pytest.mark.parametrize('early_exit', [True, False])
+def test_higher_priority_pattern_on_later_page_wins(contract_pdf, early_exit):
+    # "Kaltmiete" (2. Pattern) steht vor "Grundmiete" (1. Pattern)
+    pdf = contract_pdf([FIELDS + ["Kaltmiete: 700,00"], ["Grundmiete: 650,00"]])
+
+    result = extract_rental_contract(pdf, early_exit=early_exit)
+
+    assert result['monthly_rent'] == 650.0
+    assert result['monthly_prepayment'] == 250.0
+
+
+@pytest.mark.parametrize('early_exit', [True, False])
+def test_value_across_page_break(contract_pdf, early_exit):
+    pdf = contract_pdf([FIELDS + ["Grundmiete:"], ["650,00"]])
+
+    result = extract_rental_contract(pdf, early_exit=early_exit)
+
+    assert result['monthly_rent'] == 650.0
+
+
+def test_memory_budget_reopens_document_between_pages(contract_pdf, monkeypatch):
+    monkeypatch.setitem(config.MEMORY, 'budget_mb', 1)  # immer überschritten
+    pdf = contract_pdf([FIELDS + ["Kaltmiete: 700,00"], ["Seite 2"], ["Grundmiete: 650,00"]])
+
+    result = extract_rental_contract(pdf, early_exit=True)
+
+    assert result['monthly_rent'] == 650.0
+    assert result['memory']['reopened'] >= 2
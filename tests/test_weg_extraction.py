@@ -0,0 +1,128 @@
+"""
+WEG-Extraktion: Vorprüfung, Summenzeile, Extraktionspläne
+"""
+
+import pdfplumber
+import pytest
+
+import config
+from pdf_factory import COST_ROWS, SUMMARY_ROWS, build_pdf
+from src.page_cache import open_pdf
+from src.pdf_extractor import _prescan_weg_pages, _read_weg_page, _weg_summary_cents, extract_weg_data
+
+
+def cost_names(result):
+    return sorted(cost['name'] for cost in result['costs'])
+
+
+def test_cover_letter_mentioning_total_does_not_truncate(tmp_path):
+    pdf = build_pdf(tmp_path / 'weg.pdf', [
+        ["Übersicht Hausgeldabrechnung 2023", "Umlagefähige Kosten: 298,65", "Nicht umlagefähige Kosten: 300,00"],
+        ["Einzelabrechnung", COST_ROWS + SUMMARY_ROWS],
+    ])
+
+    prescan = _prescan_weg_pages(pdf)
+    assert prescan['last_page'] == 1
+
+    result = extract_weg_data(pdf, 2023)
+    assert cost_names(result) == ['Grundsteuer', 'Niederschlagsentwässerung', 'Trinkwasseruntersuchung']
+
+
+def test_prescan_ignores_non_allocable_total_and_skip_pages(tmp_path):
+    pdf = build_pdf(tmp_path / 'weg.pdf', [
+        ["Sehr geehrte Frau Rosenkranz,", "Umlagefähige Kosten: 298,65"],
+        ["Einzelabrechnung", COST_ROWS, "Nicht umlagefähige Kosten: 300,00"],
+    ])
+
+    # Ohne echte Summenzeile: keine Vorprüfung, alle Seiten werden analysiert
+    assert _prescan_weg_pages(pdf) is None
+    assert 'Grundsteuer' in cost_names(extract_weg_data(pdf, 2023))
+
+
+def test_reconciliation_reads_summary_amount_column(tmp_path):
+    # Summenzeile mit Gesamtbetrag vor der Betragsspalte (wie die Kostenzeilen)
+    summary_rows = [["Umlagefähige Kosten:", "52.394,90", "", "10.000,00", "57,00", "298,65", ""]]
+    pdf = build_pdf(tmp_path / 'weg.pdf', [["Einzelabrechnung", COST_ROWS + summary_rows]])
+
+    result = extract_weg_data(pdf, 2023)
+    assert result['reconciliation'] == {
+        'status': 'ok',
+        'expected_cents': 29865,
+        'actual_cents': 29865,
+        'difference_cents': 0
+    }
+    assert all(cost['confidence'] >= 0.95 for cost in result['costs'])
+
+
+def test_reconciliation_reports_mismatch_in_cents(tmp_path):
+    summary_rows = [["Umlagefähige Kosten:", "52.394,90", "", "10.000,00", "57,00", "298,66", ""]]
+    pdf = build_pdf(tmp_path / 'weg.pdf', [["Einzelabrechnung", COST_ROWS + summary_rows]])
+
+    reconciliation = extract_weg_data(pdf, 2023)['reconciliation']
+    assert reconciliation['status'] == 'mismatch'
+    assert reconciliation['difference_cents'] == -1
+
+
+def test_summary_text_fallback_takes_last_amount():
+    text = "Nicht umlagefähige Kosten: 300,00\nUmlagefähige Kosten: 4.000,00 57,00 125,63"
+    assert _weg_summary_cents(text) == 12563
+    assert _weg_summary_cents("Nicht umlagefähige Kosten: 300,00") is None
+
+
+def test_plan_keeps_continuation_pages_of_cost_table(tmp_path):
+    # Seite 2 setzt die Kostentabelle ohne eigene Tabellenlinien fort (nur Text)
+    pdf = build_pdf(tmp_path / 'weg.pdf', [
+        ["Einzelabrechnung", COST_ROWS],
+        ["Allgemeinstrom 3.000,00 Miteigentumsanteile 10.000,00 57,00 44,10"],
+        ["Einzelabrechnung", [["Umlagefähige Kosten:", "55.394,90", "", "10.000,00", "57,00", "342,75", ""]]],
+    ])
+
+    learned = extract_weg_data(pdf, 2023)
+    planned = extract_weg_data(pdf, 2023)
+
+    assert cost_names(planned) == cost_names(learned)
+    assert planned['reconciliation']['status'] == 'ok'
+    assert 'Allgemeinstrom' not in planned['confidence']['reasons']
+
+
+@pytest.mark.parametrize('engine', ['words', 'pdfplumber'])
+def test_page_cache_separates_table_regions(tmp_path, monkeypatch, engine):
+    monkeypatch.setitem(config.PAGE_CACHE, 'enabled', True)
+    pdf = build_pdf(tmp_path / 'weg.pdf', [["Einzelabrechnung", COST_ROWS]])
+    with pdfplumber.open(pdf) as document:
+        x0, top, x1, bottom = document.pages[0].find_tables()[0].bbox
+    whole_table = [x0 - 5, top - 5, x1 + 5, bottom + 5]
+    upper_half = [x0 - 5, top - 5, x1 + 5, (top + bottom) / 2]
+
+    with open_pdf(pdf) as document:
+        _, tables = _read_weg_page(document.pages[0], True, engine, whole_table)
+    assert len(tables[0]) == len(COST_ROWS)
+
+    # Gleiche Seite aus dem Cache, aber anderer Bereich: darf nicht die alten Tabellen liefern
+    with open_pdf(pdf) as document:
+        _, tables = _read_weg_page(document.pages[0], True, engine, upper_half)
+    assert len(tables[0]) < len(COST_ROWS)
+
+
+@pytest.mark.parametrize('workers', [2, 4])
+def test_parallel_extraction_matches_serial(tmp_path, monkeypatch, workers):
+    monkeypatch.setitem(config.WEG_EXTRACTION, 'plans', False)
+    more_rows = [
+        COST_ROWS[0],
+        ["Hausstrom", "7.736,84", "Miteigentumsanteile", "10.000,00", "57,00", "44,10", ""],
+        ["Gartenpflege", "3.985,96", "Miteigentumsanteile", "10.000,00", "57,00", "22,72", ""],
+        ["Umlagefähige Kosten:", "", "", "", "", "365,47", ""],
+    ]
+    pdf = build_pdf(tmp_path / 'weg.pdf', [
+        ["Übersicht Hausgeldabrechnung 2023", "Sehr geehrte Damen und Herren,"],
+        ["Einzelabrechnung", COST_ROWS],
+        ["Einzelabrechnung (Fortsetzung)", more_rows],
+        ["Erhaltungsrücklage", [["Anfangsbestand", "10.000,00"], ["Endbestand", "12.000,00"]]],
+    ])
+
+    serial = extract_weg_data(pdf, 2023, workers=1)
+    parallel = extract_weg_data(pdf, 2023, workers=workers)
+
+    assert serial['reconciliation']['status'] == 'ok'
+    assert parallel['costs'] == serial['costs']
+    assert parallel['total'] == serial['total']